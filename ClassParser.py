@@ -1,114 +1,233 @@
 import re
+from array import array
+from types import GeneratorType
+
+from recorrido import ejecutar
+from traza import traza, DEBUG
+
+class Simbolo:
+    """Registro de una variable en la tabla de símbolos"""
+    __slots__ = ("nombre", "tipo", "ambito", "inicializada", "usada", "tipo_simbolo")
+
+    def __init__(self, nombre, tipo, ambito, inicializada):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.ambito = ambito
+        self.inicializada = inicializada
+        self.usada = False
+        self.tipo_simbolo = 'variable'
+
+    def __getitem__(self, clave):
+        # Compatibilidad con el antiguo formato de diccionario
+        return getattr(self, clave)
+
+
+class SimboloFuncion:
+    """Registro de una función en la tabla de símbolos"""
+    __slots__ = ("nombre", "tipo_retorno", "parametros", "tipo_simbolo")
+
+    def __init__(self, nombre, tipo_retorno, parametros):
+        self.nombre = nombre
+        self.tipo_retorno = tipo_retorno
+        self.parametros = parametros
+        self.tipo_simbolo = 'funcion'
+
+    def __getitem__(self, clave):
+        return getattr(self, clave)
+
+
+class _Entorno:
+    """
+    Enlaces visibles de una cadena de tablas de símbolos.
+
+    Cada identificador se interna a un entero que indexa una pila de
+    enlaces (profundidad, Simbolo). Las tablas abiertas forman una única
+    cadena desde la raíz; al cerrarse, cada tabla deshace sus enlaces
+    usando su propio registro, así que la cima de cada pila es siempre la
+    declaración visible desde el ámbito más interno.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.enlaces = []
+        self.abiertas = []
+
+    def id_nombre(self, nombre):
+        ident = self.ids.get(nombre)
+        if ident is None:
+            ident = self.ids[nombre] = len(self.enlaces)
+            self.enlaces.append([])
+        return ident
+
+    def abrir(self, tabla):
+        # Un ámbito nuevo cierra los hermanos más profundos que sigan abiertos
+        while self.abiertas and self.abiertas[-1].profundidad >= tabla.profundidad:
+            self._cerrar_ultima()
+        self.abiertas.append(tabla)
+        tabla.abierta = True
+
+    def cerrar(self, tabla):
+        while tabla.abierta:
+            self._cerrar_ultima()
+
+    def _cerrar_ultima(self):
+        tabla = self.abiertas.pop()
+        for ident in reversed(tabla.deshacer):
+            self.enlaces[ident].pop()
+        tabla.deshacer = []
+        tabla.abierta = False
+
 
 class TablaSimbolos:
     def __init__(self, padre=None):
         self.padre = padre
         self.simbolos = {}
         self.funciones = {}
-        
+        self.profundidad = padre.profundidad + 1 if padre else 0
+        self.entorno = padre.entorno if padre else _Entorno()
+        self.deshacer = []   # ids enlazados por esta tabla, para deshacer al cerrar
+        self.abierta = False
+        if padre is None or padre.abierta:
+            self.entorno.abrir(self)
+    
+    def cerrar(self):
+        """Cierra el ámbito: sus variables dejan de ser visibles en el entorno"""
+        self.entorno.cerrar(self)
     
     def insertar_variable(self, nombre, tipo, ambito="global", inicializada=False):
         if nombre in self.simbolos:
             return False
         
-        self.simbolos[nombre] = {
-            'tipo': tipo,
-            'ambito': ambito,
-            'inicializada': inicializada,
-            'usada': False,
-            'tipo_simbolo': 'variable'
-        }
+        simbolo = Simbolo(nombre, tipo, ambito, inicializada)
+        self.simbolos[nombre] = simbolo
+        if self.abierta:
+            ident = self.entorno.id_nombre(nombre)
+            pila = self.entorno.enlaces[ident]
+            # Normalmente esta es la tabla más interna y el enlace va a la cima
+            k = len(pila)
+            while k and pila[k - 1][0] > self.profundidad:
+                k -= 1
+            pila.insert(k, (self.profundidad, simbolo))
+            self.deshacer.append(ident)
         return True
     
     def insertar_funcion(self, nombre, tipo_retorno, parametros):
         if nombre in self.funciones:
             return False
         
-        self.funciones[nombre] = {
-            'tipo_retorno': tipo_retorno,
-            'parametros': parametros,
-            'tipo_simbolo': 'funcion'
-        }
+        self.funciones[nombre] = SimboloFuncion(nombre, tipo_retorno, parametros)
         return True
     
     def buscar_variable(self, nombre):
-        if nombre in self.simbolos:
-            return self.simbolos[nombre]
-        elif self.padre:
-            return self.padre.buscar_variable(nombre)
-        else:
+        if self.abierta:
+            ident = self.entorno.ids.get(nombre)
+            if ident is None:
+                return None
+            pila = self.entorno.enlaces[ident]
+            for k in range(len(pila) - 1, -1, -1):
+                if pila[k][0] <= self.profundidad:
+                    return pila[k][1]
             return None
+        
+        # Tabla ya cerrada: recorrido por la cadena de padres
+        tabla = self
+        while tabla:
+            if nombre in tabla.simbolos:
+                return tabla.simbolos[nombre]
+            tabla = tabla.padre
+        return None
     
     def buscar_funcion(self, nombre):
-        if nombre in self.funciones:
-            return self.funciones[nombre]
-        elif self.padre:
-            return self.padre.buscar_funcion(nombre)
-        else:
-            return None
+        # Las funciones solo se declaran en el ámbito global
+        tabla = self
+        while tabla:
+            if nombre in tabla.funciones:
+                return tabla.funciones[nombre]
+            tabla = tabla.padre
+        return None
     
     def marcar_usada(self, nombre):
         simbolo = self.buscar_variable(nombre)
         if simbolo:
-            simbolo['usada'] = True
+            simbolo.usada = True
     
     def marcar_inicializada(self, nombre):
         simbolo = self.buscar_variable(nombre)
         if simbolo:
-            simbolo['inicializada'] = True
+            simbolo.inicializada = True
     
     def obtener_variables_no_usadas(self):
         return [nombre for nombre, info in self.simbolos.items() 
-                if not info['usada']]
+                if not info.usada]
     
     def obtener_variables_no_inicializadas(self):
         return [nombre for nombre, info in self.simbolos.items() 
-                if not info['inicializada']]
+                if not info.inicializada]
     
     def imprimir_tabla(self):
-        print("\n" + "="*60)
-        print("TABLA DE SÍMBOLOS")
-        print("="*60)
+        print(self.texto_tabla())
+    
+    def texto_tabla(self):
+        """Texto que imprime imprimir_tabla()"""
+        lineas = ["\n" + "="*60, "TABLA DE SÍMBOLOS", "="*60]
         
         if self.simbolos:
-            print("\n--- VARIABLES ---")
+            lineas.append("\n--- VARIABLES ---")
             for nombre, info in self.simbolos.items():
-                estado = "✓" if info['inicializada'] else "✗"
-                usada = "✓" if info['usada'] else "✗"
-                print(f"  {nombre}: {info['tipo']} | ámbito: {info['ambito']} | inicializada: {estado} | usada: {usada}")
+                estado = "✓" if info.inicializada else "✗"
+                usada = "✓" if info.usada else "✗"
+                lineas.append(f"  {nombre}: {info.tipo} | ámbito: {info.ambito} | inicializada: {estado} | usada: {usada}")
         
         if self.funciones:
-            print("\n--- FUNCIONES ---")
+            lineas.append("\n--- FUNCIONES ---")
             for nombre, info in self.funciones.items():
-                params_str = ", ".join([f"{p[0]} {p[1]}" for p in info['parametros']])
-                print(f"  {nombre}: {info['tipo_retorno']} ({params_str})")
+                params_str = ", ".join([f"{p[0]} {p[1]}" for p in info.parametros])
+                lineas.append(f"  {nombre}: {info.tipo_retorno} ({params_str})")
         
-        print("="*60)
+        lineas.append("="*60)
+        return "\n".join(lineas)
 
 class ParserAsignacion:
     def __init__(self, tokens_con_ubicacion, tokens_simple=None):
        
+        # tokens_con_ubicacion es el TokenBuffer devuelto por tokenizar()
         self.tokens_con_ubicacion = tokens_con_ubicacion
         
         if tokens_simple is None:
            
-            self.tokens = [(t[2], t[3]) for t in tokens_con_ubicacion]
+            # Vista (tipo, valor) sobre el buffer, ya terminada en EOF
+            self.tokens = tokens_con_ubicacion.vista_parser()
         else:
            
             self.tokens = tokens_simple
+            self.tokens.append(("EOF", "EOF"))
             
-        self.tokens.append(("EOF", "EOF"))
         self.pos = 0
         self.tabla_global = TablaSimbolos()
         self.tabla_actual = self.tabla_global
         self.ambito_actual = "global"
+        self.arena = ArenaAST()
+
+    def nodo(self, nombre, valor=None, hijos=None, tipo=None, inicio=None, fin=None, token=None):
+        """
+        Crea un nodo del AST en la arena de este parser y registra su tramo de
+        tokens [inicio, fin) y su token principal (el que se señala en los
+        errores). Por defecto el nodo abarca el último token consumido.
+        """
+        if inicio is None:
+            inicio = self.pos - 1
+        nodo = _nueva_vista(ASTNode)
+        _fijar_arena(nodo, self.arena)
+        _fijar_indice(nodo, self.arena.nuevo(nombre, valor, hijos or (), tipo, inicio,
+                                             self.pos if fin is None else fin, inicio if token is None else token))
+        return nodo
         
     def get_ubicacion_actual(self):
         """Obtiene información de ubicación del token actual"""
-        if self.pos < len(self.tokens_con_ubicacion):
-            num_linea, columna, _, valor, linea_original = self.tokens_con_ubicacion[self.pos]
-            return num_linea, columna, valor, linea_original
-        return None, None, None, None
+        try:
+            return self.tokens_con_ubicacion.ubicacion(self.pos)
+        except IndexError:
+            return None, None, None, None
     def entrar_ambito(self, nombre_ambito):
         nueva_tabla = TablaSimbolos(padre=self.tabla_actual)
         self.tabla_actual = nueva_tabla
@@ -116,21 +235,30 @@ class ParserAsignacion:
 
     def salir_ambito(self):
         if self.tabla_actual.padre:
+            self.tabla_actual.cerrar()
             self.tabla_actual = self.tabla_actual.padre
             self.ambito_actual = "global" if self.tabla_actual.padre is None else "local"
 
     def current_token(self):
         return self.tokens[self.pos]
 
+    def tipo_adelante(self, k):
+        """Tipo del token k posiciones por delante del actual (None tras EOF)"""
+        try:
+            return self.tokens[self.pos + k][0]
+        except IndexError:
+            return None
+
     def eat(self, token_type):
         tok_type, tok_val = self.current_token()
-        num_linea, columna, _, linea_original = self.get_ubicacion_actual()
         
-        print(f"[DEBUG] Esperado: {token_type}, Encontrado: {tok_type} ({tok_val})")
+        if traza.nivel >= DEBUG:
+            traza.emitir("parser", DEBUG, f"Esperado: {token_type}, Encontrado: {tok_type} ({tok_val})")
         if tok_type == token_type:
             self.pos += 1
             return tok_val
         else:
+            num_linea, columna, _, linea_original = self.get_ubicacion_actual()
             #  MEJOR MENSAJE DE ERROR con ubicación
             error_msg = f"Error sintáctico en línea {num_linea}, columna {columna}:\n"
             error_msg += f"  Se esperaba '{token_type}', pero se encontró '{tok_val}'\n"
@@ -156,47 +284,47 @@ class ParserAsignacion:
         elif tok_type == "RETURN":
             return self.return_statement()
         elif tok_type == "TIPO_DATO":
-            if (self.pos + 2 < len(self.tokens) and 
-                self.tokens[self.pos + 1][0] == "VARIABLE" and 
-                self.tokens[self.pos + 2][0] == "PARENTESIS_APERTURA"):
+            if (self.tipo_adelante(1) == "VARIABLE" and 
+                self.tipo_adelante(2) == "PARENTESIS_APERTURA"):
                 return self.function_declaration()
             else:
                 return self.assignment()
         elif tok_type == "VARIABLE":
             # Detectar llamada a función como expresión
-            if (self.pos + 1 < len(self.tokens) and 
-                self.tokens[self.pos + 1][0] == "PARENTESIS_APERTURA"):
-                expr = self.expression()
-                self.eat("PUNTO_COMA")
-                return expr
+            if self.tipo_adelante(1) == "PARENTESIS_APERTURA":
+                return self.expression_statement()
             else:
                 return self.assignment()
         elif tok_type == "EOF":
             return None
         else:
             raise SyntaxError(f"Instrucción inesperada: {tok_type} ({tok_val})")
+    def expression_statement(self):
+        """Expresión usada como instrucción (una llamada a función)"""
+        expr = yield self.expression()
+        self.eat("PUNTO_COMA")
+        return expr
+
     def break_statement(self):
         """Maneja la instrucción break"""
-        print(f"[DEBUG BREAK] Iniciando break. Token: {self.current_token()}")
+        inicio = self.pos
         self.eat("BREAK")
         self.eat("PUNTO_COMA")
-        print(f"[DEBUG BREAK] Break completado exitosamente")
-        return ASTNode("Break")
+        return self.nodo("Break", inicio=inicio)
 
     def continue_statement(self):
         """Maneja la instrucción continue"""
-        print(f"[DEBUG CONTINUE] Iniciando continue. Token: {self.current_token()}")
+        inicio = self.pos
         self.eat("CONTINUE")
         self.eat("PUNTO_COMA")
-        print(f"[DEBUG CONTINUE] Continue completado exitosamente")
-        return ASTNode("Continue")
+        return self.nodo("Continue", inicio=inicio)
     def function_declaration(self):
-        print(f"[DEBUG FUNCTION] Iniciando función. Token: {self.current_token()}")
-        
+        inicio = self.pos
         tipo_retorno = self.eat("TIPO_DATO")
         nombre_funcion = self.eat("VARIABLE")
         
-        print(f"[DEBUG FUNCTION] Función: {tipo_retorno} {nombre_funcion}")
+        if traza.nivel >= DEBUG:
+            traza.emitir("parser", DEBUG, f"Función: {tipo_retorno} {nombre_funcion}")
         
         self.eat("PARENTESIS_APERTURA")
         
@@ -215,37 +343,39 @@ class ParserAsignacion:
             self.tabla_actual.insertar_variable(param.valor, param.tipo, nombre_funcion, inicializada=True)
         
         # Procesar el bloque de la función
-        bloque_funcion = self.block()
+        bloque_funcion = yield self.block()
         
         
         self.salir_ambito()
         
-        tipo_retorno_node = ASTNode("TipoRetorno", tipo_retorno)
-        return ASTNode("Funcion", nombre_funcion, 
+        tipo_retorno_node = self.nodo("TipoRetorno", tipo_retorno, inicio=inicio, fin=inicio + 1)
+        return self.nodo("Funcion", nombre_funcion, 
                       hijos=[tipo_retorno_node, parametros, bloque_funcion], 
-                      tipo=tipo_retorno)
+                      tipo=tipo_retorno, inicio=inicio, token=inicio + 1)
 
     def parameters(self):
+        inicio = self.pos
         parametros = []
         
         if self.current_token()[0] == "PARENTESIS_CIERRE":
-            return ASTNode("Parametros", hijos=parametros)
+            return self.nodo("Parametros", hijos=parametros, inicio=inicio)
         
         if self.current_token()[0] == "TIPO_DATO":
             tipo = self.eat("TIPO_DATO")
             nombre = self.eat("VARIABLE")
-            parametros.append(ASTNode("Parametro", nombre, tipo=tipo))
+            parametros.append(self.nodo("Parametro", nombre, tipo=tipo, inicio=self.pos - 2))
             
             while self.current_token()[0] == "COMA":
                 self.eat("COMA")
                 tipo = self.eat("TIPO_DATO")
                 nombre = self.eat("VARIABLE")
-                parametros.append(ASTNode("Parametro", nombre, tipo=tipo))
+                parametros.append(self.nodo("Parametro", nombre, tipo=tipo, inicio=self.pos - 2))
         
-        return ASTNode("Parametros", hijos=parametros)
+        return self.nodo("Parametros", hijos=parametros, inicio=inicio)
 
     def assignment(self):
         # Verificar si es declaración (tiene tipo explícito) o asignación
+        inicio = self.pos
         tok_type, tok_val = self.current_token()
         es_declaracion = (tok_type == "TIPO_DATO")
         
@@ -254,9 +384,10 @@ class ParserAsignacion:
         else:
             tipo_var = None
 
+        pos_var = self.pos
         var_name = self.eat("VARIABLE")
         self.eat("ASIGNACION")
-        expr_node = self.expression()
+        expr_node = yield self.expression()
         self.eat("PUNTO_COMA")
 
         #  NUEVO: USAR TABLA DE SÍMBOLOS EN LUGAR DE symbol_table
@@ -277,72 +408,92 @@ class ParserAsignacion:
         tipo_ast = tipo_var
         if not tipo_ast:
             simbolo = self.tabla_actual.buscar_variable(var_name)
-            tipo_ast = simbolo['tipo'] if simbolo else None
+            tipo_ast = simbolo.tipo if simbolo else None
 
-        var_node = ASTNode("Variable", var_name, tipo=tipo_ast)
-        return ASTNode("Asignacion", hijos=[var_node, expr_node])
+        var_node = self.nodo("Variable", var_name, tipo=tipo_ast, inicio=pos_var, fin=pos_var + 1)
+        return self.nodo("Asignacion", hijos=[var_node, expr_node], inicio=inicio)
 
     # ... (los demás métodos se mantienen igual: return_statement, parse_bloque, program, block, if_statement, while_statement, for_statement)
 
+    # Precedencia de cada operador binario (mayor número = liga más fuerte).
+    # Todos son asociativos por la izquierda.
+    PRECEDENCIA = {
+        "OR_LOGICO": 1,
+        "AND_LOGICO": 2,
+        "IGUAL_IGUAL": 3, "DIFERENTE": 3,
+        "MAYOR_QUE": 4, "MENOR_QUE": 4, "MAYOR_IGUAL": 4, "MENOR_IGUAL": 4,
+        "SUMA": 5, "RESTA": 5,
+        "MULTIPLICACION": 6, "DIVISION": 6, "MODULO": 6,
+    }
+    # Hasta este nivel el resultado es bool; por encima es aritmético
+    PRECEDENCIA_BOOLEANA = 4
+
     def expression(self):
-        return self.logical_or()
-
-    def logical_or(self):
-        nodo = self.logical_and()
-        while self.current_token()[0] == "OR_LOGICO":
-            op = self.eat("OR_LOGICO")
-            derecho = self.logical_and()
-            nodo = ASTNode("BinOp", op, [nodo, derecho], tipo="bool")
-        return nodo
+        """
+        Parser de expresiones por precedencia de operadores con pilas
+        explícitas. Construye los mismos nodos BinOp (y tipos) que la antigua
+        cadena logical_or -> ... -> factor, sin una llamada por nivel y sin
+        recursión para los paréntesis. Las llamadas a función anidadas se
+        ceden al motor de recorrido (ver recorrido.py).
+        """
+        operandos = []
+        operadores = []   # (precedencia, operador, posición) o None para un '(' abierto
+        parentesis_abiertos = 0
 
-    def logical_and(self):
-        nodo = self.equality()
-        while self.current_token()[0] == "AND_LOGICO":
-            op = self.eat("AND_LOGICO")
-            derecho = self.equality()
-            nodo = ASTNode("BinOp", op, [nodo, derecho], tipo="bool")
-        return nodo
+        while True:
+            # Se espera un operando, posiblemente precedido de '('
+            while self.current_token()[0] == "PARENTESIS_APERTURA":
+                self.eat("PARENTESIS_APERTURA")
+                operadores.append(None)
+                parentesis_abiertos += 1
+            operando = self.primary()
+            if type(operando) is GeneratorType:  # llamada a función: se cede al motor
+                operando = yield operando
+            operandos.append(operando)
 
-    def equality(self):
-        nodo = self.comparison()
-        while self.current_token()[0] in ("IGUAL_IGUAL", "DIFERENTE"):
-            op = self.eat(self.current_token()[0])
-            derecho = self.comparison()
-            nodo = ASTNode("BinOp", op, [nodo, derecho], tipo="bool")
-        return nodo
+            # Tras el operando: cerrar paréntesis o leer un operador binario
+            while True:
+                tok_type = self.current_token()[0]
+                if tok_type == "PARENTESIS_CIERRE" and parentesis_abiertos:
+                    while operadores[-1] is not None:
+                        self._reducir(operandos, *operadores.pop())
+                    operadores.pop()
+                    parentesis_abiertos -= 1
+                    self.eat("PARENTESIS_CIERRE")
+                    continue
 
-    def comparison(self):
-        nodo = self.term()
-        while self.current_token()[0] in ("MAYOR_QUE", "MENOR_QUE", "MAYOR_IGUAL", "MENOR_IGUAL"):
-            op = self.eat(self.current_token()[0])
-            derecho = self.term()
-            nodo = ASTNode("BinOp", op, [nodo, derecho], tipo="bool")
-        return nodo
+                precedencia = self.PRECEDENCIA.get(tok_type)
+                if precedencia is None:
+                    if parentesis_abiertos:
+                        self.eat("PARENTESIS_CIERRE")  # lanza el error de sintaxis
+                    while operadores:
+                        self._reducir(operandos, *operadores.pop())
+                    return operandos[0]
 
-    def term(self):
-        nodo = self.factor()
-        while self.current_token()[0] in ("SUMA", "RESTA"):
-            op = self.eat(self.current_token()[0])
-            derecho = self.factor()
-            tipo_resultado = "float" if nodo.tipo == "float" or derecho.tipo == "float" else "int"
-            nodo = ASTNode("BinOp", op, [nodo, derecho], tipo=tipo_resultado)
-        return nodo
+                while operadores and operadores[-1] is not None and operadores[-1][0] >= precedencia:
+                    self._reducir(operandos, *operadores.pop())
+                operadores.append((precedencia, self.eat(tok_type), self.pos - 1))
+                break
 
-    def factor(self):
-        nodo = self.primary()
-        while self.current_token()[0] in ("MULTIPLICACION", "DIVISION", "MODULO"):
-            op = self.eat(self.current_token()[0])
-            derecho = self.primary()
-            tipo_resultado = "float" if nodo.tipo == "float" or derecho.tipo == "float" else "int"
-            nodo = ASTNode("BinOp", op, [nodo, derecho], tipo=tipo_resultado)
-        return nodo
+    def _reducir(self, operandos, precedencia, op, pos_op):
+        """Sustituye los dos operandos superiores por su BinOp"""
+        derecho = operandos.pop()
+        izquierdo = operandos.pop()
+        if precedencia <= self.PRECEDENCIA_BOOLEANA:
+            tipo_resultado = "bool"
+        elif izquierdo.tipo == "float" or derecho.tipo == "float":
+            tipo_resultado = "float"
+        else:
+            tipo_resultado = "int"
+        operandos.append(self.nodo("BinOp", op, [izquierdo, derecho], tipo=tipo_resultado,
+                                   inicio=izquierdo.tramo[0], fin=derecho.tramo[1], token=pos_op))
 
     def primary(self):
         tok_type, tok_val = self.current_token()
         if tok_type == "NUMERO":
             self.eat("NUMERO")
             tipo = "float" if "." in tok_val else "int"
-            return ASTNode("Numero", tok_val, tipo=tipo)
+            return self.nodo("Numero", tok_val, tipo=tipo)
         elif tok_type == "VARIABLE":
             self.eat("VARIABLE")
             
@@ -351,72 +502,76 @@ class ParserAsignacion:
             
             # Obtener tipo de la tabla de símbolos
             simbolo = self.tabla_actual.buscar_variable(tok_val)
-            tipo_var = simbolo['tipo'] if simbolo else None
+            tipo_var = simbolo.tipo if simbolo else None
             
             # Detectar llamada a función
             if self.current_token()[0] == "PARENTESIS_APERTURA":
                 return self.function_call(tok_val)
             else:
-                return ASTNode("Variable", tok_val, tipo=tipo_var)
+                return self.nodo("Variable", tok_val, tipo=tipo_var)
         elif tok_type in ("TRUE", "FALSE"):
             self.eat(tok_type)
-            return ASTNode("Booleano", tok_val, tipo="bool")
-        elif tok_type == "PARENTESIS_APERTURA":
-            self.eat("PARENTESIS_APERTURA")
-            expr = self.expression()
-            self.eat("PARENTESIS_CIERRE")
-            return expr
+            return self.nodo("Booleano", tok_val, tipo="bool")
         else:
             raise SyntaxError(f"Factor inválido: {tok_val}")
 
     def function_call(self, nombre_funcion):
-        print(f"[DEBUG FUNCTION CALL] Llamando función: {nombre_funcion}")
+        inicio = self.pos - 1  # el nombre ya se consumió
+        if traza.nivel >= DEBUG:
+            traza.emitir("parser", DEBUG, f"Llamada a función: {nombre_funcion}")
         
         self.eat("PARENTESIS_APERTURA")
-        argumentos = self.arguments()
+        argumentos = yield self.arguments()
         self.eat("PARENTESIS_CIERRE")
         
         # Obtener información de la función desde la tabla
         info_funcion = self.tabla_global.buscar_funcion(nombre_funcion)
-        tipo_retorno = info_funcion['tipo_retorno'] if info_funcion else None
+        tipo_retorno = info_funcion.tipo_retorno if info_funcion else None
         
-        return ASTNode("FunctionCall", nombre_funcion, 
+        return self.nodo("FunctionCall", nombre_funcion, 
                       hijos=[argumentos], 
-                      tipo=tipo_retorno)
+                      tipo=tipo_retorno, inicio=inicio)
 
     def arguments(self):
+        inicio = self.pos
         argumentos = []
         
         if self.current_token()[0] == "PARENTESIS_CIERRE":
-            return ASTNode("Argumentos", hijos=argumentos)
+            return self.nodo("Argumentos", hijos=argumentos, inicio=inicio)
         
-        argumentos.append(self.expression())
+        argumentos.append((yield self.expression()))
         
         while self.current_token()[0] == "COMA":
             self.eat("COMA")
-            argumentos.append(self.expression())
+            argumentos.append((yield self.expression()))
         
-        return ASTNode("Argumentos", hijos=argumentos)
+        return self.nodo("Argumentos", hijos=argumentos, inicio=inicio)
 
     def parse_bloque(self):
+        inicio = self.pos
         self.eat("LLAVE_APERTURA")
         hijos = []
         while self.current_token()[0] != "LLAVE_CIERRE" and self.current_token()[0] != "EOF":
-            hijo = self.parse_instruccion()
+            hijo = yield self.parse_instruccion()
             if hijo:
                 hijos.append(hijo)
         self.eat("LLAVE_CIERRE")
-        return ASTNode("Bloque", hijos=hijos)
+        return self.nodo("Bloque", hijos=hijos, inicio=inicio)
     
     def program(self):
+        """Analiza el programa completo y devuelve la raíz del AST"""
+        return ejecutar(self.program_statements())
+
+    def program_statements(self):
         sentencias = []
         while self.current_token()[0] != "EOF":
-            instruccion = self.parse_instruccion()
+            instruccion = yield self.parse_instruccion()
             if instruccion:
                 sentencias.append(instruccion)
-        return ASTNode("Program", hijos=sentencias)
+        return self.nodo("Program", hijos=sentencias, inicio=0)
 
     def block(self):
+        inicio = self.pos
         self.eat("LLAVE_APERTURA")
         
         # SOLO CREAR NUEVO ÁMBITO SI NO ESTAMOS EN UN FOR
@@ -425,7 +580,7 @@ class ParserAsignacion:
         
         sentencias = []
         while self.current_token()[0] != "LLAVE_CIERRE" and self.current_token()[0] != "EOF":
-            sentencias.append(self.parse_instruccion())
+            sentencias.append((yield self.parse_instruccion()))
         
         self.eat("LLAVE_CIERRE")
         
@@ -433,34 +588,37 @@ class ParserAsignacion:
         if self.ambito_actual == "block":
             self.salir_ambito()
         
-        return ASTNode("Bloque", hijos=sentencias)
+        return self.nodo("Bloque", hijos=sentencias, inicio=inicio)
     
     def if_statement(self):
+        inicio = self.pos
         self.eat("IF")
         self.eat("PARENTESIS_APERTURA")
-        condicion = self.expression()
+        condicion = yield self.expression()
         self.eat("PARENTESIS_CIERRE")
         
-        bloque_if = self.block()
+        bloque_if = yield self.block()
         
         if self.current_token()[0] == "ELSE":
             self.eat("ELSE")
             if self.current_token()[0] == "IF":
-                bloque_else = self.if_statement()
+                bloque_else = yield self.if_statement()
             else:
-                bloque_else = self.block()
-            return ASTNode("If", hijos=[condicion, bloque_if, bloque_else])
+                bloque_else = yield self.block()
+            return self.nodo("If", hijos=[condicion, bloque_if, bloque_else], inicio=inicio)
         else:
-            return ASTNode("If", hijos=[condicion, bloque_if])
+            return self.nodo("If", hijos=[condicion, bloque_if], inicio=inicio)
         
     def while_statement(self):
+        inicio = self.pos
         self.eat("WHILE")
         self.eat("PARENTESIS_APERTURA")
-        condicion = self.expression()
+        condicion = yield self.expression()
         self.eat("PARENTESIS_CIERRE")
-        bloque_while = self.block()
-        return ASTNode("While", hijos=[condicion, bloque_while])
+        bloque_while = yield self.block()
+        return self.nodo("While", hijos=[condicion, bloque_while], inicio=inicio)
     def for_statement(self):
+        inicio = self.pos
         self.eat("FOR")
         self.eat("PARENTESIS_APERTURA")
         
@@ -468,100 +626,300 @@ class ParserAsignacion:
         self.entrar_ambito("for")
         
         inicializacion = None
+        inicio_init = self.pos
         if self.current_token()[0] != "PUNTO_COMA":
             if self.current_token()[0] == "TIPO_DATO":
                 tipo_var = self.eat("TIPO_DATO")
                 var_name = self.eat("VARIABLE")
                 self.eat("ASIGNACION")
-                expr = self.expression()
+                expr = yield self.expression()
                 
                 # ✅ CORREGIDO: PERMITIR SHADOWING - siempre insertar sin verificar
                 # El shadowing está permitido en C++ y muchos lenguajes
                 self.tabla_actual.insertar_variable(var_name, tipo_var, self.ambito_actual, inicializada=True)
                 
-                var_node = ASTNode("Variable", var_name, tipo=tipo_var)
-                inicializacion = ASTNode("Asignacion", hijos=[var_node, expr])
+                var_node = self.nodo("Variable", var_name, tipo=tipo_var, inicio=inicio_init + 1, fin=inicio_init + 2)
+                inicializacion = self.nodo("Asignacion", hijos=[var_node, expr], inicio=inicio_init)
             else:
                 # Asignación sin declaración
                 var_name = self.eat("VARIABLE")
                 self.eat("ASIGNACION")
-                expr = self.expression()
+                expr = yield self.expression()
                 
                 # Buscar en todos los ámbitos (padres incluidos)
                 simbolo = self.tabla_actual.buscar_variable(var_name)
                 if not simbolo:
                     raise SyntaxError(f"Variable '{var_name}' no declarada")
                 
-                var_node = ASTNode("Variable", var_name, tipo=simbolo['tipo'])
-                inicializacion = ASTNode("Asignacion", hijos=[var_node, expr])
+                var_node = self.nodo("Variable", var_name, tipo=simbolo.tipo, inicio=inicio_init, fin=inicio_init + 1)
+                inicializacion = self.nodo("Asignacion", hijos=[var_node, expr], inicio=inicio_init)
         
         self.eat("PUNTO_COMA")
         
         condicion = None
         if self.current_token()[0] != "PUNTO_COMA":
-            condicion = self.expression()
+            condicion = yield self.expression()
         self.eat("PUNTO_COMA")
         
         incremento = None
         if self.current_token()[0] != "PARENTESIS_CIERRE":
             current_type, current_val = self.current_token()
-            next_type = self.tokens[self.pos + 1][0] if self.pos + 1 < len(self.tokens) else None
+            next_type = self.tipo_adelante(1)
             
             if current_type == "VARIABLE" and next_type == "ASIGNACION":
+                inicio_inc = self.pos
                 var_name = self.eat("VARIABLE")
                 self.eat("ASIGNACION")
-                expr = self.expression()
+                expr = yield self.expression()
                 
                 simbolo = self.tabla_actual.buscar_variable(var_name)
                 if not simbolo:
                     raise SyntaxError(f"Variable '{var_name}' no declarada")
                 
-                var_node = ASTNode("Variable", var_name, tipo=simbolo['tipo'])
-                incremento = ASTNode("Asignacion", hijos=[var_node, expr])
+                var_node = self.nodo("Variable", var_name, tipo=simbolo.tipo, inicio=inicio_inc, fin=inicio_inc + 1)
+                incremento = self.nodo("Asignacion", hijos=[var_node, expr], inicio=inicio_inc)
             else:
-                incremento = self.expression()
+                incremento = yield self.expression()
         
         self.eat("PARENTESIS_CIERRE")
         
         # PROCESAR BLOQUE EN EL MISMO ÁMBITO FOR
-        bloque = self.block()
+        bloque = yield self.block()
         
         # SALIR DEL ÁMBITO FOR
         self.salir_ambito()
         
-        return ASTNode("For", hijos=[inicializacion, condicion, incremento, bloque])
+        return self.nodo("For", hijos=[inicializacion, condicion, incremento, bloque], inicio=inicio)
 
     def return_statement(self):
-        print(f"[DEBUG RETURN] Iniciando return. Token: {self.current_token()}")
+        inicio = self.pos
         self.eat("RETURN")
         
         expresion = None
         current_tok_type = self.current_token()[0]
         
         if current_tok_type != "PUNTO_COMA":
-            print(f"[DEBUG RETURN] Procesando expresión completa...")
-            print(f"[DEBUG RETURN] Token antes de expression(): {self.current_token()}")
-            
-            try:
-                expresion = self.expression()
-                print(f"[DEBUG RETURN] Expresión exitosa: {expresion.nombre}")
-                print(f"[DEBUG RETURN] Token después de expression(): {self.current_token()}")
-            except Exception as e:
-                print(f"[DEBUG RETURN] Error en expresión: {e}")
-                raise
-        
-        print(f"[DEBUG RETURN] Comiendo PUNTO_COMA. Token actual: {self.current_token()}")
+            expresion = yield self.expression()
+            if traza.nivel >= DEBUG:
+                traza.emitir("parser", DEBUG, f"Return con expresión: {expresion.nombre}")
+        
         self.eat("PUNTO_COMA")
-        print(f"[DEBUG RETURN] Return completado exitosamente")
         
         if expresion:
-            return ASTNode("Return", hijos=[expresion])
+            return self.nodo("Return", hijos=[expresion], inicio=inicio)
         else:
-            return ASTNode("Return", hijos=[])
+            return self.nodo("Return", hijos=[], inicio=inicio)
+
+# Clases de nodo del AST. El índice es el código compacto que guarda ArenaAST;
+# el código 0 marca un hijo ausente (p. ej. la inicialización vacía de un for).
+NOMBRES_NODO = [
+    None, "Program", "Funcion", "TipoRetorno", "Parametros", "Parametro",
+    "Bloque", "Asignacion", "Variable", "Numero", "Booleano", "BinOp",
+    "FunctionCall", "Argumentos", "If", "While", "For", "Break", "Continue",
+    "Return",
+]
+CODIGO_NODO = {nombre: i for i, nombre in enumerate(NOMBRES_NODO)}
+
+
+def codigo_nodo(nombre):
+    """Código de una clase de nodo, registrándola si es nueva"""
+    codigo = CODIGO_NODO.get(nombre)
+    if codigo is None:
+        codigo = CODIGO_NODO[nombre] = len(NOMBRES_NODO)
+        NOMBRES_NODO.append(nombre)
+    return codigo
+
+
+def tabla_despacho(clase, prefijo):
+    """
+    Lista indexada por código de nodo con el método prefijo + nombre de
+    'clase', o None si no lo define. Los visitantes la construyen una sola
+    vez y despachan cada nodo con tabla[nodo.clase].
+    """
+    return [getattr(clase, prefijo + nombre, None) if nombre else None
+            for nombre in NOMBRES_NODO]
+
+
+class ArenaAST:
+    """
+    Almacén compacto de nodos del AST en arrays paralelos.
+
+    Cada nodo es un índice: clase, valor y tipo (índices en un pool de
+    constantes internadas), primer hijo y siguiente hermano. Los objetos
+    ASTNode son solo vistas (índice + arena) que se crean al recorrer.
+    """
+
+    def __init__(self):
+        self.clases = array('B')
+        self.valores = array('i')
+        self.tipos = array('i')
+        self.primer_hijo = array('i')
+        self.siguiente = array('i')
+        # Tramo de tokens [inicio, fin) y token principal de cada nodo (-1 = sin ubicación)
+        self.tramo_inicio = array('i')
+        self.tramo_fin = array('i')
+        self.token_principal = array('i')
+        self.constantes = [None]
+        self.indice_constante = {None: 0}
+        self.atributos = {}   # (indice, nombre) -> valor, para atributos sueltos
+
+    def __len__(self):
+        return len(self.clases)
+
+    def constante(self, valor):
+        indice = self.indice_constante.get(valor)
+        if indice is None:
+            indice = self.indice_constante[valor] = len(self.constantes)
+            self.constantes.append(valor)
+        return indice
+
+    def nuevo(self, nombre, valor=None, hijos=(), tipo=None, inicio=-1, fin=-1, token=-1):
+        """
+        Crea un nodo con su tramo de tokens [inicio, fin) y su token principal
+        y enlaza 'hijos' (vistas o None) como su lista de hijos
+        """
+        # El parser pasa por aquí cada pocos tokens: las clases y constantes
+        # ya registradas se buscan directamente en sus diccionarios
+        indice = len(self.clases)
+        self.clases.append(0 if nombre is None else CODIGO_NODO.get(nombre) or codigo_nodo(nombre))
+        constante = self.indice_constante.get(valor)
+        self.valores.append(self.constante(valor) if constante is None else constante)
+        constante = self.indice_constante.get(tipo)
+        self.tipos.append(self.constante(tipo) if constante is None else constante)
+        self.primer_hijo.append(-1)
+        self.siguiente.append(-1)
+        self.tramo_inicio.append(inicio)
+        self.tramo_fin.append(fin)
+        self.token_principal.append(token)
+
+        anterior = -1
+        for hijo in hijos:
+            if hijo is None:
+                i = self.nuevo(None)
+            elif hijo.arena is self:
+                i = hijo.indice
+            else:
+                i = self.importar(hijo)
+            if anterior == -1:
+                self.primer_hijo[indice] = i
+            else:
+                self.siguiente[anterior] = i
+            anterior = i
+        # El último hijo puede traer el enlace de otra lista de hermanos
+        if anterior != -1:
+            self.siguiente[anterior] = -1
+        return indice
+
+    def fijar_tramo(self, indice, inicio, fin, token):
+        self.tramo_inicio[indice] = inicio
+        self.tramo_fin[indice] = fin
+        self.token_principal[indice] = token
+
+    def importar(self, nodo):
+        """Copia en esta arena un subárbol de otra arena y devuelve su índice"""
+        indice = self.nuevo(nodo.nombre, nodo.valor, nodo.hijos, nodo.tipo)
+        tramo = nodo.tramo
+        if tramo is not None:
+            self.fijar_tramo(indice, tramo[0], tramo[1], nodo.token_pos)
+        return indice
+
+    def vista(self, indice):
+        nodo = _nueva_vista(ASTNode)
+        _fijar_arena(nodo, self)
+        _fijar_indice(nodo, indice)
+        return nodo
+
+
+# Propiedades de ASTNode que se derivan de la arena y no se pueden asignar
+_SOLO_LECTURA = frozenset(("arena", "indice", "clase", "nombre", "hijos", "tramo", "token_pos"))
+
 
 class ASTNode:
-    def __init__(self, nombre, valor=None, hijos=None, tipo=None):
-        self.nombre = nombre
-        self.valor = valor
-        self.hijos = hijos or []
-        self.tipo = tipo
\ No newline at end of file
+    """
+    Vista de un nodo de ArenaAST con la interfaz nombre/valor/hijos/tipo.
+
+    ASTNode(nombre, valor, hijos, tipo) crea el nodo en la arena indicada, en
+    la de sus hijos o, si no tiene, en una arena nueva.
+    """
+    __slots__ = ("arena", "indice")
+
+    def __init__(self, nombre, valor=None, hijos=None, tipo=None, arena=None):
+        if arena is None:
+            arena = next((h.arena for h in hijos or () if h is not None), None) or ArenaAST()
+        _fijar_arena(self, arena)
+        _fijar_indice(self, arena.nuevo(nombre, valor, hijos or (), tipo))
+
+    @property
+    def clase(self):
+        """Código entero de la clase del nodo (índice en NOMBRES_NODO)"""
+        return self.arena.clases[self.indice]
+
+    @property
+    def nombre(self):
+        return NOMBRES_NODO[self.arena.clases[self.indice]]
+
+    @property
+    def valor(self):
+        return self.arena.constantes[self.arena.valores[self.indice]]
+
+    @property
+    def tipo(self):
+        return self.arena.constantes[self.arena.tipos[self.indice]]
+
+    @property
+    def tramo(self):
+        """(inicio, fin) de los tokens que abarca el nodo, o None"""
+        inicio = self.arena.tramo_inicio[self.indice]
+        return None if inicio == -1 else (inicio, self.arena.tramo_fin[self.indice])
+
+    @property
+    def token_pos(self):
+        """Índice del token que representa al nodo en los errores, o None"""
+        token = self.arena.token_principal[self.indice]
+        return None if token == -1 else token
+
+    @property
+    def hijos(self):
+        arena = self.arena
+        hijos = []
+        i = arena.primer_hijo[self.indice]
+        while i != -1:
+            hijos.append(arena.vista(i) if arena.clases[i] else None)
+            i = arena.siguiente[i]
+        return hijos
+
+    # tipo y valor se escriben en sus columnas; los atributos sueltos
+    # (tabla_global, codigo_intermedio, ...) van a la arena
+    def __setattr__(self, nombre, valor):
+        if nombre == "tipo":
+            self.arena.tipos[self.indice] = self.arena.constante(valor)
+        elif nombre == "valor":
+            self.arena.valores[self.indice] = self.arena.constante(valor)
+        elif nombre in _SOLO_LECTURA:
+            raise AttributeError(f"'{nombre}' de un nodo del AST es de solo lectura")
+        else:
+            self.arena.atributos[(self.indice, nombre)] = valor
+
+    def __getattr__(self, nombre):
+        if nombre in ("arena", "indice"):
+            raise AttributeError(nombre)
+        try:
+            return self.arena.atributos[(self.indice, nombre)]
+        except KeyError:
+            raise AttributeError(nombre) from None
+
+    def __eq__(self, otro):
+        return isinstance(otro, ASTNode) and self.arena is otro.arena and self.indice == otro.indice
+
+    def __hash__(self):
+        return hash((id(self.arena), self.indice))
+
+    def __reduce__(self):
+        return (ArenaAST.vista, (self.arena, self.indice))
+
+
+# ASTNode redefine __setattr__: las vistas fijan sus dos slots con los
+# descriptores, más baratos que object.__setattr__
+_nueva_vista = object.__new__
+_fijar_arena = ASTNode.arena.__set__
+_fijar_indice = ASTNode.indice.__set__
@@ -0,0 +1,190 @@
+"""
+Reciclado de temporales: vida de cada temporal y asignación lineal (linear scan).
+
+El generador numera los temporales de todo el programa sin repetir, así que
+una función larga usa miles de tN distintos y un intérprete o un backend
+necesitaría un hueco por cada uno. Este pase, que va el último, renumera
+los temporales de cada tramo (cada función y el código de primer nivel
+entre ellas) sobre un marco pequeño t0..tK-1:
+
+1. Vida: análisis hacia atrás por bloques del GrafoFlujo con conjuntos de
+   bits (enteros de Python) y una lista de trabajo, así que los bucles
+   anidados no obligan a recorrer el tramo entero una vez por nivel.
+2. Intervalos: cada temporal vive desde su primera definición (o desde el
+   principio de un bloque en el que entra vivo) hasta su último uso (o el
+   final de un bloque del que sale vivo), en el orden del código. Cada
+   instrucción tiene dos puntos, lectura (2i) y escritura (2i + 1): en
+   't1 = t0 + 1' t0 puede morir y t1 nacer en el mismo hueco.
+3. Linear scan (Poletto y Sarkar) sin derrames: los intervalos se recorren
+   por su inicio y toman el hueco libre de número más bajo; los que han
+   terminado devuelven el suyo.
+4. Las copias que quedan como 'tK = tK' (p. ej. el resultado de una llamada
+   expandida, que copia el temporal del return) se borran.
+"""
+import heapq
+
+from grafo_flujo import GrafoFlujo, tramos_programa
+from intermedio import OP_COPIA, OP_LLAMADA, SIN_OPERANDO, TEMPORAL, temporal
+
+
+def _es_temporal(operando):
+    return operando != SIN_OPERANDO and operando & 3 == TEMPORAL
+
+
+class AsignacionTramo:
+    """Vida de los temporales de un GrafoFlujo y su asignación a huecos del marco"""
+
+    def __init__(self, codigo, grafo):
+        self.codigo = codigo
+        self.grafo = grafo
+        self.indice = {}  # temporal -> bit
+        self.temporales = []  # bit -> temporal
+        self.marco = 0
+
+    def _bit(self, operando):
+        bit = self.indice.get(operando)
+        if bit is None:
+            bit = self.indice[operando] = len(self.temporales)
+            self.temporales.append(operando)
+        return bit
+
+    def calcular_vida(self):
+        """Conjuntos (bits) de temporales vivos a la entrada y a la salida de cada bloque"""
+        grafo = self.grafo
+        codigo = self.codigo
+        num_bloques = len(grafo)
+        usados = [0] * num_bloques  # leídos antes de escribirse en el bloque
+        definidos = [0] * num_bloques
+        for b in range(num_bloques):
+            uso = 0
+            definicion = 0
+            for i in grafo.instrucciones(b):
+                for operando in codigo.lecturas(i):
+                    if _es_temporal(operando):
+                        mascara = 1 << self._bit(operando)
+                        if not definicion & mascara:
+                            uso |= mascara
+                destino = codigo.escritura(i)
+                if _es_temporal(destino):
+                    definicion |= 1 << self._bit(destino)
+            usados[b] = uso
+            definidos[b] = definicion
+
+        self.vivos_entrada = entrada = [0] * num_bloques
+        self.vivos_salida = salida = [0] * num_bloques
+        pendientes = list(range(num_bloques))
+        en_lista = bytearray([1]) * num_bloques
+        while pendientes:
+            b = pendientes.pop()
+            en_lista[b] = 0
+            vivos = 0
+            for s in grafo.sucesores[b]:
+                vivos |= entrada[s]
+            salida[b] = vivos
+            nueva = usados[b] | (vivos & ~definidos[b])
+            if nueva != entrada[b]:
+                entrada[b] = nueva
+                for p in grafo.predecesores[b]:
+                    if not en_lista[p]:
+                        en_lista[p] = 1
+                        pendientes.append(p)
+
+    def _intervalos(self):
+        """[inicio, fin] de cada temporal en puntos del código (2i lectura, 2i + 1 escritura)"""
+        grafo = self.grafo
+        codigo = self.codigo
+        indice = self.indice
+        num_temporales = len(self.temporales)
+        inicio = [None] * num_temporales
+        fin = [None] * num_temporales
+
+        def extender(bit, punto):
+            if inicio[bit] is None or punto < inicio[bit]:
+                inicio[bit] = punto
+            if fin[bit] is None or punto > fin[bit]:
+                fin[bit] = punto
+
+        def bits(conjunto):
+            while conjunto:
+                menor = conjunto & -conjunto
+                yield menor.bit_length() - 1
+                conjunto ^= menor
+
+        for b in range(len(grafo)):
+            primera = grafo.inicios[b]
+            ultima = grafo.fines[b] - 1
+            for bit in bits(self.vivos_entrada[b]):
+                extender(bit, 2 * primera)
+            for bit in bits(self.vivos_salida[b]):
+                extender(bit, 2 * ultima + 2)
+            for i in grafo.instrucciones(b):
+                for operando in codigo.lecturas(i):
+                    if _es_temporal(operando):
+                        extender(indice[operando], 2 * i)
+                destino = codigo.escritura(i)
+                if _es_temporal(destino):
+                    extender(indice[destino], 2 * i + 1)
+        return [(inicio[bit], fin[bit], bit) for bit in range(num_temporales)]
+
+    def asignar(self):
+        """Hueco del marco de cada temporal (linear scan); devuelve temporal -> nuevo operando"""
+        activos = []  # montículo (fin, hueco)
+        libres = []  # montículo de huecos
+        asignacion = {}
+        for inicio, fin, bit in sorted(self._intervalos()):
+            while activos and activos[0][0] < inicio:
+                heapq.heappush(libres, heapq.heappop(activos)[1])
+            if libres:
+                hueco = heapq.heappop(libres)
+            else:
+                hueco = self.marco
+                self.marco += 1
+            heapq.heappush(activos, (fin, hueco))
+            asignacion[self.temporales[bit]] = temporal(hueco)
+        return asignacion
+
+    def renombrar(self, asignacion, eliminadas):
+        """Renumera los temporales del tramo y añade a 'eliminadas' las copias de un temporal a sí mismo"""
+        codigo = self.codigo
+        destinos = codigo.destinos
+        fuentes1 = codigo.fuentes1
+        fuentes2 = codigo.fuentes2
+        for i in range(self.grafo.inicio, self.grafo.fin):
+            op = codigo.ops[i]
+            if destinos[i] in asignacion:
+                destinos[i] = asignacion[destinos[i]]
+            if fuentes1[i] in asignacion:
+                fuentes1[i] = asignacion[fuentes1[i]]
+            if op == OP_LLAMADA:
+                argumentos = codigo.argumentos[fuentes2[i]]
+                codigo.argumentos[fuentes2[i]] = tuple(asignacion.get(a, a) for a in argumentos)
+            elif fuentes2[i] in asignacion:
+                fuentes2[i] = asignacion[fuentes2[i]]
+            if op == OP_COPIA and destinos[i] == fuentes1[i]:
+                eliminadas.add(i)
+
+
+def tamano_marco(codigo):
+    """Mayor número de temporales distintos de un tramo del programa"""
+    return max((len(codigo.temporales(inicio, fin)) for _, inicio, fin in tramos_programa(codigo)), default=0)
+
+
+def reciclar_temporales(codigo):
+    """
+    Renumera los temporales de cada tramo reutilizando los que ya no están
+    vivos. Devuelve los temporales distintos y el mayor marco, antes y
+    después, y las copias de un temporal a sí mismo borradas.
+    """
+    resumen = {"temporales_antes": len(codigo.temporales()), "marco_antes": tamano_marco(codigo)}
+    eliminadas = set()
+    for _, inicio, fin in tramos_programa(codigo):
+        if fin == inicio:
+            continue
+        tramo = AsignacionTramo(codigo, GrafoFlujo(codigo, inicio, fin))
+        tramo.calcular_vida()
+        tramo.renombrar(tramo.asignar(), eliminadas)
+    codigo.eliminar(eliminadas)
+    resumen["temporales_despues"] = len(codigo.temporales())
+    resumen["marco_despues"] = tamano_marco(codigo)
+    resumen["copias_eliminadas"] = len(eliminadas)
+    return resumen
@@ -0,0 +1,760 @@
+"""
+Benchmarks del compilador sobre programas generados.
+
+Uso:
+    python benchmarks.py            # todos
+    python benchmarks.py lexico     # solo uno
+"""
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+
+from ClassParser import ASTNode, ParserAsignacion
+from asignacion_temporales import tamano_marco
+from compilacion_paralela import analizar_y_generar
+from generadorCodigo import GeneradorIntermedio
+from grafo_flujo import grafos_programa
+from lexico import tokenizar, tokenizar_paralelo
+from optimizacion import NIVEL_MAXIMO, optimizar
+from recorrido import ejecutar
+from semantico import VerificadorSemantico
+
+
+def generar_programa(num_funciones):
+    """Genera un programa grande con el estilo del ejemplo de ejecucion.py"""
+    lineas = []
+    for f in range(num_funciones):
+        lineas.append(f"int f{f}(int a, int b) {{")
+        lineas.append("    int suma = 0;")
+        lineas.append("    int i = 0;")
+        lineas.append("    while (i < 10) {")
+        lineas.append("        if (i == 5) {")
+        lineas.append("            break;")
+        lineas.append("        }")
+        lineas.append("        if (i % 2 == 0) {")
+        lineas.append("            i = i + 1;")
+        lineas.append("            continue;")
+        lineas.append("        }")
+        lineas.append("        suma = suma + a * b - (i + 2) * 3;")
+        lineas.append("        i = i + 1;")
+        lineas.append("    }")
+        lineas.append("    for (int j = 0; j < b; j = j + 1) {")
+        lineas.append("        if (j > 3 && j < 8 || true) { suma = suma - 1; }")
+        lineas.append("    }")
+        lineas.append("    return suma;")
+        lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+
+def medir(funcion, repeticiones=3):
+    """Mejor tiempo (segundos) de varias ejecuciones"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        transcurrido = time.perf_counter() - inicio
+        if mejor is None or transcurrido < mejor:
+            mejor = transcurrido
+    return mejor
+
+
+def benchmark_lexico(num_funciones=2000):
+    codigo = generar_programa(num_funciones)
+    tokens, _, _ = tokenizar(codigo)
+    print(f"\n[LÉXICO] {len(codigo)} caracteres, {len(tokens)} tokens")
+    for backend in ("regex", "escaner"):
+        t = medir(lambda: tokenizar(codigo, backend=backend))
+        print(f"   {backend:10s}: {t * 1000:8.1f} ms  ({len(tokens) / t / 1e6:.2f} Mtokens/s)")
+    for workers in (2, 4):
+        t = medir(lambda: tokenizar_paralelo(codigo, workers=workers, umbral=0))
+        print(f"   paralelo/{workers}: {t * 1000:8.1f} ms  ({len(tokens) / t / 1e6:.2f} Mtokens/s)")
+
+
+class ParserCadenaRecursiva(ParserAsignacion):
+    """Referencia: la antigua cadena recursiva de expresiones, un método por nivel"""
+
+    def expression(self):
+        return self.logical_or()
+
+    def _nivel(self, siguiente, operadores, tipo=None):
+        nodo = siguiente()
+        while self.current_token()[0] in operadores:
+            op = self.eat(self.current_token()[0])
+            derecho = siguiente()
+            tipo_resultado = tipo or ("float" if nodo.tipo == "float" or derecho.tipo == "float" else "int")
+            nodo = ASTNode("BinOp", op, [nodo, derecho], tipo=tipo_resultado)
+        return nodo
+
+    def logical_or(self):
+        return self._nivel(self.logical_and, ("OR_LOGICO",), "bool")
+
+    def logical_and(self):
+        return self._nivel(self.equality, ("AND_LOGICO",), "bool")
+
+    def equality(self):
+        return self._nivel(self.comparison, ("IGUAL_IGUAL", "DIFERENTE"), "bool")
+
+    def comparison(self):
+        return self._nivel(self.term, ("MAYOR_QUE", "MENOR_QUE", "MAYOR_IGUAL", "MENOR_IGUAL"), "bool")
+
+    def term(self):
+        return self._nivel(self.factor, ("SUMA", "RESTA"))
+
+    def factor(self):
+        return self._nivel(self.primary, ("MULTIPLICACION", "DIVISION", "MODULO"))
+
+    def primary(self):
+        if self.current_token()[0] == "PARENTESIS_APERTURA":
+            self.eat("PARENTESIS_APERTURA")
+            expr = self.expression()
+            self.eat("PARENTESIS_CIERRE")
+            return expr
+        return ejecutar(super().primary())
+
+
+def generar_expresiones(num_lineas):
+    lineas = ["int a = 1;", "int b = 2;"]
+    for k in range(num_lineas):
+        lineas.append(f"int r{k} = ((a + 1) * (b - 2) / 3 + a % 4 * 5 - 6) * 7 + a * 8 - (b + 9) * 10 + a - b;")
+        lineas.append(f"bool c{k} = a < b && b >= 2 || a == 1 && (b != 3 || a > 0);")
+    return "\n".join(lineas) + "\n"
+
+
+def benchmark_expresiones(num_lineas=2000):
+    codigo = generar_expresiones(num_lineas)
+    tokens, _, _ = tokenizar(codigo)
+    print(f"\n[EXPRESIONES] {len(tokens)} tokens")
+    for nombre, clase in (("recursivo", ParserCadenaRecursiva), ("precedencia", ParserAsignacion)):
+        def parsear():
+            with contextlib.redirect_stdout(io.StringIO()):
+                clase(tokens).program()
+        t = medir(parsear)
+        print(f"   {nombre:12s}: {t * 1000:8.1f} ms")
+
+    # Anidamiento profundo de paréntesis: la cadena recursiva agota la pila
+    profundidad = 5000
+    tokens, _, _ = tokenizar("int p = " + "(" * profundidad + "1" + ")" * profundidad + ";")
+    for nombre, clase in (("recursivo", ParserCadenaRecursiva), ("precedencia", ParserAsignacion)):
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                clase(tokens).program()
+            resultado = "ok"
+        except RecursionError:
+            resultado = "RecursionError"
+        print(f"   {nombre:12s}: {profundidad} paréntesis anidados -> {resultado}")
+
+
+class NodoClasico:
+    """Referencia: el antiguo ASTNode con __dict__ y una lista de hijos por nodo"""
+
+    def __init__(self, nombre, valor=None, hijos=None, tipo=None):
+        self.nombre = nombre
+        self.valor = valor
+        self.hijos = hijos or []
+        self.tipo = tipo
+
+
+class ParserNodosClasicos(ParserAsignacion):
+    def nodo(self, nombre, valor=None, hijos=None, tipo=None, inicio=None, fin=None, token=None):
+        nodo = NodoClasico(nombre, valor, hijos, tipo)
+        if inicio is None:
+            inicio = self.pos - 1
+        nodo.tramo = (inicio, self.pos if fin is None else fin)
+        nodo.token_pos = inicio if token is None else token
+        return nodo
+
+
+def benchmark_ast(num_funciones=1000):
+    codigo = generar_programa(num_funciones)
+    tokens, _, _ = tokenizar(codigo)
+    print(f"\n[AST] {len(tokens)} tokens")
+    for nombre, clase in (("clasico", ParserNodosClasicos), ("arena", ParserAsignacion)):
+        t = medir(lambda: clase(tokens).program())
+        tracemalloc.start()
+        antes = tracemalloc.get_traced_memory()[0]
+        arbol = clase(tokens).program()
+        memoria = tracemalloc.get_traced_memory()[0] - antes
+        tracemalloc.stop()
+        print(f"   {nombre:8s}: {t * 1000:8.1f} ms, {memoria / 1024:8.0f} KiB retenidos")
+        del arbol
+
+
+# ======== REFERENCIA: LOS TRES RECORRIDOS SEMÁNTICOS ========
+# Copia congelada de verificar_usos, verificar_tipos y
+# verificar_division_por_cero tal como estaban antes de fusionarse en
+# VerificadorSemantico. Solo sirven para medir y comparar diagnósticos.
+
+
+def verificar_usos(nodo, pila_ambitos, errores, tokens_info=None):
+    """
+    Verifica uso correcto de variables con mejores mensajes de error
+    """
+    return ejecutar(_verificar_usos(nodo, pila_ambitos, errores, tokens_info))
+
+
+def _verificar_usos(nodo, pila_ambitos, errores, tokens_info=None):
+    def agregar_error(mensaje, nodo_error=None):
+        if tokens_info and getattr(nodo_error, 'token_pos', None) is not None:
+            num_linea, columna, _, linea_original = tokens_info.ubicacion(nodo_error.token_pos)
+            error_completo = f"Error semántico en línea {num_linea}, columna {columna}:\n"
+            error_completo += f"  {mensaje}\n"
+            error_completo += f"  Línea: {linea_original}\n"
+            error_completo += f"  {' ' * (columna-1)}^"
+            errores.append(error_completo)
+        else:
+            errores.append(f"Error semántico: {mensaje}")
+
+    if nodo.nombre == "Asignacion":
+        var_node = nodo.hijos[0]
+        nombre_var = var_node.valor
+        tipo_var = var_node.tipo
+
+        if tipo_var is not None:  # Declaración
+            # ✅ PERMITIR SHADOWING - siempre insertar en ámbito actual
+            # No verificamos si ya existe en ámbito actual porque el parser ya lo hizo
+            pila_ambitos[-1][nombre_var] = tipo_var
+        else:  # Asignación
+            # Buscar en todos los ámbitos (padres incluidos)
+            if buscar_en_ambitos(pila_ambitos, nombre_var) is None:
+                agregar_error(f"La variable '{nombre_var}' no ha sido declarada", var_node)
+
+    elif nodo.nombre == "Variable":
+        nombre_var = nodo.valor
+        if buscar_en_ambitos(pila_ambitos, nombre_var) is None:
+            agregar_error(f"La variable '{nombre_var}' no ha sido declarada", nodo)
+
+    elif nodo.nombre == "Bloque":
+        # Crear un nuevo ámbito local
+        pila_ambitos.append({})
+        for hijo in nodo.hijos:
+            yield _verificar_usos(hijo, pila_ambitos, errores, tokens_info)
+        pila_ambitos.pop()
+        return
+
+    # ESTRUCTURAS DE CONTROL DE FLUJO
+    elif nodo.nombre == "If":
+        # Verificar condición en ámbito actual
+        condicion = nodo.hijos[0]
+        yield _verificar_usos(condicion, pila_ambitos, errores, tokens_info)
+
+        # Bloque if (ámbito propio)
+        pila_ambitos.append({})
+        yield _verificar_usos(nodo.hijos[1], pila_ambitos, errores, tokens_info)
+        pila_ambitos.pop()
+
+        # Bloque else si existe (ámbito propio)
+        if len(nodo.hijos) > 2:
+            pila_ambitos.append({})
+            yield _verificar_usos(nodo.hijos[2], pila_ambitos, errores, tokens_info)
+            pila_ambitos.pop()
+        return
+
+    elif nodo.nombre == "While":
+        # Verificar condición en ámbito actual
+        condicion = nodo.hijos[0]
+        yield _verificar_usos(condicion, pila_ambitos, errores, tokens_info)
+
+        # Bloque while (ámbito propio)
+        pila_ambitos.append({})
+        yield _verificar_usos(nodo.hijos[1], pila_ambitos, errores, tokens_info)
+        pila_ambitos.pop()
+        return
+
+    elif nodo.nombre == "For":
+        # CREAR ÁMBITO ESPECÍFICO PARA EL FOR
+        pila_ambitos.append({})  # Nuevo ámbito para el for
+
+        # INICIALIZACIÓN: se verifica en el NUEVO ámbito del for
+        inicializacion = nodo.hijos[0]
+        if inicializacion is not None:
+            yield _verificar_usos(inicializacion, pila_ambitos, errores, tokens_info)
+
+        # CONDICIÓN: se verifica en el MISMO ámbito del for
+        condicion = nodo.hijos[1]
+        if condicion is not None:
+            yield _verificar_usos(condicion, pila_ambitos, errores, tokens_info)
+
+        # INCREMENTO: se verifica en el MISMO ámbito del for
+        incremento = nodo.hijos[2]
+        if incremento is not None:
+            yield _verificar_usos(incremento, pila_ambitos, errores, tokens_info)
+
+        # BLOQUE: se verifica en el MISMO ámbito del for
+        yield _verificar_usos(nodo.hijos[3], pila_ambitos, errores, tokens_info)
+
+        pila_ambitos.pop()  # Salir del ámbito del for
+        return
+    elif nodo.nombre == "Break" or nodo.nombre == "Continue":
+        # Verificar que estamos dentro de un bucle
+        # Por simplicidad, por ahora no verificamos esto
+        return
+    # Verificar hijos (recursión) - solo si no es una estructura ya procesada
+    if nodo.nombre not in ["If", "While", "For", "Bloque"]:
+        for hijo in nodo.hijos:
+            yield _verificar_usos(hijo, pila_ambitos, errores, tokens_info)
+
+
+def buscar_en_ambitos(pila_ambitos, nombre_var):
+    """
+    Busca una variable desde el ámbito más interno hacia el global.
+    Permite shadowing - la variable más interna oculta las de ámbitos externos.
+    """
+    # Buscar desde el ámbito más reciente al más antiguo
+    for i in range(len(pila_ambitos) - 1, -1, -1):
+        if nombre_var in pila_ambitos[i]:
+            return pila_ambitos[i][nombre_var]
+    return None
+
+
+def verificar_tipos(nodo, pila_ambitos, errores, tokens_info=None):
+    """
+    Verifica compatibilidad de tipos, respetando los límites de cada ámbito.
+    """
+    return ejecutar(_verificar_tipos(nodo, pila_ambitos, errores, tokens_info))
+
+
+def _verificar_tipos(nodo, pila_ambitos, errores, tokens_info=None):
+    def agregar_error_tipos(mensaje, nodo_error=None):
+        if tokens_info and nodo_error and getattr(nodo_error, 'token_pos', None) is not None:
+            try:
+                num_linea, columna, valor, linea_original = tokens_info.ubicacion(nodo_error.token_pos)
+                error_completo = f" ERROR DE TIPOS - Línea {num_linea}, Columna {columna}:\n"
+                error_completo += f"   {mensaje}\n"
+                error_completo += f"   {linea_original}\n"
+                error_completo += f"   {' ' * (columna-1)}^\n"
+                errores.append(error_completo)
+            except (IndexError, AttributeError):
+                errores.append(f" ERROR DE TIPOS: {mensaje}")
+        else:
+            errores.append(f" ERROR DE TIPOS: {mensaje}")
+
+    if nodo.nombre == "Bloque":
+        pila_ambitos.append({})
+        for hijo in nodo.hijos:
+            yield _verificar_tipos(hijo, pila_ambitos, errores, tokens_info)
+        pila_ambitos.pop()
+        return None
+
+    # VALIDACIÓN DE ESTRUCTURAS DE CONTROL
+    elif nodo.nombre == "If":
+        condicion = nodo.hijos[0]
+        tipo_cond = yield _verificar_tipos(condicion, pila_ambitos, errores, tokens_info)
+
+        # Verificar que la condición sea booleana
+        if tipo_cond and tipo_cond != "bool":
+            agregar_error_tipos(f"La condición del 'if' debe ser booleana, no '{tipo_cond}'", nodo)
+
+        # Verificar bloques
+        pila_ambitos.append({})
+        yield _verificar_tipos(nodo.hijos[1], pila_ambitos, errores, tokens_info)
+        pila_ambitos.pop()
+
+        if len(nodo.hijos) > 2:
+            pila_ambitos.append({})
+            yield _verificar_tipos(nodo.hijos[2], pila_ambitos, errores, tokens_info)
+            pila_ambitos.pop()
+        return None
+
+    elif nodo.nombre == "While":
+        condicion = nodo.hijos[0]
+        tipo_cond = yield _verificar_tipos(condicion, pila_ambitos, errores, tokens_info)
+
+        # Verificar que la condición sea booleana
+        if tipo_cond and tipo_cond != "bool":
+            agregar_error_tipos(f"La condición del 'while' debe ser booleana, no '{tipo_cond}'", nodo)
+
+        pila_ambitos.append({})
+        yield _verificar_tipos(nodo.hijos[1], pila_ambitos, errores, tokens_info)
+        pila_ambitos.pop()
+        return None
+
+    elif nodo.nombre == "For":
+        # Crear ámbito para el bloque for
+        pila_ambitos.append({})
+
+        # Inicialización
+        inicializacion = nodo.hijos[0]
+        if inicializacion is not None:
+            yield _verificar_tipos(inicializacion, pila_ambitos, errores, tokens_info)
+
+        # Condición (debe ser booleana si existe)
+        condicion = nodo.hijos[1]
+        if condicion is not None:
+            tipo_cond = yield _verificar_tipos(condicion, pila_ambitos, errores, tokens_info)
+            if tipo_cond and tipo_cond != "bool":
+                agregar_error_tipos(f"La condición del 'for' debe ser booleana, no '{tipo_cond}'", nodo)
+
+        # Incremento
+        incremento = nodo.hijos[2]
+        if incremento is not None:
+            yield _verificar_tipos(incremento, pila_ambitos, errores, tokens_info)
+
+        # Bloque
+        yield _verificar_tipos(nodo.hijos[3], pila_ambitos, errores, tokens_info)
+
+        pila_ambitos.pop()
+        return None
+
+    # OPERACIONES
+    elif nodo.nombre == "BinOp":
+        tipo_izq = yield _verificar_tipos(nodo.hijos[0], pila_ambitos, errores, tokens_info)
+        tipo_der = yield _verificar_tipos(nodo.hijos[1], pila_ambitos, errores, tokens_info)
+        op = nodo.valor
+
+        if not tipo_izq or not tipo_der:
+            return None
+
+        # Operadores aritméticos
+        if op in ["SUMA", "RESTA", "MULTIPLICACION", "DIVISION"]:
+            if tipo_izq in ["int", "float"] and tipo_der in ["int", "float"]:
+                return "float" if "float" in [tipo_izq, tipo_der] else "int"
+            else:
+                agregar_error_tipos(f"Operación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
+                return None
+
+        # Operadores de comparación
+        elif op in ["MAYOR_QUE", "MENOR_QUE", "MAYOR_IGUAL", "MENOR_IGUAL"]:
+            if tipo_izq in ["int", "float"] and tipo_der in ["int", "float"]:
+                return "bool"
+            else:
+                agregar_error_tipos(f"Comparación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
+                return None
+
+        # Operadores de igualdad
+        elif op in ["IGUAL_IGUAL", "DIFERENTE"]:
+            if (tipo_izq == tipo_der) or (tipo_izq in ["int", "float"] and tipo_der in ["int", "float"]):
+                return "bool"
+            else:
+                agregar_error_tipos(f"Comparación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
+                return None
+
+        # Operadores lógicos
+        elif op in ["AND_LOGICO", "OR_LOGICO"]:
+            if tipo_izq == "bool" and tipo_der == "bool":
+                return "bool"
+            else:
+                agregar_error_tipos(f"Operación lógica '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
+                return None
+
+    elif nodo.nombre == "Numero":
+        return "float" if "." in (nodo.valor or "") else "int"
+
+    elif nodo.nombre == "Booleano":
+        return "bool"
+
+    elif nodo.nombre == "Variable":
+        return buscar_en_ambitos(pila_ambitos, nodo.valor)
+
+    elif nodo.nombre == "Asignacion":
+        var_node = nodo.hijos[0]
+        expr_node = nodo.hijos[1]
+
+        tipo_var = var_node.tipo or buscar_en_ambitos(pila_ambitos, var_node.valor)
+        tipo_expr = yield _verificar_tipos(expr_node, pila_ambitos, errores, tokens_info)
+
+        if tipo_var is not None and tipo_expr is not None:
+            if tipo_var != tipo_expr:
+                # Permitir asignar int a float, pero no al revés
+                if not (tipo_var == "float" and tipo_expr == "int"):
+                    agregar_error_tipos(f"No se puede asignar '{tipo_expr}' a variable '{var_node.valor}' de tipo '{tipo_var}'", nodo)
+        return tipo_var
+
+    # Por defecto, revisar hijos
+    for hijo in nodo.hijos:
+        yield _verificar_tipos(hijo, pila_ambitos, errores, tokens_info)
+    return None
+
+
+def verificar_division_por_cero(nodo, errores, tokens_info=None):
+    """Verifica divisiones por cero"""
+    return ejecutar(_verificar_division_por_cero(nodo, errores, tokens_info))
+
+
+def _verificar_division_por_cero(nodo, errores, tokens_info=None):
+
+    if nodo.nombre == "BinOp" and nodo.valor == "/":
+        derecho = nodo.hijos[1]
+
+        # Verificar división por cero literal
+        if derecho.nombre == "Numero" and derecho.valor in ["0", "0.0"]:
+            # El token principal del BinOp es su operador '/'
+            posicion = None
+            if tokens_info:
+                posicion = getattr(nodo, 'token_pos', None)
+
+            if posicion is not None:
+                num_linea, columna, _, linea_original = tokens_info.ubicacion(posicion)
+                error_msg = f"❌ ERROR ARITMÉTICO - Línea {num_linea}, Columna {columna}:\n"
+                error_msg += f"   DIVISIÓN POR CERO - No se puede dividir entre cero\n"
+                error_msg += f"   {linea_original}\n"
+                error_msg += f"   {' ' * (columna-1)}^\n"
+                errores.append(error_msg)
+            else:
+                errores.append("❌ ERROR ARITMÉTICO: División por cero detectada")
+
+    # Verificar recursivamente en los hijos
+    for hijo in nodo.hijos:
+        yield _verificar_division_por_cero(hijo, errores, tokens_info)
+
+
+def benchmark_semantico(num_funciones=1000):
+    codigo = generar_programa(num_funciones)
+    tokens, _, _ = tokenizar(codigo)
+    arbol = ParserAsignacion(tokens).program()
+    print(f"\n[SEMÁNTICO] {len(arbol.arena)} nodos")
+
+    def tres_recorridos():
+        errores = []
+        pila_ambitos = [{}]
+        verificar_usos(arbol, pila_ambitos, errores, tokens)
+        verificar_tipos(arbol, pila_ambitos, errores, tokens)
+        verificar_division_por_cero(arbol, errores, tokens)
+        return errores
+
+    def fusionado():
+        return VerificadorSemantico(tokens).verificar(arbol)
+
+    assert tres_recorridos() == fusionado()
+    t_tres = medir(tres_recorridos)
+    t_fusionado = medir(fusionado)
+    print(f"   tres recorridos: {t_tres * 1000:8.1f} ms")
+    print(f"   fusionado      : {t_fusionado * 1000:8.1f} ms  ({t_tres / t_fusionado:.1f}x)")
+
+
+class GeneradorGetattr(GeneradorIntermedio):
+    """Referencia: despacho por getattr con el nombre del nodo en cada visita"""
+
+    def _generar_nodo(self, nodo):
+        metodo_generador = getattr(self, f"_generar_{nodo.nombre}", None)
+        if metodo_generador:
+            return metodo_generador(nodo)
+        return self._generar_hijos(nodo)
+
+
+def benchmark_despacho(num_funciones=1000):
+    codigo = generar_programa(num_funciones)
+    tokens, _, _ = tokenizar(codigo)
+    arbol = ParserAsignacion(tokens).program()
+    print(f"\n[DESPACHO] {len(arbol.arena)} nodos")
+    assert GeneradorGetattr().generar_codigo(arbol).lineas() == GeneradorIntermedio().generar_codigo(arbol).lineas()
+    for nombre, clase in (("getattr", GeneradorGetattr), ("tabla", GeneradorIntermedio)):
+        t = medir(lambda: clase().generar_codigo(arbol))
+        print(f"   {nombre:8s}: {t * 1000:8.1f} ms")
+
+
+def benchmark_intermedio(num_funciones=1000):
+    codigo = generar_programa(num_funciones)
+    tokens, _, _ = tokenizar(codigo)
+    arbol = ParserAsignacion(tokens).program()
+
+    def generar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return GeneradorIntermedio().generar_codigo(arbol)
+
+    cuadruplas = generar()
+    print(f"\n[INTERMEDIO] {len(cuadruplas)} instrucciones")
+    t = medir(generar)
+    print(f"   generación : {t * 1000:8.1f} ms")
+    t = medir(cuadruplas.lineas)
+    print(f"   texto TAC  : {t * 1000:8.1f} ms (solo al imprimir)")
+
+    # Memoria retenida: lista de líneas de texto frente a cuádruplas en columnas
+    for nombre, construir in (("texto", cuadruplas.lineas), ("cuádruplas", generar)):
+        tracemalloc.start()
+        antes = tracemalloc.get_traced_memory()[0]
+        resultado = construir()
+        memoria = tracemalloc.get_traced_memory()[0] - antes
+        tracemalloc.stop()
+        print(f"   {nombre:11s}: {memoria / len(resultado):6.1f} bytes/instrucción")
+        del resultado
+
+
+def generar_anidado(profundidad):
+    """if/while/for/bloques anidados 'profundidad' niveles, más llamadas anidadas"""
+    aperturas = ("if (x < 1) {", "while (x < 1) {", "for (int i = 0; i < 1; i = i + 1) {", "{")
+    lineas = ["int f(int a) { return a; }", "int x = 0;"]
+    lineas.extend(aperturas[k % 4] for k in range(profundidad))
+    lineas.append("x = " + "f(" * 1000 + "x" + ")" * 1000 + ";")
+    lineas.extend("}" for _ in range(profundidad))
+    return "\n".join(lineas) + "\n"
+
+
+def benchmark_profundidad(profundidad=100000):
+    codigo = generar_anidado(profundidad)
+    tokens, _, _ = tokenizar(codigo)
+    print(f"\n[PROFUNDIDAD] {profundidad} niveles, {len(tokens)} tokens")
+
+    inicio = time.perf_counter()
+    arbol = ParserAsignacion(tokens).program()
+    t_parser = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    errores = VerificadorSemantico(tokens).verificar(arbol)
+    t_semantico = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    codigo_tac = GeneradorIntermedio().generar_codigo(arbol)
+    t_codigo = time.perf_counter() - inicio
+
+    print(f"   parser    : {t_parser * 1000:8.1f} ms  ({len(arbol.arena)} nodos)")
+    print(f"   semántico : {t_semantico * 1000:8.1f} ms  ({len(errores)} errores)")
+    print(f"   código    : {t_codigo * 1000:8.1f} ms  ({len(codigo_tac)} instrucciones)")
+
+
+def benchmark_funciones(num_funciones=4000):
+    # El semántico no declara los parámetros: se dan como globales para que haya código
+    codigo = "int a = 3;\nint b = 4;\n" + generar_programa(num_funciones)
+    tokens, _, _ = tokenizar(codigo)
+    parser = ParserAsignacion(tokens)
+    arbol = parser.program()
+    arbol.tabla_global = parser.tabla_global
+    print(f"\n[FUNCIONES] {num_funciones} funciones, {len(arbol.arena)} nodos")
+
+    def compilar_con(workers):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return analizar_y_generar(arbol, tokens, workers=workers, umbral=0)
+
+    serie = compilar_con(1)[2].codigo_intermedio.lineas()
+    t_serie = medir(lambda: compilar_con(1))
+    print(f"   serie     : {t_serie * 1000:8.1f} ms")
+    for workers in (2, 4):
+        assert compilar_con(workers)[2].codigo_intermedio.lineas() == serie
+        t = medir(lambda: compilar_con(workers))
+        print(f"   procesos/{workers}: {t * 1000:8.1f} ms  ({t_serie / t:.1f}x)")
+
+
+def benchmark_flujo(num_funciones=2000, profundidad=100000):
+    print("\n[FLUJO]")
+    for nombre, codigo in (("funciones", generar_programa(num_funciones)),
+                           ("anidado", generar_anidado(profundidad))):
+        tokens, _, _ = tokenizar(codigo)
+        with contextlib.redirect_stdout(io.StringIO()):
+            codigo_tac = GeneradorIntermedio().generar_codigo(ParserAsignacion(tokens).program())
+        grafos = [grafo for _, grafo in grafos_programa(codigo_tac)]
+        t = medir(lambda: grafos_programa(codigo_tac))
+        print(f"   {nombre:10s}: {len(codigo_tac)} instrucciones, {len(grafos)} grafos, "
+              f"{sum(len(g) for g in grafos)} bloques, {sum(len(g.bucles) for g in grafos)} bucles: "
+              f"{t * 1000:8.1f} ms")
+
+
+def generar_constantes(num_funciones):
+    """Funciones con constantes con nombre, ramas decididas y código muerto"""
+    lineas = []
+    for f in range(num_funciones):
+        lineas.append(f"int g{f}(int a) {{")
+        lineas.append("    int ancho = 8;")
+        lineas.append("    int alto = ancho * 2 + 1;")
+        lineas.append("    int area = ancho * alto;")
+        lineas.append("    int modo = 0;")
+        lineas.append("    if (modo == 1) { area = area + a; } else { area = area - 1; }")
+        lineas.append("    while (area > 1000) { area = area - a; }")
+        lineas.append("    return area + a;")
+        lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+
+def generar_subexpresiones(num_funciones):
+    """Funciones que repiten productos y condiciones, con una global y llamadas"""
+    lineas = ["int escala = 3;"]
+    for f in range(num_funciones):
+        lineas.append(f"int h{f}(int a, int b) {{")
+        lineas.append("    int x = a * b + a * b;")
+        lineas.append("    int y = (a + b) * (a + b) - escala * a;")
+        lineas.append("    if (a * b > y) { x = x + b * a; } else { x = x - escala * a; }")
+        lineas.append("    while (a * b < x) { x = x - (a + b); }")
+        lineas.append("    return x + y + escala * a;")
+        lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+
+def generar_bucles(num_funciones):
+    """Funciones con bucles de conteo: invariantes, i * c e i % c"""
+    lineas = []
+    for f in range(num_funciones):
+        lineas.append(f"int k{f}(int n, int a) {{")
+        lineas.append("    int suma = 0;")
+        lineas.append("    for (int i = 0; i < n; i = i + 1) {")
+        lineas.append("        int base = a * n + 1;")
+        lineas.append("        if (i % 2 == 0) { suma = suma + i * 4 + base; } else { suma = suma - a * a; }")
+        lineas.append("    }")
+        lineas.append("    return suma;")
+        lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+
+def generar_desenrollables(num_funciones):
+    """Funciones con bucles de vueltas constantes: cortos, largos y con break/continue"""
+    lineas = []
+    for f in range(num_funciones):
+        lineas.append(f"int u{f}(int a) {{")
+        lineas.append("    int suma = 0;")
+        lineas.append("    for (int i = 0; i < 8; i = i + 1) { suma = suma + i * a; }")
+        lineas.append("    for (int j = 100; j > 0; j = j - 3) {")
+        lineas.append("        if (j == a) { break; }")
+        lineas.append("        if (j % 2 == 0) { continue; }")
+        lineas.append("        suma = suma + j;")
+        lineas.append("    }")
+        lineas.append("    return suma;")
+        lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+
+def generar_llamadas(num_funciones):
+    """Funciones que llaman a funciones auxiliares pequeñas, dentro y fuera de bucles"""
+    lineas = ["int cuadrado(int x) { return x * x; }",
+              "int maximo(int a, int b) { if (a > b) { return a; } return b; }"]
+    for f in range(num_funciones):
+        lineas.append(f"int c{f}(int n) {{")
+        lineas.append("    int suma = cuadrado(n) + 1;")
+        lineas.append("    for (int i = 0; i < n; i = i + 1) { suma = maximo(suma, cuadrado(i)); }")
+        lineas.append("    return suma;")
+        lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+
+def benchmark_optimizacion(num_funciones=1000):
+    print("\n[OPTIMIZACION]")
+    for nombre, codigo in (("funciones", generar_programa(num_funciones)),
+                           ("constantes", generar_constantes(num_funciones)),
+                           ("repetidas", generar_subexpresiones(num_funciones)),
+                           ("bucles", generar_bucles(num_funciones)),
+                           ("desenrollables", generar_desenrollables(num_funciones)),
+                           ("llamadas", generar_llamadas(num_funciones))):
+        tokens, _, _ = tokenizar(codigo)
+        arbol = ParserAsignacion(tokens).program()
+        for nivel in range(1, NIVEL_MAXIMO + 1):
+            mejor = None
+            for _ in range(3):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    codigo_tac = GeneradorIntermedio().generar_codigo(arbol)
+                antes = len(codigo_tac)
+                inicio = time.perf_counter()
+                optimizar(codigo_tac, nivel)
+                t = time.perf_counter() - inicio
+                mejor = t if mejor is None else min(mejor, t)
+            print(f"   {nombre:10s} O{nivel}: {antes} -> {len(codigo_tac)} instrucciones "
+                  f"({100 * (antes - len(codigo_tac)) / antes:4.1f}% menos), "
+                  f"{len(codigo_tac.temporales())} temporales, marco {tamano_marco(codigo_tac)}: "
+                  f"{mejor * 1000:8.1f} ms")
+
+
+BENCHMARKS = {
+    "lexico": benchmark_lexico,
+    "expresiones": benchmark_expresiones,
+    "ast": benchmark_ast,
+    "semantico": benchmark_semantico,
+    "despacho": benchmark_despacho,
+    "intermedio": benchmark_intermedio,
+    "profundidad": benchmark_profundidad,
+    "funciones": benchmark_funciones,
+    "flujo": benchmark_flujo,
+    "optimizacion": benchmark_optimizacion,
+}
+
+
+if __name__ == "__main__":
+    nombres = sys.argv[1:] or list(BENCHMARKS)
+    for nombre in nombres:
+        BENCHMARKS[nombre]()
@@ -0,0 +1,335 @@
+"""
+Caché persistente de compilaciones.
+
+Cada entrada guarda el resultado de las cuatro fases (tokens, AST con su
+tabla_global, errores e informe del semántico y código intermedio) para un
+código fuente concreto y un nivel de optimización. La clave es el hash del
+código y el nivel más la versión del compilador, que se deriva del código
+de todos los módulos del directorio del compilador: cualquier cambio en el
+compilador invalida las entradas antiguas.
+
+Una entrada es una cabecera (marca, formato, orden de bytes y versión del
+compilador) seguida de un marshal comprimido con zlib que solo contiene
+datos: tuplas, listas, diccionarios, textos y números, y las columnas de
+TokenBuffer, ArenaAST y CodigoIntermedio como bytes de sus arrays. Leer una
+entrada no ejecuta código aunque alguien haya escrito en el directorio, y
+cualquier entrada que no se pueda decodificar cuenta como fallo de caché.
+
+Las entradas se escriben en un archivo temporal y se publican con
+os.replace(), así que varios procesos pueden compartir el directorio. El
+tamaño total está acotado y se desalojan primero las entradas usadas hace
+más tiempo (la fecha de modificación hace de marca LRU).
+"""
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import zlib
+from array import array
+
+from ClassParser import ArenaAST, ParserAsignacion, TablaSimbolos
+from compilacion_paralela import analizar_y_generar
+from generadorCodigo import GeneradorIntermedio
+from intermedio import CodigoIntermedio
+from lexico import TokenBuffer, tokenizar
+from optimizacion import InformeOptimizacion, optimizar
+from semantico import informe_semantico
+
+def _version_compilador():
+    """
+    Hash de todos los módulos .py junto a este. Así un pase nuevo cuenta sin
+    tener que apuntarlo en ninguna lista; a cambio, tocar benchmarks.py o
+    ejecucion.py también invalida la caché.
+    """
+    h = hashlib.sha256()
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.endswith(".py"):
+            h.update(nombre.encode() + b"\0")
+            with open(os.path.join(directorio, nombre), "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+VERSION_COMPILADOR = _version_compilador()
+EXTENSION = ".cmp"
+FORMATO = 1
+# Las columnas se guardan con el orden de bytes y el tamaño de 'i' de la máquina
+CABECERA = (b"CMPC" + bytes([FORMATO])
+            + f"{sys.byteorder[0]}{array('i').itemsize}{VERSION_COMPILADOR}".encode())
+
+
+class ResultadoCompilacion:
+    """Salida de las cuatro fases para un código fuente"""
+
+    def __init__(self):
+        self.tokens = None
+        self.contador_tokens = {}
+        self.errores_token = []
+        self.arbol = None
+        self.tabla_global = None
+        self.error_sintactico = None
+        self.errores_semanticos = []
+        self.informe_semantico = None  # texto de informe_semantico(), para imprimirlo en su sitio
+        self.generador = None
+        self.informe_optimizacion = None
+        self.desde_cache = False
+
+
+def ejecutar_fases(codigo, workers=1, nivel_optimizacion=0):
+    """
+    Ejecuta léxico, sintáctico, semántico y generación de código, y optimiza
+    el código intermedio si nivel_optimizacion > 0. Con workers > 1 (None =
+    todos los núcleos) el semántico y la generación se reparten por
+    funciones entre procesos; el resultado es el mismo. No imprime nada: el
+    informe del semántico queda en resultado.informe_semantico.
+    """
+    resultado = ResultadoCompilacion()
+    resultado.tokens, resultado.contador_tokens, resultado.errores_token = tokenizar(codigo)
+    if resultado.errores_token:
+        return resultado
+
+    parser = ParserAsignacion(resultado.tokens)
+    resultado.tabla_global = parser.tabla_global
+    try:
+        arbol = parser.program()
+    except SyntaxError as e:
+        resultado.error_sintactico = str(e)
+        return resultado
+
+    arbol.tabla_global = parser.tabla_global
+    resultado.arbol = arbol
+    _, resultado.errores_semanticos, resultado.generador = analizar_y_generar(
+        arbol, tokens_info=resultado.tokens, workers=workers, imprimir=False)
+    resultado.informe_semantico = informe_semantico(arbol.tabla_global, resultado.errores_semanticos)
+
+    if resultado.generador is not None:
+        if nivel_optimizacion > 0:
+            resultado.informe_optimizacion = optimizar(resultado.generador.codigo_intermedio,
+                                                       nivel_optimizacion)
+        arbol.codigo_intermedio = resultado.generador.codigo_intermedio
+    return resultado
+
+
+class CacheCompilacion:
+    def __init__(self, directorio, tamano_maximo=64 * 1024 * 1024):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, codigo, nivel_optimizacion=0):
+        h = hashlib.sha256()
+        h.update(VERSION_COMPILADOR.encode())
+        h.update(f"\0O{nivel_optimizacion}\0".encode())
+        h.update(codigo.encode("utf-8"))
+        return h.hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave + EXTENSION)
+
+    def obtener(self, codigo, nivel_optimizacion=0):
+        """Devuelve el ResultadoCompilacion guardado, o None si no hay entrada válida"""
+        ruta = self._ruta(self.clave(codigo, nivel_optimizacion))
+        try:
+            with open(ruta, "rb") as f:
+                datos = f.read()
+        except OSError:
+            return None
+        if not datos.startswith(CABECERA):
+            return None
+        try:
+            resultado = _resultado(codigo, marshal.loads(zlib.decompress(datos[len(CABECERA):])))
+        except Exception:
+            # Entrada corrupta, de otro formato o manipulada: se trata como fallo de caché
+            return None
+
+        # Marca de uso para el desalojo LRU
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+        resultado.desde_cache = True
+        return resultado
+
+    def guardar(self, codigo, resultado, nivel_optimizacion=0):
+        datos = CABECERA + zlib.compress(marshal.dumps(_datos(resultado)))
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(datos)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self._ruta(self.clave(codigo, nivel_optimizacion)))
+        except BaseException:
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+            raise
+        self.desalojar()
+
+    def desalojar(self):
+        """Borra las entradas menos usadas hasta quedar bajo tamano_maximo"""
+        entradas = []
+        total = 0
+        for nombre in os.listdir(self.directorio):
+            if not nombre.endswith(EXTENSION):
+                continue
+            try:
+                info = os.stat(os.path.join(self.directorio, nombre))
+            except FileNotFoundError:
+                continue  # otro proceso la acaba de borrar
+            entradas.append((info.st_mtime, info.st_size, nombre))
+            total += info.st_size
+
+        entradas.sort()
+        for _, tamano, nombre in entradas:
+            if total <= self.tamano_maximo:
+                break
+            try:
+                os.unlink(os.path.join(self.directorio, nombre))
+            except FileNotFoundError:
+                pass
+            total -= tamano
+
+
+# ======== FORMATO DE LAS ENTRADAS ========
+
+def _bytes(columnas):
+    return tuple(columna.tobytes() for columna in columnas)
+
+
+def _llenar(columnas, datos):
+    """Rellena los arrays vacíos 'columnas' con sus bytes; todos deben quedar del mismo largo"""
+    if len(datos) != len(columnas):
+        raise ValueError("número de columnas distinto")
+    for columna, crudo in zip(columnas, datos):
+        columna.frombytes(crudo)
+    if len({len(columna) for columna in columnas}) > 1:
+        raise ValueError("columnas de distinto largo")
+
+
+def _columnas_tokens(tokens):
+    return tokens.tipos, tokens.inicios, tokens.fines
+
+
+def _columnas_lineas(tokens):
+    return tokens.inicios_linea, tokens.fines_linea
+
+
+def _columnas_arena(arena):
+    return (arena.clases, arena.valores, arena.tipos, arena.primer_hijo, arena.siguiente,
+            arena.tramo_inicio, arena.tramo_fin, arena.token_principal)
+
+
+def _columnas_codigo(codigo):
+    return codigo.ops, codigo.destinos, codigo.fuentes1, codigo.fuentes2
+
+
+def _datos(resultado):
+    """ResultadoCompilacion como tuplas de datos para marshal"""
+    tokens = resultado.tokens
+    tabla = resultado.tabla_global
+    arbol = resultado.arbol
+    generador = resultado.generador
+    informe = resultado.informe_optimizacion
+    codigo = generador.codigo_intermedio if generador is not None else None
+    return (
+        (_bytes(_columnas_tokens(tokens)), _bytes(_columnas_lineas(tokens))),
+        dict(resultado.contador_tokens),
+        list(resultado.errores_token),
+        resultado.error_sintactico,
+        None if tabla is None else (
+            [(s.nombre, s.tipo, s.ambito, s.inicializada, s.usada) for s in tabla.simbolos.values()],
+            [(f.nombre, f.tipo_retorno, [tuple(p) for p in f.parametros]) for f in tabla.funciones.values()]),
+        None if arbol is None else (arbol.indice, _bytes(_columnas_arena(arbol.arena)), list(arbol.arena.constantes)),
+        list(resultado.errores_semanticos),
+        resultado.informe_semantico,
+        None if generador is None else (
+            generador.contador_temporales, generador.contador_etiquetas,
+            _bytes(_columnas_codigo(codigo)), list(codigo.nombres), list(codigo.constantes),
+            dict(codigo.prefijos), list(codigo.argumentos), list(codigo.funciones),
+            dict(codigo.parametros), dict(codigo.tipos), frozenset(codigo.globales)),
+        None if informe is None else (informe.nivel, informe.antes, informe.despues, list(informe.pases)),
+    )
+
+
+def _resultado(codigo, datos):
+    """Inverso de _datos(): reconstruye el ResultadoCompilacion de 'codigo'"""
+    (tokens, contador_tokens, errores_token, error_sintactico, tabla, arbol, errores_semanticos,
+     texto_semantico, generador, informe) = datos
+    resultado = ResultadoCompilacion()
+
+    columnas, lineas = tokens
+    resultado.tokens = TokenBuffer(codigo)
+    _llenar(_columnas_tokens(resultado.tokens), columnas)
+    _llenar(_columnas_lineas(resultado.tokens), lineas)
+    resultado.contador_tokens = dict(contador_tokens)
+    resultado.errores_token = list(errores_token)
+    resultado.error_sintactico = error_sintactico
+
+    if tabla is not None:
+        variables, funciones = tabla
+        resultado.tabla_global = TablaSimbolos()
+        for nombre, tipo, ambito, inicializada, usada in variables:
+            resultado.tabla_global.insertar_variable(nombre, tipo, ambito, inicializada)
+            resultado.tabla_global.simbolos[nombre].usada = usada
+        for nombre, tipo_retorno, parametros in funciones:
+            resultado.tabla_global.insertar_funcion(nombre, tipo_retorno, [tuple(p) for p in parametros])
+
+    if arbol is not None:
+        indice, columnas, constantes = arbol
+        arena = ArenaAST()
+        _llenar(_columnas_arena(arena), columnas)
+        arena.constantes = list(constantes)
+        arena.indice_constante = {valor: i for i, valor in enumerate(arena.constantes)}
+        if not 0 <= indice < len(arena):
+            raise ValueError("raíz fuera de la arena")
+        resultado.arbol = arena.vista(indice)
+        resultado.arbol.tabla_global = resultado.tabla_global
+
+    resultado.errores_semanticos = list(errores_semanticos)
+    resultado.informe_semantico = texto_semantico
+
+    if generador is not None:
+        (temporales, etiquetas, columnas, nombres, constantes, prefijos, argumentos, funciones,
+         parametros, tipos, globales) = generador
+        intermedio = CodigoIntermedio()
+        _llenar(_columnas_codigo(intermedio), columnas)
+        for texto in nombres:
+            intermedio.nombre(texto)
+        for texto in constantes:
+            intermedio.constante(texto)
+        intermedio.prefijos = dict(prefijos)
+        intermedio.argumentos = [tuple(a) for a in argumentos]
+        intermedio.funciones = [tuple(f) for f in funciones]
+        intermedio.parametros = {funcion: tuple(p) for funcion, p in parametros.items()}
+        intermedio.tipos = dict(tipos)
+        intermedio.globales = set(globales)
+        resultado.generador = GeneradorIntermedio()
+        resultado.generador.codigo_intermedio = intermedio
+        resultado.generador.contador_temporales = temporales
+        resultado.generador.contador_etiquetas = etiquetas
+        if resultado.arbol is not None:
+            resultado.arbol.codigo_intermedio = intermedio
+
+    if informe is not None:
+        nivel, antes, despues, pases = informe
+        resultado.informe_optimizacion = InformeOptimizacion(nivel, antes)
+        resultado.informe_optimizacion.despues = despues
+        resultado.informe_optimizacion.pases = [tuple(pase) for pase in pases]
+    return resultado
+
+
+def compilar(codigo, cache=None, workers=1, nivel_optimizacion=0):
+    """Compila 'codigo' pasando por la caché si se indica una"""
+    if cache is not None:
+        resultado = cache.obtener(codigo, nivel_optimizacion)
+        if resultado is not None:
+            return resultado
+
+    resultado = ejecutar_fases(codigo, workers, nivel_optimizacion)
+    if cache is not None:
+        cache.guardar(codigo, resultado, nivel_optimizacion)
+    return resultado
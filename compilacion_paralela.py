@@ -0,0 +1,168 @@
+"""
+Análisis semántico y generación de código por funciones en un pool de procesos.
+
+Las sentencias de primer nivel del programa solo se comunican a través del
+ámbito global: cada una ve las declaraciones globales anteriores, y la
+verificación de tipos ve los tipos globales del programa completo. Con esos
+datos cada función se verifica y se genera por separado en un proceso; el
+resto de sentencias de primer nivel (normalmente pocas) se procesan en el
+proceso principal mientras tanto.
+
+Los resultados se unen en el orden del programa. Los errores de cada
+categoría se concatenan igual que en el recorrido único de
+VerificadorSemantico, y el código de cada trozo se anexa con sus temporales
+y etiquetas renumerados a continuación de los anteriores
+(CodigoIntermedio.anexar()), así que errores y código intermedio son
+idénticos a los de la versión serie.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from generadorCodigo import GeneradorIntermedio
+from recorrido import ejecutar
+from semantico import VerificadorSemantico, analizar_semantica, concluir_analisis
+from traza import traza, INFO
+
+# Por debajo de este número de nodos del AST no compensa arrancar procesos
+UMBRAL_PARALELO = 50000
+
+# Datos comunes a todos los trabajos de un proceso, fijados al arrancarlo
+_contexto = None
+
+
+def _iniciar_proceso(arena, tokens_info, tipos_globales, declaraciones_globales):
+    global _contexto
+    _contexto = (arena, tokens_info, tipos_globales, declaraciones_globales)
+
+
+def _procesar_unidades(unidades, declaraciones_globales, tokens_info, tipos_globales):
+    """
+    Verifica y, si no tienen errores, genera el código de una serie de
+    sentencias de primer nivel (posición, nodo) en orden del programa. Para
+    cada una devuelve (errores_usos, errores_tipos, errores_division,
+    CodigoIntermedio numerado desde 0 o None, temporales, etiquetas).
+    """
+    verificador = VerificadorSemantico(tokens_info)
+    verificador.tipos_globales = tipos_globales
+    listas = (verificador.errores_usos, verificador.errores_tipos, verificador.errores_division)
+    siguiente = 0
+    resultados = []
+    for posicion, nodo in unidades:
+        # Ámbito global tal como lo deja el programa antes de esta sentencia
+        while (siguiente < len(declaraciones_globales)
+               and declaraciones_globales[siguiente][0] < posicion):
+            _, nombre, tipo = declaraciones_globales[siguiente]
+            verificador.declarar(nombre, tipo)
+            siguiente += 1
+
+        antes = [len(lista) for lista in listas]
+        ejecutar(verificador.visitar(nodo))
+        errores = tuple(lista[n:] for lista, n in zip(listas, antes))
+
+        # Con errores no se genera código de ningún trozo: no hace falta este
+        if any(errores):
+            resultados.append(errores + (None, 0, 0))
+            continue
+        generador = GeneradorIntermedio()
+        ejecutar(generador._generar_nodo(nodo))
+        resultados.append(errores + (generador.codigo_intermedio, generador.contador_temporales,
+                                     generador.contador_etiquetas))
+    return resultados
+
+
+def _procesar_lote(lote):
+    """Trabajo de un proceso: una serie de funciones consecutivas (posición, índice)"""
+    arena, tokens_info, tipos_globales, declaraciones_globales = _contexto
+    return _procesar_unidades([(posicion, arena.vista(indice)) for posicion, indice in lote],
+                              declaraciones_globales, tokens_info, tipos_globales)
+
+
+def _repartir(funciones, num_lotes):
+    """Lotes de funciones consecutivas con un número parecido de tokens"""
+    pesos = []
+    for _, nodo in funciones:
+        inicio, fin = nodo.tramo or (0, 1)
+        pesos.append(fin - inicio)
+    por_lote = sum(pesos) / num_lotes
+
+    lotes = [[]]
+    acumulado = 0
+    for (posicion, nodo), peso in zip(funciones, pesos):
+        if acumulado >= por_lote and len(lotes) < num_lotes:
+            lotes.append([])
+            acumulado = 0
+        lotes[-1].append((posicion, nodo.indice))
+        acumulado += peso
+    return lotes
+
+
+def analizar_y_generar(arbol, tokens_info=None, workers=None, umbral=UMBRAL_PARALELO, imprimir=True):
+    """
+    Igual que analizar_semantica(arbol, tokens_info, imprimir) seguido, si no
+    hay errores, de GeneradorIntermedio().generar_codigo(arbol). Devuelve
+    (tabla_global, errores, generador), con generador None si hubo errores.
+    Si el árbol no supera 'umbral' nodos o solo hay un proceso se usa la
+    versión serie.
+    """
+    workers = workers or os.cpu_count() or 1
+    unidades = arbol.hijos if arbol.nombre == "Program" else None
+    funciones = [(posicion, nodo) for posicion, nodo in enumerate(unidades or ())
+                 if nodo.nombre == "Funcion"]
+    if workers <= 1 or len(arbol.arena) < umbral or len(funciones) < 2:
+        tabla, errores = analizar_semantica(arbol, tokens_info, imprimir)
+        if errores:
+            return tabla, errores, None
+        generador = GeneradorIntermedio()
+        generador.generar_codigo(arbol)
+        return tabla, errores, generador
+
+    if traza.nivel >= INFO:
+        traza.emitir("semantico", INFO, "Verificando usos, tipos y divisiones por cero...")
+    verificador = VerificadorSemantico(tokens_info)
+    verificador.recoger_globales(arbol)
+    tipos_globales = verificador.tipos_globales
+
+    # Declaraciones hechas directamente en el ámbito global, en orden
+    declaraciones_globales = []
+    for posicion, nodo in enumerate(unidades):
+        if nodo.nombre == "Asignacion":
+            variable = nodo.hijos[0]
+            if variable.tipo is not None:
+                declaraciones_globales.append((posicion, variable.valor, variable.tipo))
+
+    resultados = [None] * len(unidades)
+    lotes = _repartir(funciones, min(len(funciones), workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_proceso,
+                             initargs=(arbol.arena, tokens_info, tipos_globales,
+                                       declaraciones_globales)) as pool:
+        pendientes = pool.map(_procesar_lote, lotes)
+
+        # Mientras tanto, el resto de sentencias de primer nivel aquí
+        locales = [(posicion, nodo) for posicion, nodo in enumerate(unidades)
+                   if nodo.nombre != "Funcion"]
+        for (posicion, _), resultado in zip(locales, _procesar_unidades(
+                locales, declaraciones_globales, tokens_info, tipos_globales)):
+            resultados[posicion] = resultado
+
+        for lote, resultados_lote in zip(lotes, pendientes):
+            for (posicion, _), resultado in zip(lote, resultados_lote):
+                resultados[posicion] = resultado
+
+    errores_usos, errores_tipos, errores_division = [], [], []
+    for usos, tipos, division, _, _, _ in resultados:
+        errores_usos.extend(usos)
+        errores_tipos.extend(tipos)
+        errores_division.extend(division)
+    tabla, errores = concluir_analisis(arbol, errores_usos + errores_tipos + errores_division, imprimir)
+    if errores:
+        return tabla, errores, None
+
+    # Temporales y etiquetas de cada trozo a continuación de los anteriores
+    generador = GeneradorIntermedio()
+    for _, _, _, codigo, temporales, etiquetas in resultados:
+        generador.codigo_intermedio.anexar(codigo, generador.contador_temporales,
+                                           generador.contador_etiquetas)
+        generador.contador_temporales += temporales
+        generador.contador_etiquetas += etiquetas
+    generador.informar()
+    return tabla, errores, generador
@@ -0,0 +1,248 @@
+"""
+Desenrollado de bucles con número de vueltas conocido al compilar.
+
+'for (int i = 0; i < 10; i = i + 1)' hace en cada vuelta la comparación,
+el salto, el incremento y el goto de vuelta a la cabecera. Este pase va
+detrás de la propagación de constantes y busca, en cada tramo, bucles sin
+sub-bucles con esta forma:
+
+- la cabecera solo tiene sus etiquetas y un salto con comparación entre la
+  variable del bucle y una constante entera, que sale del bucle;
+- se entra en el bucle solo desde el bloque anterior (el preencabezado de
+  optimizacion_bucles), que deja en la variable una constante;
+- la variable es una variable de inducción entera con una sola escritura
+  'i = i + k' en el bucle, en un bloque por el que pasa todo camino de
+  vuelta a la cabecera (el continue de un for salta al incremento);
+- el bucle ocupa un trozo seguido del código que termina con el goto a la
+  cabecera y al que solo se entra por ella; dentro puede haber bloques que
+  salen del bucle, como el de un break, y se copian con el resto.
+
+Con el valor inicial, el paso y el límite se calcula el número de vueltas.
+Si las copias del cuerpo (el trozo menos la cabecera) hacen crecer el
+código como mucho PRESUPUESTO instrucciones, el bucle se desenrolla entero:
+una copia por vuelta, sin comparaciones, y la última sigue por donde salía
+la cabecera. Si no, y da al menos 2 * FACTOR vueltas, delante del bucle se
+pone otro con FACTOR copias del cuerpo (o la mitad, hasta que quepan en el
+presupuesto) que solo compara una vez por cada FACTOR vueltas, mientras
+queden FACTOR por dar. El bucle original se queda detrás como bucle de
+resto para las que falten.
+
+En cada copia se renombran las etiquetas del cuerpo: un break sigue
+saltando a la salida del bucle, un continue salta al incremento de su
+propia copia y los saltos a la cabecera pasan a la copia siguiente.
+"""
+from grafo_flujo import GrafoFlujo, tramos_programa
+from intermedio import (CODIGO_OPERACION, COMPARACION_CONTRARIA, COMPARACION_DE_SALTO, ETIQUETA, NOMBRE,
+                        OP_ETIQUETA, OP_LLAMADA, OP_SALTO, SIN_OPERANDO, es_salto_comparacion)
+from optimizacion_bucles import OP_MULTIPLICACION, OP_SUMA, BuclesTramo
+from propagacion_constantes import plegar
+
+PRESUPUESTO = 64  # instrucciones que puede añadir el desenrollado de un bucle
+FACTOR = 4  # copias del cuerpo por vuelta en el desenrollado parcial
+
+_OP_MENOR = CODIGO_OPERACION["MENOR_QUE"]
+_OP_MENOR_IGUAL = CODIGO_OPERACION["MENOR_IGUAL"]
+_OP_MAYOR = CODIGO_OPERACION["MAYOR_QUE"]
+_OP_MAYOR_IGUAL = CODIGO_OPERACION["MAYOR_IGUAL"]
+_OP_IGUAL = CODIGO_OPERACION["IGUAL_IGUAL"]
+_OP_SALTO_SI_MENOR = CODIGO_OPERACION["SALTO_SI_MENOR"]
+_OP_SALTO_SI_MAYOR = CODIGO_OPERACION["SALTO_SI_MAYOR"]
+
+# 'a <op> b' equivale a 'b <simétrica> a'
+_SIMETRICA = {_OP_MENOR: _OP_MAYOR, _OP_MAYOR: _OP_MENOR,
+              _OP_MENOR_IGUAL: _OP_MAYOR_IGUAL, _OP_MAYOR_IGUAL: _OP_MENOR_IGUAL}
+
+
+def vueltas_bucle(comparacion, inicial, paso, limite):
+    """
+    Vueltas de un bucle que sigue mientras 'i <comparacion> limite', con i
+    valiendo inicial, inicial + paso, ... (paso != 0), o None si no acaba
+    antes de desbordarse
+    """
+    if paso < 0:
+        comparacion = _SIMETRICA.get(comparacion, comparacion)
+        inicial, paso, limite = -inicial, -paso, -limite
+    if comparacion == _OP_MENOR:
+        return max(0, -((inicial - limite) // paso))
+    if comparacion == _OP_MENOR_IGUAL:
+        return max(0, (limite - inicial) // paso + 1)
+    if comparacion == _OP_IGUAL:
+        return int(inicial == limite)
+    if comparacion == _OP_MAYOR or comparacion == _OP_MAYOR_IGUAL:
+        return None if plegar(comparacion, inicial, limite) else 0
+    # DIFERENTE: acaba si algún paso cae justo en el límite
+    if limite >= inicial and (limite - inicial) % paso == 0:
+        return (limite - inicial) // paso
+    return None
+
+
+class DesenrolladoTramo(BuclesTramo):
+    """Desenrollado de los bucles de conteo de un GrafoFlujo"""
+
+    def __init__(self, codigo, grafo, siguiente_temporal, siguiente_etiqueta):
+        super().__init__(codigo, grafo, siguiente_temporal, siguiente_etiqueta)
+        self.bucles_desenrollados = 0
+        self.bucles_parciales = 0
+        self.copias_del_cuerpo = 0
+
+    def _nueva_etiqueta(self, prefijo):
+        self.siguiente_etiqueta += 1
+        return self.codigo.etiqueta(self.siguiente_etiqueta - 1, prefijo)
+
+    def _ultimo_bloque(self, h):
+        """
+        Último bloque del trozo de código del bucle h, que termina con el goto
+        a la cabecera, o -1 si a sus bloques se llega desde fuera del trozo o
+        si dentro hay otro bucle
+        """
+        grafo = self.grafo
+        ultimo = max(grafo.bloques_bucle(h))
+        for b in range(h + 1, ultimo + 1):
+            if b in grafo.bucles or not all(h <= p <= ultimo for p in grafo.predecesores[b]):
+                return -1
+        final = grafo.fines[ultimo] - 1
+        if self.codigo.ops[final] != OP_SALTO or grafo.bloque_de_etiqueta.get(self.codigo.destinos[final]) != h:
+            return -1
+        return ultimo
+
+    def _conteo(self, h):
+        """(variable, inicial, paso, vueltas, salida) del bucle de conteo h, o None"""
+        grafo = self.grafo
+        codigo = self.codigo
+        salto = grafo.fines[h] - 1
+        if not es_salto_comparacion(codigo.ops[salto]):
+            return None
+        if any(codigo.ops[i] != OP_ETIQUETA for i in range(grafo.inicios[h], salto)):
+            return None
+        salida = codigo.destinos[salto]
+        bloque_salida = grafo.bloque_de_etiqueta.get(salida)
+        if bloque_salida is None or grafo.en_bucle(bloque_salida, h):
+            return None
+
+        # Sigue en el bucle mientras no se cumple la comparación del salto
+        comparacion = COMPARACION_CONTRARIA[COMPARACION_DE_SALTO[codigo.ops[salto]]]
+        variable, limite = codigo.fuentes1[salto], self._constante_entera(codigo.fuentes2[salto])
+        if limite is None:
+            variable, limite = codigo.fuentes2[salto], self._constante_entera(codigo.fuentes1[salto])
+            comparacion = _SIMETRICA.get(comparacion, comparacion)
+        if limite is None or variable & 3 != NOMBRE:
+            return None
+
+        pasos = self._induccion(variable, h)
+        if pasos is None or len(pasos) != 1 or not pasos[0][1]:
+            return None
+        p, paso = pasos[0]
+        d = self.bloque[p - grafo.inicio]
+        if grafo.cabecera_bucle[d] != h or not all(grafo.domina(d, l) for l in grafo.bucles[h]):
+            return None
+        inicial = self._valor_inicial(variable, h)
+        if inicial is None:
+            return None
+        vueltas = vueltas_bucle(comparacion, inicial, paso, limite)
+        if vueltas is None or type(plegar(OP_SUMA, inicial, plegar(OP_MULTIPLICACION, vueltas, paso))) is not int:
+            return None
+        return variable, inicial, paso, vueltas, salida
+
+    def _copia(self, h, inicio, fin, siguiente):
+        """
+        Cuádruplas de una copia de las instrucciones [inicio, fin) del bucle
+        h, con etiquetas nuevas y los saltos a la cabecera yendo a 'siguiente'
+        """
+        codigo = self.codigo
+        bloque_de_etiqueta = self.grafo.bloque_de_etiqueta
+        nuevas = {codigo.destinos[q]: self._nueva_etiqueta(codigo.prefijos[codigo.destinos[q] >> 2])
+                  for q in range(inicio, fin) if codigo.ops[q] == OP_ETIQUETA}
+        copia = []
+        for q in range(inicio, fin):
+            op, destino, fuente1, fuente2 = codigo.cuadrupla(q)
+            if destino != SIN_OPERANDO and destino & 3 == ETIQUETA:
+                if destino in nuevas:
+                    destino = nuevas[destino]
+                elif bloque_de_etiqueta.get(destino) == h:
+                    destino = siguiente
+            if op == OP_LLAMADA:
+                codigo.argumentos.append(codigo.argumentos[fuente2])
+                fuente2 = len(codigo.argumentos) - 1
+            copia.append((op, destino, fuente1, fuente2))
+        return copia
+
+    def _copias(self, h, ultimo, numero, final):
+        """'numero' copias seguidas del cuerpo del bucle h; la última vuelve a 'final'"""
+        inicio, fin = self.grafo.fines[h], self.grafo.fines[ultimo]
+        cuadruplas = []
+        for m in range(numero):
+            siguiente = final if m == numero - 1 else self._nueva_etiqueta("vuelta")
+            cuadruplas.extend(self._copia(h, inicio, fin, siguiente))
+            if siguiente != final:
+                cuadruplas.append((OP_ETIQUETA, siguiente, SIN_OPERANDO, SIN_OPERANDO))
+        self.copias_del_cuerpo += numero
+        return cuadruplas
+
+    def desenrollar(self, insertadas, eliminadas):
+        """Añade las copias de los cuerpos y, si el desenrollado es completo, borra el bucle"""
+        grafo = self.grafo
+        codigo = self.codigo
+        padres = set(grafo.padre_bucle.values())
+        for h in sorted(grafo.bucles):
+            if h in padres or not self._preencabezado(h):
+                continue
+            ultimo = self._ultimo_bloque(h)
+            conteo = ultimo >= 0 and self._conteo(h)
+            if not conteo:
+                continue
+            variable, inicial, paso, vueltas, salida = conteo
+            tamano = grafo.fines[ultimo] - grafo.fines[h]
+            original = grafo.fines[ultimo] - grafo.inicios[h]
+
+            if vueltas * (tamano + 1) - 1 - original <= PRESUPUESTO:
+                if vueltas:
+                    cuadruplas = self._copias(h, ultimo, vueltas, salida)
+                else:
+                    cuadruplas = [(OP_SALTO, salida, SIN_OPERANDO, SIN_OPERANDO)]
+                insertadas.setdefault(grafo.inicios[h], []).extend(cuadruplas)
+                eliminadas.update(range(grafo.inicios[h], grafo.fines[ultimo]))
+                self.bucles_desenrollados += 1
+                continue
+
+            factor = FACTOR
+            while factor > 1 and factor * (tamano + 1) + 2 > PRESUPUESTO:
+                factor //= 2
+            if factor < 2 or vueltas < 2 * factor:
+                continue
+            # Mientras queden 'factor' vueltas: i no ha pasado del valor de la vuelta vueltas - factor
+            cabecera = self._nueva_etiqueta("desenrollado")
+            resto = self._nueva_etiqueta("restobucle")
+            ultima = codigo.constante_de_valor(inicial + (vueltas - factor) * paso)
+            salto = _OP_SALTO_SI_MAYOR if paso > 0 else _OP_SALTO_SI_MENOR
+            cuadruplas = [(OP_ETIQUETA, cabecera, SIN_OPERANDO, SIN_OPERANDO), (salto, resto, variable, ultima)]
+            cuadruplas.extend(self._copias(h, ultimo, factor, cabecera))
+            cuadruplas.append((OP_ETIQUETA, resto, SIN_OPERANDO, SIN_OPERANDO))
+            insertadas.setdefault(grafo.inicios[h], []).extend(cuadruplas)
+            self.bucles_parciales += 1
+
+
+def desenrollar_bucles(codigo):
+    """
+    Desenrolla los bucles de conteo con número de vueltas constante, entero
+    o por FACTOR con bucle de resto. Devuelve un diccionario con los bucles
+    de cada tipo y las copias del cuerpo añadidas.
+    """
+    resumen = {"bucles_desenrollados": 0, "bucles_parciales": 0, "copias_del_cuerpo": 0}
+    siguiente_temporal = max((t >> 2 for t in codigo.temporales()), default=-1) + 1
+    siguiente_etiqueta = max(codigo.prefijos, default=-1) + 1
+    insertadas = {}
+    eliminadas = set()
+    for _, inicio, fin in tramos_programa(codigo):
+        if fin == inicio:
+            continue
+        grafo = GrafoFlujo(codigo, inicio, fin)
+        if not grafo.bucles:
+            continue
+        tramo = DesenrolladoTramo(codigo, grafo, siguiente_temporal, siguiente_etiqueta)
+        tramo.desenrollar(insertadas, eliminadas)
+        siguiente_etiqueta = tramo.siguiente_etiqueta
+        for clave in resumen:
+            resumen[clave] += getattr(tramo, clave)
+    nuevas = codigo.insertar(insertadas)
+    codigo.eliminar({nuevas[i] for i in eliminadas})
+    return resumen
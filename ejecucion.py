@@ -1,8 +1,11 @@
-from ClassParser import ParserAsignacion, ASTNode, TablaSimbolos
-from lexico import tokenizar
+import os
 from collections import defaultdict
-from semantico import analizar_semantica
-from generadorCodigo import GeneradorIntermedio
+from asignacion_temporales import tamano_marco
+from cache_compilacion import CacheCompilacion, compilar
+from traza import traza, gancho_consola, INFO
+
+# Trazas de progreso por consola; el anillo guarda las últimas para informes de fallo
+traza.configurar(nivel=INFO, ganchos=[gancho_consola], capacidad_anillo=50)
 
 # Código de prueba
 codigo_limpio = """
@@ -28,16 +31,29 @@ int main() {
 }
 """
 
-# ======== TOKENIZACIÓN ========
-tokens_ordenados, contador, errores_token = tokenizar(codigo_limpio)
+# ======== COMPILACIÓN (con caché en disco) ========
+# Si el código y el compilador no han cambiado se reutilizan las cuatro fases
+# COMPILADOR_WORKERS > 1 reparte el semántico y la generación por funciones;
+# COMPILADOR_OPTIMIZACION fija el nivel de optimización (0 = sin optimizar)
+cache = CacheCompilacion(os.environ.get("COMPILADOR_CACHE", ".cache_compilador"))
+nivel_optimizacion = int(os.environ.get("COMPILADOR_OPTIMIZACION", "1"))
+resultado = compilar(codigo_limpio, cache, workers=int(os.environ.get("COMPILADOR_WORKERS", "1")),
+                     nivel_optimizacion=nivel_optimizacion)
+if resultado.desde_cache:
+    print("(resultado recuperado de la caché de compilación)")
+
+tokens_ordenados = resultado.tokens
+contador = resultado.contador_tokens
+errores_token = resultado.errores_token
 
 # ======== IMPRESIÓN DE TOKENS ========
 print("=" * 60)
 print("ANÁLISIS LÉXICO")
 print("=" * 60)
 print("Orden de tokens:")
-for token in tokens_ordenados:
-    num_linea, columna, tipo, valor, linea = token
+for i in range(len(tokens_ordenados)):
+    num_linea, columna, valor, _ = tokens_ordenados.ubicacion(i)
+    tipo = tokens_ordenados.tipo(i)
     print(f"Línea {num_linea}, Col {columna}, Tipo: {tipo}, Valor: {valor}")
 
 # ======== ERRORES DE TOKENIZACIÓN ========
@@ -46,20 +62,15 @@ if errores_token:
     for e in errores_token:
         print("-", e)
 else:
-    # Convertimos tokens a formato (tipo, valor) para el parser
-    tokens_parser = [(t[2], t[3]) for t in tokens_ordenados]
-    tokens_parser.append(("EOF", "EOF"))
-
     # ======== PARSER ========
     print("\n" + "=" * 60)
     print("ANÁLISIS SINTÁCTICO")
     print("=" * 60)
     
-    #  CORREGIDO: Pasar tokens_con_ubicacion al parser
-    parser = ParserAsignacion(tokens_ordenados, tokens_parser)  # tokens_ordenados tiene toda la info
-    
     try:
-        arbol = parser.program()
+        if resultado.error_sintactico:
+            raise SyntaxError(resultado.error_sintactico)
+        arbol = resultado.arbol
         print(" Análisis sintáctico exitoso")
         
         # ======== FUNCIÓN PARA IMPRIMIR EL ÁRBOL ========
@@ -82,11 +93,10 @@ else:
         print("ANÁLISIS SEMÁNTICO")
         print("=" * 60)
         
-        # Pasar la tabla de símbolos del parser al árbol
-        arbol.tabla_global = parser.tabla_global
-        
-
-        tabla_simbolos, errores_semanticos = analizar_semantica(arbol, tokens_info=tokens_ordenados)
+        # La tabla de símbolos del parser viaja en el árbol (arbol.tabla_global)
+        tabla_simbolos = arbol.tabla_global
+        errores_semanticos = resultado.errores_semanticos
+        print(resultado.informe_semantico)
         
         # ✅ NUEVA SECCIÓN: GENERACIÓN DE CÓDIGO INTERMEDIO
         if not errores_semanticos:
@@ -94,16 +104,16 @@ else:
             print("GENERACIÓN DE CÓDIGO INTERMEDIO")
             print("=" * 60)
             
-            # Crear generador y generar código
-            generador = GeneradorIntermedio()
-            codigo_tac = generador.generar_codigo(arbol)
+            # El código intermedio ya está en arbol.codigo_intermedio
+            generador = resultado.generador
+            codigo_tac = arbol.codigo_intermedio
             
-            # Imprimir código intermedio generado
+            # Imprimir código intermedio generado (ya optimizado)
             generador.imprimir_codigo()
             
-            # Guardar código intermedio para uso posterior
-            arbol.codigo_intermedio = codigo_tac
             print(f"\n Código intermedio generado: {len(codigo_tac)} instrucciones")
+            if resultado.informe_optimizacion is not None:
+                resultado.informe_optimizacion.imprimir()
         
         # ======== RESUMEN FINAL ========
         print("\n" + "=" * 60)
@@ -128,7 +138,8 @@ else:
             if hasattr(arbol, 'codigo_intermedio'):
                 print(f"\n GENERACIÓN DE CÓDIGO: Exitosa")
                 print(f"   Instrucciones TAC generadas: {len(arbol.codigo_intermedio)}")
-                print(f"   Temporales usados: {generador.contador_temporales}")
+                print(f"   Temporales usados: {len(arbol.codigo_intermedio.temporales())} "
+                      f"(marco más grande: {tamano_marco(arbol.codigo_intermedio)})")
                 print(f"   Etiquetas creadas: {generador.contador_etiquetas}")
         
         # Información de la tabla de símbolos
@@ -159,7 +170,12 @@ else:
         #  Los errores sintácticos ya vienen con formato mejorado
         print(f"\n{e}")
         
+        # Últimos eventos de traza antes del fallo
+        if traza.ultimos_eventos():
+            print("\n Últimos eventos de traza:")
+            print(traza.volcar())
+        
         # Mostrar tabla de símbolos incluso si hay error sintáctico
-        if hasattr(parser, 'tabla_global') and parser.tabla_global:
+        if resultado.tabla_global:
             print("\n Tabla de símbolos hasta el error:")
-            parser.tabla_global.imprimir_tabla()
\ No newline at end of file
+            resultado.tabla_global.imprimir_tabla()
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Expansión en línea de funciones pequeñas.
+
+Cada 't = call f, a1, ..., an' paga la llamada y el retorno aunque f solo
+haga un par de operaciones. Este pase, que va el primero para que los
+demás vean el código expandido, cambia la llamada por una copia del código
+de f:
+
+    p1.k = a1                  (un parámetro de f renombrado por argumento)
+    ...
+    <código de f con sus variables locales, temporales y etiquetas nuevos>
+    retornoN:
+
+donde cada 'return v' pasa a ser 't = v; goto retornoN' (un return sin valor
+o el final del código, solo el salto). Como en el resto de pases, un nombre
+de codigo.globales es la variable global también dentro de las funciones;
+cualquier otro nombre es local de la función y en cada expansión pasa a
+ser '<nombre>.<k>', que no choca con ningún identificador del programa.
+
+Qué llamadas se expanden lo deciden los límites de una Heuristica (la de
+HEURISTICA si no se pasa otra) y la forma de la función llamada, medida
+sobre el código sin expandir. Cada llamada recibe un motivo:
+
+- expandidas: se ha sustituido por el código de la función;
+- sin_definicion: la función no tiene código en el programa, o tiene varios;
+- recursivas: la función puede llegar a llamarse a sí misma;
+- grandes: tiene más de tamano_maximo instrucciones, sin contar etiquetas;
+- no_hojas: llama a otras funciones y la heurística pide solo_hojas;
+- parametros: el número de argumentos no es el de parámetros, o algún
+  parámetro tiene el nombre de una variable global;
+- presupuesto: el tramo que llama ya ha crecido crecimiento_maximo
+  instrucciones con las expansiones anteriores.
+
+El pase devuelve el número de llamadas con cada motivo y, en 'decisiones',
+la lista de llamadas (tramo que llama, posición, función, motivo) en orden
+del código, que InformeOptimizacion.imprimir() muestra una por línea. Con
+la traza en DEBUG emite también una línea por llamada.
+"""
+from grafo_flujo import tramos_programa
+from intermedio import (ETIQUETA, NOMBRE, OP_COPIA, OP_ETIQUETA, OP_LLAMADA, OP_RETORNO, OP_SALTO,
+                        SIN_OPERANDO, TEMPORAL, es_salto_condicional, temporal)
+from traza import traza, DEBUG
+
+MOTIVOS = ("expandidas", "sin_definicion", "recursivas", "grandes", "no_hojas", "parametros", "presupuesto")
+
+
+class Heuristica:
+    """Límites de la expansión en línea"""
+
+    def __init__(self, tamano_maximo=12, crecimiento_maximo=256, solo_hojas=False):
+        self.tamano_maximo = tamano_maximo  # instrucciones de la función llamada, sin etiquetas
+        self.crecimiento_maximo = crecimiento_maximo  # instrucciones que puede añadir cada tramo
+        self.solo_hojas = solo_hojas  # expandir solo funciones que no llaman a otras
+
+
+HEURISTICA = Heuristica()
+
+
+class ExpansionLlamadas:
+    """Decisión y copia de las expansiones de las llamadas de un CodigoIntermedio"""
+
+    def __init__(self, codigo, heuristica):
+        self.codigo = codigo
+        self.heuristica = heuristica
+        self.siguiente_temporal = max((t >> 2 for t in codigo.temporales()), default=-1) + 1
+        self.siguiente_etiqueta = max(codigo.prefijos, default=-1) + 1
+        self.expansiones = 0  # para los nombres de las variables locales copiadas
+        self.decisiones = []  # (tramo que llama, posición, función, motivo)
+
+        self.cuerpos = {}  # operando de la función -> (inicio, fin), o None si tiene varios
+        for nombre, inicio, fin in codigo.funciones:
+            funcion = codigo.nombre(nombre)
+            self.cuerpos[funcion] = None if funcion in self.cuerpos else (inicio, fin)
+        self.llamadas = {}  # función -> funciones a las que llama
+        self.tamanos = {}
+        for funcion, cuerpo in self.cuerpos.items():
+            if cuerpo is None:
+                continue
+            inicio, fin = cuerpo
+            self.llamadas[funcion] = {codigo.fuentes1[i] for i in range(inicio, fin) if codigo.ops[i] == OP_LLAMADA}
+            self.tamanos[funcion] = sum(1 for i in range(inicio, fin) if codigo.ops[i] != OP_ETIQUETA)
+        self._recursivas = {}
+
+    def _recursiva(self, funcion):
+        """True si 'funcion' puede llegar a llamarse a sí misma"""
+        recursiva = self._recursivas.get(funcion)
+        if recursiva is None:
+            pendientes = list(self.llamadas[funcion])
+            vistas = set(pendientes)
+            recursiva = False
+            while pendientes:
+                llamada = pendientes.pop()
+                if llamada == funcion:
+                    recursiva = True
+                    break
+                for siguiente in self.llamadas.get(llamada, ()):
+                    if siguiente not in vistas:
+                        vistas.add(siguiente)
+                        pendientes.append(siguiente)
+            self._recursivas[funcion] = recursiva
+        return recursiva
+
+    def motivo(self, i):
+        """Motivo (de MOTIVOS) por el que se expande o no la llamada i, sin contar el presupuesto"""
+        codigo = self.codigo
+        funcion = codigo.fuentes1[i]
+        if self.cuerpos.get(funcion) is None:
+            return "sin_definicion"
+        if self._recursiva(funcion):
+            return "recursivas"
+        if self.tamanos[funcion] > self.heuristica.tamano_maximo:
+            return "grandes"
+        if self.heuristica.solo_hojas and self.llamadas[funcion]:
+            return "no_hojas"
+        parametros = codigo.parametros.get(codigo.nombres[funcion >> 2], ())
+        if len(parametros) != len(codigo.argumentos[codigo.fuentes2[i]]):
+            return "parametros"
+        if any(codigo.nombres[p >> 2] in codigo.globales for p in parametros):
+            return "parametros"
+        return "expandidas"
+
+    def _nueva_etiqueta(self, prefijo):
+        self.siguiente_etiqueta += 1
+        return self.codigo.etiqueta(self.siguiente_etiqueta - 1, prefijo)
+
+    def expansion(self, i):
+        """Cuádruplas que sustituyen a la llamada i"""
+        codigo = self.codigo
+        funcion = codigo.fuentes1[i]
+        inicio, fin = self.cuerpos[funcion]
+        self.expansiones += 1
+        renombrados = {}
+
+        def renombrar(operando):
+            if operando == SIN_OPERANDO:
+                return operando
+            nuevo = renombrados.get(operando)
+            if nuevo is None:
+                if operando & 3 == TEMPORAL:
+                    nuevo = temporal(self.siguiente_temporal)
+                    self.siguiente_temporal += 1
+                elif operando & 3 == NOMBRE and codigo.nombres[operando >> 2] not in codigo.globales:
+                    texto = codigo.nombres[operando >> 2]
+                    copia = f"{texto}.{self.expansiones}"
+                    nuevo = codigo.nombre(copia)
+                    if texto in codigo.tipos:
+                        codigo.declarar(copia, codigo.tipos[texto])
+                elif operando & 3 == ETIQUETA:
+                    nuevo = self._nueva_etiqueta(codigo.prefijos[operando >> 2])
+                else:
+                    nuevo = operando
+                renombrados[operando] = nuevo
+            return nuevo
+
+        resultado = codigo.destinos[i]
+        retorno = self._nueva_etiqueta("retorno")
+        parametros = codigo.parametros.get(codigo.nombres[funcion >> 2], ())
+        cuadruplas = [(OP_COPIA, renombrar(p), a, SIN_OPERANDO)
+                      for p, a in zip(parametros, codigo.argumentos[codigo.fuentes2[i]])]
+        for q in range(inicio, fin):
+            op, destino, fuente1, fuente2 = codigo.cuadrupla(q)
+            if op == OP_RETORNO:
+                if fuente1 != SIN_OPERANDO and resultado != SIN_OPERANDO:
+                    cuadruplas.append((OP_COPIA, resultado, renombrar(fuente1), SIN_OPERANDO))
+                cuadruplas.append((OP_SALTO, retorno, SIN_OPERANDO, SIN_OPERANDO))
+                continue
+            if op == OP_ETIQUETA or op == OP_SALTO or es_salto_condicional(op):
+                # Los saltos a nombres (break/continue fuera de bucle) se quedan igual
+                if destino & 3 == ETIQUETA:
+                    destino = renombrar(destino)
+            else:
+                destino = renombrar(destino)
+            if op == OP_LLAMADA:
+                codigo.argumentos.append(tuple(renombrar(a) for a in codigo.argumentos[fuente2]))
+                fuente2 = len(codigo.argumentos) - 1
+            else:
+                fuente1 = renombrar(fuente1)
+                fuente2 = renombrar(fuente2)
+            cuadruplas.append((op, destino, fuente1, fuente2))
+        cuadruplas.append((OP_ETIQUETA, retorno, SIN_OPERANDO, SIN_OPERANDO))
+        return cuadruplas
+
+
+def expandir_llamadas(codigo, heuristica=None):
+    """
+    Sustituye las llamadas a funciones pequeñas y no recursivas por su
+    código, según 'heuristica' (HEURISTICA por defecto). Devuelve un
+    diccionario con el número de llamadas de cada motivo y la lista de
+    decisiones (tramo que llama o None, posición de la llamada antes de
+    expandir, función, motivo).
+    """
+    expansion = ExpansionLlamadas(codigo, heuristica or HEURISTICA)
+    resumen = dict.fromkeys(MOTIVOS, 0)
+    insertadas = {}
+    eliminadas = set()
+    for nombre, inicio, fin in tramos_programa(codigo):
+        crecimiento = 0
+        for i in range(inicio, fin):
+            if codigo.ops[i] != OP_LLAMADA:
+                continue
+            motivo = expansion.motivo(i)
+            if motivo == "expandidas":
+                if crecimiento < expansion.heuristica.crecimiento_maximo:
+                    cuadruplas = expansion.expansion(i)
+                    crecimiento += len(cuadruplas) - 1
+                    # Delante de la siguiente, para que quede dentro de la función aunque i sea la primera
+                    insertadas[i + 1] = cuadruplas
+                    eliminadas.add(i)
+                else:
+                    motivo = "presupuesto"
+            resumen[motivo] += 1
+            expansion.decisiones.append((nombre, i, codigo.nombres[codigo.fuentes1[i] >> 2], motivo))
+            if traza.nivel >= DEBUG:
+                traza.emitir("optimizacion", DEBUG, f"{nombre or 'primer nivel'}: llamada a "
+                                                    f"{codigo.nombres[codigo.fuentes1[i] >> 2]} en {i}: {motivo}")
+    nuevas = codigo.insertar(insertadas)
+    codigo.eliminar({nuevas[i] for i in eliminadas})
+    resumen["decisiones"] = expansion.decisiones
+    return resumen
@@ -1,65 +1,122 @@
+from types import GeneratorType
+
+from ClassParser import CODIGO_NODO, tabla_despacho
+from intermedio import (CODIGO_OPERACION, COMPARACION_CONTRARIA, CodigoIntermedio, OPERACION_BINARIA,
+                        OP_COPIA, OP_ETIQUETA, OP_RETORNO, OP_SALTO, OP_SALTO_SI_FALSO,
+                        SALTO_DE_COMPARACION, SIN_OPERANDO, temporal)
+from recorrido import ejecutar
+from traza import traza, DEBUG, INFO
+
+NODO_BINOP = CODIGO_NODO["BinOp"]
+NODO_BOOLEANO = CODIGO_NODO["Booleano"]
+OP_AND = CODIGO_OPERACION["AND_LOGICO"]
+OP_OR = CODIGO_OPERACION["OR_LOGICO"]
+OP_SALTO_SI_DIFERENTE = CODIGO_OPERACION["SALTO_SI_DIFERENTE"]
+
 class GeneradorIntermedio:
     def __init__(self):
-        self.codigo_intermedio = []  # Lista de instrucciones TAC
+        self.codigo_intermedio = CodigoIntermedio()  # Cuádruplas del programa
         self.contador_temporales = 0
         self.contador_etiquetas = 0
         self.etiquetas_saltos = {}  # Para manejar etiquetas de saltos
+        self.en_funcion = False
     
     def nuevo_temporal(self):
-        """Genera un nuevo nombre de variable temporal"""
-        temporal = f"t{self.contador_temporales}"
+        """Genera un nuevo temporal (operando)"""
+        operando = temporal(self.contador_temporales)
         self.contador_temporales += 1
-        return temporal
+        return operando
     
     def nueva_etiqueta(self, prefijo="L"):
-        """Genera una nueva etiqueta para saltos"""
-        etiqueta = f"{prefijo}{self.contador_etiquetas}"
+        """Genera una nueva etiqueta para saltos (operando)"""
+        etiqueta = self.codigo_intermedio.etiqueta(self.contador_etiquetas, prefijo)
         self.contador_etiquetas += 1
         return etiqueta
     
-    def agregar_instruccion(self, instruccion):
-        """Agrega una instrucción al código intermedio"""
-        self.codigo_intermedio.append(instruccion)
+    def agregar_instruccion(self, op, destino=SIN_OPERANDO, fuente1=SIN_OPERANDO, fuente2=SIN_OPERANDO):
+        """Agrega una cuádrupla al código intermedio"""
+        i = self.codigo_intermedio.agregar(op, destino, fuente1, fuente2)
+        if traza.nivel >= DEBUG:
+            traza.emitir("codigo", DEBUG, self.codigo_intermedio.texto(i))
     
     def generar_codigo(self, arbol):
         """Genera código intermedio a partir del AST"""
-        self.codigo_intermedio = []  # Reiniciar código
+        self.codigo_intermedio = CodigoIntermedio()  # Reiniciar código
         self.contador_temporales = 0
         self.contador_etiquetas = 0
         
         # Procesar el programa completo
-        self._generar_nodo(arbol)
+        ejecutar(self._generar_nodo(arbol))
         
+        self.informar()
         return self.codigo_intermedio
     
+    def informar(self):
+        """Resumen del código generado en la traza"""
+        if traza.nivel >= INFO:
+            traza.emitir("codigo", INFO, f"{len(self.codigo_intermedio)} instrucciones, "
+                                         f"{self.contador_temporales} temporales")
+    
     def _generar_nodo(self, nodo):
-        """Genera código para un nodo del AST"""
-        metodo_generador = getattr(self, f"_generar_{nodo.nombre}", None)
+        """
+        Generación de código de un nodo del AST, para ejecutar() o ceder desde
+        otra generación; su resultado es el temporal o valor de la expresión
+        """
+        try:
+            metodo_generador = self.DESPACHO[nodo.clase]
+        except IndexError:  # clase registrada después de construir la tabla
+            metodo_generador = None
         if metodo_generador:
-            return metodo_generador(nodo)
+            return metodo_generador(self, nodo)
         else:
             # Por defecto, procesar hijos
-            for hijo in nodo.hijos:
-                self._generar_nodo(hijo)
-            return None
+            return self._generar_hijos(nodo)
+    
+    def _generar_hijos(self, nodo):
+        for hijo in nodo.hijos:
+            yield self._generar_nodo(hijo)
+        return None
     
     def _generar_Program(self, nodo):
         """Genera código para un programa completo"""
         for hijo in nodo.hijos:
-            self._generar_nodo(hijo)
+            yield self._generar_nodo(hijo)
+    
+    def _generar_Funcion(self, nodo):
+        """Genera código para una función y registra su tramo de instrucciones y sus parámetros"""
+        inicio = len(self.codigo_intermedio)
+        self.en_funcion = True
+        parametros = nodo.hijos[1]  # Nodo Parametros
+        self.codigo_intermedio.parametros[nodo.valor] = tuple(
+            self.codigo_intermedio.nombre(parametro.valor) for parametro in parametros.hijos)
+        for hijo in nodo.hijos:
+            yield self._generar_nodo(hijo)
+        self.en_funcion = False
+        self.codigo_intermedio.funciones.append((nodo.valor, inicio, len(self.codigo_intermedio)))
+    
+    def _generar_Parametro(self, nodo):
+        """Los parámetros no generan código; se registra su tipo"""
+        self.codigo_intermedio.declarar(nodo.valor, nodo.tipo)
     
     def _generar_Asignacion(self, nodo):
         """Genera código para una asignación: x = expresión"""
         variable = nodo.hijos[0]  # Nodo Variable
         expresion = nodo.hijos[1] # Nodo Expresión
         
+        # Tipo declarado de la variable (el parser lo resuelve en su ámbito)
+        if variable.tipo is not None:
+            self.codigo_intermedio.declarar(variable.valor, variable.tipo)
+        if not self.en_funcion:
+            self.codigo_intermedio.globales.add(variable.valor)
+        
         # Generar código para la expresión
-        temp_resultado = self._generar_nodo(expresion)
+        temp_resultado = yield self._generar_nodo(expresion)
         
         # Si la expresión devolvió un temporal, asignarlo
-        if temp_resultado:
-            self.agregar_instruccion(f"{variable.valor} = {temp_resultado}")
-            return variable.valor
+        if temp_resultado is not None:
+            destino = self.codigo_intermedio.nombre(variable.valor)
+            self.agregar_instruccion(OP_COPIA, destino, temp_resultado)
+            return destino
     
     def _generar_BinOp(self, nodo):
         """Genera código para operaciones binarias: t1 = a + b"""
@@ -67,51 +124,92 @@ class GeneradorIntermedio:
         izquierda = nodo.hijos[0]
         derecha = nodo.hijos[1]
         
+        if OPERACION_BINARIA[operador] in (OP_AND, OP_OR):
+            # && y || con saltos: t1 = 1 si la condición se cumple, 0 si no
+            etiqueta_falso = self.nueva_etiqueta("falso")
+            etiqueta_fin = self.nueva_etiqueta("finlogico")
+            yield self._generar_salto(nodo, False, etiqueta_falso)
+            temp_resultado = self.nuevo_temporal()
+            self.agregar_instruccion(OP_COPIA, temp_resultado, self.codigo_intermedio.constante("1"))
+            self.agregar_instruccion(OP_SALTO, etiqueta_fin)
+            self.agregar_instruccion(OP_ETIQUETA, etiqueta_falso)
+            self.agregar_instruccion(OP_COPIA, temp_resultado, self.codigo_intermedio.constante("0"))
+            self.agregar_instruccion(OP_ETIQUETA, etiqueta_fin)
+            return temp_resultado
+        
         # Generar código para los operandos
+        # (las hojas devuelven su valor directamente, sin pasar por el motor)
         temp_izq = self._generar_nodo(izquierda)
+        if type(temp_izq) is GeneratorType:
+            temp_izq = yield temp_izq
         temp_der = self._generar_nodo(derecha)
+        if type(temp_der) is GeneratorType:
+            temp_der = yield temp_der
         
         # Crear nuevo temporal para el resultado
         temp_resultado = self.nuevo_temporal()
         
-        # Mapear operadores a su representación en TAC
-        op_map = {
-            "SUMA": "+",
-            "RESTA": "-", 
-            "MULTIPLICACION": "*",
-            "DIVISION": "/",
-            "MODULO": "%",
-            "AND_LOGICO": "&&",
-            "OR_LOGICO": "||",
-            "IGUAL_IGUAL": "==",
-            "DIFERENTE": "!=",
-            "MENOR_QUE": "<",
-            "MAYOR_QUE": ">",
-            "MENOR_IGUAL": "<=",
-            "MAYOR_IGUAL": ">="
-        }
-        
-        operador_tac = op_map.get(operador, operador)
-        self.agregar_instruccion(f"{temp_resultado} = {temp_izq} {operador_tac} {temp_der}")
+        self.agregar_instruccion(OPERACION_BINARIA[operador], temp_resultado, temp_izq, temp_der)
         
         return temp_resultado
     
+    def _generar_salto(self, nodo, si_cierta, etiqueta):
+        """
+        Genera código que salta a 'etiqueta' si la condición 'nodo' vale
+        'si_cierta' y sigue detrás si no. && y || no evalúan el operando
+        derecho cuando el izquierdo ya decide el resultado, y una comparación
+        se traduce en un solo salto con comparación (if a < b goto L).
+        """
+        if nodo.clase == NODO_BOOLEANO:
+            if (nodo.valor == "true") == si_cierta:
+                self.agregar_instruccion(OP_SALTO, etiqueta)
+            return
+        
+        op = OPERACION_BINARIA[nodo.valor] if nodo.clase == NODO_BINOP else None
+        if op == OP_AND or op == OP_OR:
+            izquierda, derecha = nodo.hijos
+            decide = op == OP_OR  # valor de un operando que ya decide el resultado
+            if si_cierta == decide:
+                yield self._generar_salto(izquierda, si_cierta, etiqueta)
+                yield self._generar_salto(derecha, si_cierta, etiqueta)
+            else:
+                etiqueta_decidida = self.nueva_etiqueta("logico")
+                yield self._generar_salto(izquierda, decide, etiqueta_decidida)
+                yield self._generar_salto(derecha, si_cierta, etiqueta)
+                self.agregar_instruccion(OP_ETIQUETA, etiqueta_decidida)
+            return
+        
+        if op in SALTO_DE_COMPARACION:
+            temp_izq = yield self._generar_nodo(nodo.hijos[0])
+            temp_der = yield self._generar_nodo(nodo.hijos[1])
+            if not si_cierta:
+                op = COMPARACION_CONTRARIA[op]
+            self.agregar_instruccion(SALTO_DE_COMPARACION[op], etiqueta, temp_izq, temp_der)
+            return
+        
+        temp_cond = yield self._generar_nodo(nodo)
+        if si_cierta:
+            self.agregar_instruccion(OP_SALTO_SI_DIFERENTE, etiqueta, temp_cond,
+                                     self.codigo_intermedio.constante("0"))
+        else:
+            self.agregar_instruccion(OP_SALTO_SI_FALSO, etiqueta, temp_cond)
+    
     def _generar_Numero(self, nodo):
         """Genera código para literales numéricos"""
-        return nodo.valor
+        return self.codigo_intermedio.constante(nodo.valor)
     
     def _generar_Variable(self, nodo):
         """Genera código para variables"""
-        return nodo.valor
+        return self.codigo_intermedio.nombre(nodo.valor)
     
     def _generar_Booleano(self, nodo):
         """Genera código para booleanos"""
-        return "1" if nodo.valor == "true" else "0"
+        return self.codigo_intermedio.constante("1" if nodo.valor == "true" else "0")
     
     def _generar_Bloque(self, nodo):
         """Genera código para bloques de código"""
         for hijo in nodo.hijos:
-            self._generar_nodo(hijo)
+            yield self._generar_nodo(hijo)
     
     def _generar_If(self, nodo):
         """Genera código para sentencias if"""
@@ -119,44 +217,39 @@ class GeneradorIntermedio:
         bloque_if = nodo.hijos[1]
         bloque_else = nodo.hijos[2] if len(nodo.hijos) > 2 else None
         
-        # Generar código para la condición
-        temp_cond = self._generar_nodo(condicion)
-        
-        # Crear etiquetas
-        etiqueta_else = self.nueva_etiqueta("else")
-        etiqueta_fin = self.nueva_etiqueta("endif")
-        
         # Saltar a else si condición es falsa
-        self.agregar_instruccion(f"if {temp_cond} == 0 goto {etiqueta_else}")
+        etiqueta_else = self.nueva_etiqueta("else")
+        yield self._generar_salto(condicion, False, etiqueta_else)
         
         # Código del bloque if
-        self._generar_nodo(bloque_if)
-        self.agregar_instruccion(f"goto {etiqueta_fin}")
+        yield self._generar_nodo(bloque_if)
         
-        # Etiqueta y código del else (si existe)
-        self.agregar_instruccion(f"{etiqueta_else}:")
+        # Código del else (si existe) y etiqueta de fin del if
         if bloque_else:
-            self._generar_nodo(bloque_else)
-        
-        # Etiqueta de fin del if
-        self.agregar_instruccion(f"{etiqueta_fin}:")
+            etiqueta_fin = self.nueva_etiqueta("endif")
+            self.agregar_instruccion(OP_SALTO, etiqueta_fin)
+            self.agregar_instruccion(OP_ETIQUETA, etiqueta_else)
+            yield self._generar_nodo(bloque_else)
+            self.agregar_instruccion(OP_ETIQUETA, etiqueta_fin)
+        else:
+            self.agregar_instruccion(OP_ETIQUETA, etiqueta_else)
     def _generar_Break(self, nodo):
         """Genera código para break"""
         # Buscar la etiqueta de fin del bucle más interno
         if hasattr(self, 'etiqueta_fin_bucle'):
-            self.agregar_instruccion(f"goto {self.etiqueta_fin_bucle}")
+            self.agregar_instruccion(OP_SALTO, self.etiqueta_fin_bucle)
         else:
             # Si no estamos en un bucle, es un error (pero lo manejamos)
-            self.agregar_instruccion("goto #ERROR_BREAK_FUERA_DE_BUCLE")
+            self.agregar_instruccion(OP_SALTO, self.codigo_intermedio.nombre("#ERROR_BREAK_FUERA_DE_BUCLE"))
 
     def _generar_Continue(self, nodo):
         """Genera código para continue"""
         # Buscar la etiqueta de inicio del bucle más interno
         if hasattr(self, 'etiqueta_inicio_bucle'):
-            self.agregar_instruccion(f"goto {self.etiqueta_inicio_bucle}")
+            self.agregar_instruccion(OP_SALTO, self.etiqueta_inicio_bucle)
         else:
             # Si no estamos en un bucle, es un error (pero lo manejamos)
-            self.agregar_instruccion("goto #ERROR_CONTINUE_FUERA_DE_BUCLE")    
+            self.agregar_instruccion(OP_SALTO, self.codigo_intermedio.nombre("#ERROR_CONTINUE_FUERA_DE_BUCLE"))    
     def _generar_While(self, nodo):
         """Genera código para sentencias while"""
         condicion = nodo.hijos[0]
@@ -173,22 +266,19 @@ class GeneradorIntermedio:
         self.etiqueta_fin_bucle = etiqueta_fin
         
         # Etiqueta de inicio del while
-        self.agregar_instruccion(f"{etiqueta_inicio}:")
-        
-        # Generar código para la condición
-        temp_cond = self._generar_nodo(condicion)
+        self.agregar_instruccion(OP_ETIQUETA, etiqueta_inicio)
         
         # Saltar al final si condición es falsa
-        self.agregar_instruccion(f"if {temp_cond} == 0 goto {etiqueta_fin}")
+        yield self._generar_salto(condicion, False, etiqueta_fin)
         
         # Código del bloque while
-        self._generar_nodo(bloque_while)
+        yield self._generar_nodo(bloque_while)
         
         # Volver al inicio
-        self.agregar_instruccion(f"goto {etiqueta_inicio}")
+        self.agregar_instruccion(OP_SALTO, etiqueta_inicio)
         
         # Etiqueta de fin del while
-        self.agregar_instruccion(f"{etiqueta_fin}:")
+        self.agregar_instruccion(OP_ETIQUETA, etiqueta_fin)
         
         #
         if etiqueta_inicio_anterior is not None:
@@ -211,37 +301,39 @@ class GeneradorIntermedio:
         # Crear etiquetas
         etiqueta_inicio = self.nueva_etiqueta("for")
         etiqueta_fin = self.nueva_etiqueta("endfor")
+        # continue salta al incremento, no a la condición
+        etiqueta_continuar = self.nueva_etiqueta("continuefor") if incremento else etiqueta_inicio
         
         # ✅ GUARDAR ETIQUETAS PARA BREAK/CONTINUE
         etiqueta_inicio_anterior = getattr(self, 'etiqueta_inicio_bucle', None)
         etiqueta_fin_anterior = getattr(self, 'etiqueta_fin_bucle', None)
-        self.etiqueta_inicio_bucle = etiqueta_inicio
+        self.etiqueta_inicio_bucle = etiqueta_continuar
         self.etiqueta_fin_bucle = etiqueta_fin
         
         # Código de inicialización
         if inicializacion:
-            self._generar_nodo(inicializacion)
+            yield self._generar_nodo(inicializacion)
         
         # Etiqueta de inicio del for
-        self.agregar_instruccion(f"{etiqueta_inicio}:")
+        self.agregar_instruccion(OP_ETIQUETA, etiqueta_inicio)
         
         # Código de condición (si existe)
         if condicion:
-            temp_cond = self._generar_nodo(condicion)
-            self.agregar_instruccion(f"if {temp_cond} == 0 goto {etiqueta_fin}")
+            yield self._generar_salto(condicion, False, etiqueta_fin)
         
         # Código del bloque for
-        self._generar_nodo(bloque_for)
+        yield self._generar_nodo(bloque_for)
         
         # Código de incremento (si existe)
         if incremento:
-            self._generar_nodo(incremento)
+            self.agregar_instruccion(OP_ETIQUETA, etiqueta_continuar)
+            yield self._generar_nodo(incremento)
         
         # Volver al inicio para verificar condición
-        self.agregar_instruccion(f"goto {etiqueta_inicio}")
+        self.agregar_instruccion(OP_SALTO, etiqueta_inicio)
         
         # Etiqueta de fin del for
-        self.agregar_instruccion(f"{etiqueta_fin}:")
+        self.agregar_instruccion(OP_ETIQUETA, etiqueta_fin)
         
         # ✅ RESTAURAR ETIQUETAS ANTERIORES
         if etiqueta_inicio_anterior is not None:
@@ -262,15 +354,17 @@ class GeneradorIntermedio:
         # Generar código para los argumentos
         temps_argumentos = []
         for arg in argumentos.hijos:
-            temp_arg = self._generar_nodo(arg)
+            temp_arg = yield self._generar_nodo(arg)
             temps_argumentos.append(temp_arg)
         
         # Crear temporal para el resultado
         temp_resultado = self.nuevo_temporal()
         
         # Generar llamada a función
-        args_str = ", ".join(temps_argumentos)
-        self.agregar_instruccion(f"{temp_resultado} = call {nombre_funcion}, {args_str}")
+        i = self.codigo_intermedio.agregar_llamada(
+            temp_resultado, self.codigo_intermedio.nombre(nombre_funcion), temps_argumentos)
+        if traza.nivel >= DEBUG:
+            traza.emitir("codigo", DEBUG, self.codigo_intermedio.texto(i))
         
         return temp_resultado
     
@@ -278,10 +372,10 @@ class GeneradorIntermedio:
         """Genera código para sentencias return"""
         if nodo.hijos:
             expresion = nodo.hijos[0]
-            temp_valor = self._generar_nodo(expresion)
-            self.agregar_instruccion(f"return {temp_valor}")
+            temp_valor = yield self._generar_nodo(expresion)
+            self.agregar_instruccion(OP_RETORNO, fuente1=temp_valor)
         else:
-            self.agregar_instruccion("return")
+            self.agregar_instruccion(OP_RETORNO)
     
     def imprimir_codigo(self):
         """Imprime el código intermedio generado"""
@@ -289,4 +383,8 @@ class GeneradorIntermedio:
         print("CÓDIGO INTERMEDIO (TAC)")
         print("="*60)
         for i, instruccion in enumerate(self.codigo_intermedio):
-            print(f"{i:3d}: {instruccion}")
\ No newline at end of file
+            print(f"{i:3d}: {instruccion}")
+
+
+# Método _generar_<Clase> de cada código de nodo
+GeneradorIntermedio.DESPACHO = tabla_despacho(GeneradorIntermedio, "_generar_")
@@ -0,0 +1,387 @@
+"""
+Bloques básicos y grafo de flujo de control del código intermedio.
+
+GrafoFlujo divide un tramo de CodigoIntermedio en bloques básicos, resuelve
+una sola vez cada etiqueta a su bloque y calcula predecesores, sucesores,
+dominadores y bucles naturales. Todo en tiempo casi lineal y sin recursión:
+
+- Bloques y aristas: una pasada por las instrucciones.
+- Dominadores: Lengauer-Tarjan (versión simple, con compresión de caminos).
+- Bucles naturales: las cabeceras se procesan de la más interna a la más
+  externa (orden inverso de descubrimiento en profundidad) y cada bucle ya
+  encontrado se colapsa en su cabecera con union-find, así que cada bloque
+  se recorre un número acotado de veces aunque los bucles estén anidados a
+  gran profundidad.
+
+Los bloques se numeran en el orden del código; el bloque 0 es la entrada.
+Un salto a una etiqueta que no está en el tramo (p. ej. las de error de
+break/continue fuera de bucle) se trata como una salida.
+
+El código de un programa se reparte en tramos (tramos_programa()): cada
+función por separado y el código de primer nivel que queda entre ellas, y
+se construye un grafo por tramo.
+"""
+from intermedio import OP_ETIQUETA, OP_RETORNO, OP_SALTO, es_salto_condicional
+from traza import traza, DEBUG
+
+
+class GrafoFlujo:
+    def __init__(self, codigo, inicio=0, fin=None):
+        self.codigo = codigo
+        self.inicio = inicio
+        self.fin = len(codigo) if fin is None else fin
+
+        # Bloque b: instrucciones [inicios[b], fines[b])
+        self.inicios = []
+        self.fines = []
+        self.bloque_de_etiqueta = {}  # operando de etiqueta -> bloque
+        self.sucesores = []
+        self.predecesores = []
+
+        # Dominadores: idom[b] es el dominador inmediato (la entrada se domina
+        # a sí misma) o -1 si b no es alcanzable desde la entrada
+        self.idom = []
+        self.orden = []  # bloques alcanzables en orden inverso de postorden
+        self._entrada_dom = []
+        self._salida_dom = []
+
+        # Bucles naturales: cabecera -> bloques que saltan de vuelta a ella
+        self.bucles = {}
+        self.cabecera_bucle = []  # bucle más interno de cada bloque, o -1
+        self.padre_bucle = {}  # cabecera -> cabecera del bucle que la contiene, o -1
+        self._miembros = {}  # cabecera -> bloques del bucle fuera de sus sub-bucles
+        self._subbucles = {}
+        # Preorden del árbol de bucles: los sub-bucles de h (y h) tienen los
+        # números de entrada_bucle[h] a salida_bucle[h]
+        self.entrada_bucle = {}
+        self.salida_bucle = {}
+
+        self._dividir_bloques()
+        self._enlazar()
+        self._calcular_dominadores()
+        self._calcular_bucles()
+        if traza.nivel >= DEBUG:
+            traza.emitir("flujo", DEBUG, f"{len(self.inicios)} bloques, {len(self.bucles)} bucles")
+
+    def __len__(self):
+        return len(self.inicios)
+
+    # ---- bloques y aristas ----
+
+    def _dividir_bloques(self):
+        """Líderes: la primera instrucción, cada etiqueta y lo que sigue a un salto"""
+        ops = self.codigo.ops
+        destinos = self.codigo.destinos
+        inicios = self.inicios
+        etiquetas = self.bloque_de_etiqueta
+
+        solo_etiquetas = False  # el bloque actual no tiene más que etiquetas
+        for i in range(self.inicio, self.fin):
+            op = ops[i]
+            if op == OP_ETIQUETA:
+                # Varias etiquetas seguidas comparten bloque
+                if not solo_etiquetas:
+                    inicios.append(i)
+                    solo_etiquetas = True
+                etiquetas[destinos[i]] = len(inicios) - 1
+                continue
+            if not inicios or (i > self.inicio and (ops[i - 1] == OP_SALTO or ops[i - 1] == OP_RETORNO
+                                                    or es_salto_condicional(ops[i - 1]))):
+                inicios.append(i)
+            solo_etiquetas = False
+
+        self.fines = inicios[1:] + [self.fin]
+
+    def _enlazar(self):
+        ops = self.codigo.ops
+        destinos = self.codigo.destinos
+        etiquetas = self.bloque_de_etiqueta
+        num_bloques = len(self.inicios)
+        self.sucesores = sucesores = [[] for _ in range(num_bloques)]
+        self.predecesores = predecesores = [[] for _ in range(num_bloques)]
+
+        for b in range(num_bloques):
+            ultima = self.fines[b] - 1
+            op = ops[ultima]
+            if op == OP_SALTO:
+                destino = etiquetas.get(destinos[ultima])
+                if destino is not None:
+                    sucesores[b].append(destino)
+            elif op == OP_RETORNO:
+                pass
+            else:
+                if b + 1 < num_bloques:
+                    sucesores[b].append(b + 1)
+                if es_salto_condicional(op):
+                    destino = etiquetas.get(destinos[ultima])
+                    if destino is not None and destino != b + 1:
+                        sucesores[b].append(destino)
+            for s in sucesores[b]:
+                predecesores[s].append(b)
+
+    def instrucciones(self, b):
+        """Posiciones de las instrucciones del bloque b"""
+        return range(self.inicios[b], self.fines[b])
+
+    # ---- dominadores ----
+
+    def _calcular_dominadores(self):
+        num_bloques = len(self.inicios)
+        self.idom = idom = [-1] * num_bloques
+        if not num_bloques:
+            return
+        sucesores = self.sucesores
+
+        # Recorrido en profundidad desde la entrada: preorden, padres y postorden
+        numero = [-1] * num_bloques
+        vertice = []
+        padre = [-1] * num_bloques
+        postorden = []
+        numero[0] = 0
+        vertice.append(0)
+        pila = [(0, 0)]
+        while pila:
+            b, k = pila[-1]
+            if k < len(sucesores[b]):
+                pila[-1] = (b, k + 1)
+                s = sucesores[b][k]
+                if numero[s] < 0:
+                    numero[s] = len(vertice)
+                    vertice.append(s)
+                    padre[s] = b
+                    pila.append((s, 0))
+            else:
+                pila.pop()
+                postorden.append(b)
+        self.orden = postorden[::-1]
+        self._numero_dfs = numero
+
+        # Lengauer-Tarjan con semidominadores en número de preorden
+        semi = numero[:]
+        etiqueta = list(range(num_bloques))
+        ancestro = [-1] * num_bloques
+        # Cubos como listas enlazadas en dos arrays (sin una lista por bloque)
+        primero_cubo = [-1] * num_bloques
+        siguiente_cubo = [-1] * num_bloques
+
+        def evaluar(v):
+            if ancestro[v] < 0:
+                return v
+            # Compresión del camino hacia la raíz del bosque, sin recursión
+            camino = []
+            x = v
+            while ancestro[ancestro[x]] >= 0:
+                camino.append(x)
+                x = ancestro[x]
+            for x in reversed(camino):
+                a = ancestro[x]
+                if semi[etiqueta[a]] < semi[etiqueta[x]]:
+                    etiqueta[x] = etiqueta[a]
+                ancestro[x] = ancestro[a]
+            return etiqueta[v]
+
+        for i in range(len(vertice) - 1, 0, -1):
+            w = vertice[i]
+            for v in self.predecesores[w]:
+                if numero[v] < 0:
+                    continue  # predecesor inalcanzable
+                u = evaluar(v)
+                if semi[u] < semi[w]:
+                    semi[w] = semi[u]
+            s = vertice[semi[w]]
+            siguiente_cubo[w] = primero_cubo[s]
+            primero_cubo[s] = w
+            p = padre[w]
+            ancestro[w] = p
+            v = primero_cubo[p]
+            while v >= 0:
+                u = evaluar(v)
+                idom[v] = u if semi[u] < semi[v] else p
+                v = siguiente_cubo[v]
+            primero_cubo[p] = -1
+
+        for i in range(1, len(vertice)):
+            w = vertice[i]
+            if idom[w] != vertice[semi[w]]:
+                idom[w] = idom[idom[w]]
+        idom[0] = 0
+
+        # Numeración del árbol de dominadores para responder domina() en O(1)
+        primer_hijo = [-1] * num_bloques
+        hermano = [-1] * num_bloques
+        for w in vertice[1:]:
+            hermano[w] = primer_hijo[idom[w]]
+            primer_hijo[idom[w]] = w
+        self._entrada_dom = entrada = [-1] * num_bloques
+        self._salida_dom = salida = [-1] * num_bloques
+        reloj = 0
+        entrada[0] = 0
+        pila = [0]
+        while pila:
+            b = pila[-1]
+            hijo = primer_hijo[b]
+            if hijo >= 0:
+                primer_hijo[b] = hermano[hijo]  # consumido
+                reloj += 1
+                entrada[hijo] = reloj
+                pila.append(hijo)
+            else:
+                pila.pop()
+                salida[b] = reloj
+
+    def alcanzable(self, b):
+        return self.idom[b] >= 0
+
+    def domina(self, a, b):
+        """True si todo camino desde la entrada hasta b pasa por a"""
+        if self.idom[a] < 0 or self.idom[b] < 0:
+            return False
+        return self._entrada_dom[a] <= self._entrada_dom[b] <= self._salida_dom[a]
+
+    def dominadores(self, b):
+        """Dominadores de b, de b hacia la entrada"""
+        if self.idom[b] < 0:
+            return []
+        cadena = [b]
+        while b != 0:
+            b = self.idom[b]
+            cadena.append(b)
+        return cadena
+
+    def hijos_dominador(self):
+        """Hijos de cada bloque en el árbol de dominadores, en orden inverso de postorden"""
+        hijos = [[] for _ in range(len(self.inicios))]
+        for b in self.orden[1:]:
+            hijos[self.idom[b]].append(b)
+        return hijos
+
+    # ---- bucles naturales ----
+
+    def _calcular_bucles(self):
+        num_bloques = len(self.inicios)
+        self.cabecera_bucle = cabecera_bucle = [-1] * num_bloques
+        predecesores = self.predecesores
+        numero = self._numero_dfs if num_bloques else []
+        alcanzables = sorted((b for b in range(num_bloques) if numero[b] >= 0), key=numero.__getitem__)
+
+        # union-find: cada bucle ya encontrado se representa por su cabecera
+        representante = list(range(num_bloques))
+
+        def buscar(b):
+            raiz = b
+            while representante[raiz] != raiz:
+                raiz = representante[raiz]
+            while representante[b] != raiz:
+                representante[b], b = raiz, representante[b]
+            return raiz
+
+        marca = [-1] * num_bloques
+        for h in reversed(alcanzables):
+            retrocesos = [p for p in predecesores[h] if self.domina(h, p)]
+            if not retrocesos:
+                continue
+            self.bucles[h] = retrocesos
+            self.padre_bucle[h] = -1
+            miembros = [h]
+            subbucles = []
+            marca[h] = h
+
+            pendientes = []
+            for p in retrocesos:
+                r = buscar(p)
+                if marca[r] != h:
+                    marca[r] = h
+                    pendientes.append(r)
+            while pendientes:
+                y = pendientes.pop()
+                if y in self.bucles:
+                    subbucles.append(y)
+                    self.padre_bucle[y] = h
+                else:
+                    miembros.append(y)
+                representante[y] = h
+                for z in predecesores[y]:
+                    if numero[z] < 0:
+                        continue
+                    r = buscar(z)
+                    if marca[r] != h and self.domina(h, r):
+                        marca[r] = h
+                        pendientes.append(r)
+
+            for b in miembros:
+                cabecera_bucle[b] = h
+            self._miembros[h] = miembros
+            self._subbucles[h] = subbucles
+
+        # Numeración del árbol de bucles para responder en_bucle() en O(1)
+        reloj = 0
+        pila = [(h, False) for h, padre in self.padre_bucle.items() if padre < 0]
+        while pila:
+            h, cerrado = pila.pop()
+            if cerrado:
+                self.salida_bucle[h] = reloj - 1
+                continue
+            self.entrada_bucle[h] = reloj
+            reloj += 1
+            pila.append((h, True))
+            pila.extend((s, False) for s in self._subbucles[h])
+
+    def bloques_bucle(self, h):
+        """Todos los bloques del bucle natural con cabecera h (incluidos sub-bucles)"""
+        bloques = []
+        pendientes = [h]
+        while pendientes:
+            c = pendientes.pop()
+            bloques.extend(self._miembros[c])
+            pendientes.extend(self._subbucles[c])
+        return bloques
+
+    def en_bucle(self, b, h):
+        """True si el bloque b está en el bucle con cabecera h (incluidos sub-bucles)"""
+        c = self.cabecera_bucle[b]
+        return c >= 0 and self.entrada_bucle[h] <= self.entrada_bucle[c] <= self.salida_bucle[h]
+
+    def profundidad_bucle(self, b):
+        """Número de bucles que contienen al bloque b"""
+        profundidad = 0
+        h = self.cabecera_bucle[b]
+        while h >= 0:
+            profundidad += 1
+            h = self.padre_bucle[h]
+        return profundidad
+
+    def imprimir_grafo(self):
+        """Imprime los bloques con sus instrucciones y aristas"""
+        print("\n" + "=" * 60)
+        print("GRAFO DE FLUJO")
+        print("=" * 60)
+        for b in range(len(self.inicios)):
+            cabecera = f"B{b}"
+            if b in self.bucles:
+                cabecera += " (cabecera de bucle)"
+            print(f"{cabecera}  pred: {self.predecesores[b]}  suc: {self.sucesores[b]}  idom: {self.idom[b]}")
+            for i in self.instrucciones(b):
+                print(f"   {i:3d}: {self.codigo.texto(i)}")
+
+
+def tramos_programa(codigo):
+    """
+    (nombre, inicio, fin) de cada tramo del programa en orden: las funciones
+    con su nombre y el código de primer nivel entre ellas con nombre None
+    """
+    tramos = []
+    posicion = 0
+    for nombre, inicio, fin in sorted(codigo.funciones, key=lambda funcion: funcion[1]):
+        if inicio > posicion:
+            tramos.append((None, posicion, inicio))
+        tramos.append((nombre, inicio, fin))
+        posicion = fin
+    if posicion < len(codigo):
+        tramos.append((None, posicion, len(codigo)))
+    return tramos
+
+
+def grafos_programa(codigo):
+    """(nombre, GrafoFlujo) de cada tramo no vacío del programa"""
+    return [(nombre, GrafoFlujo(codigo, inicio, fin))
+            for nombre, inicio, fin in tramos_programa(codigo) if fin > inicio]
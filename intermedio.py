@@ -0,0 +1,389 @@
+"""
+Representación intermedia en cuádruplas.
+
+Cada instrucción es una cuádrupla (operación, destino, fuente1, fuente2)
+guardada en columnas, como TokenBuffer guarda los tokens: la operación es
+un código entero pequeño y los operandos son enteros que codifican su clase
+en los dos bits bajos:
+
+    NOMBRE      variable, función o etiqueta de error (índice en 'nombres')
+    TEMPORAL    temporal tN (el índice es N)
+    CONSTANTE   literal (índice en el pool 'constantes')
+    ETIQUETA    etiqueta LN del generador (el índice es N; el prefijo se
+                guarda aparte en 'prefijos')
+
+Los nombres y las constantes se internan: cada texto distinto se guarda una
+vez por programa. El texto TAC de siempre ("t3 = a + b", "if t1 == 0 goto
+L2", ...) solo se construye al pedirlo (texto(), iteración). 'funciones'
+guarda el tramo de instrucciones de cada función del programa; 'tipos' y
+'globales', el tipo declarado de cada variable y las que son globales, para
+los pases de optimización.
+
+Disposición de los operandos por operación (las etiquetas van en el destino,
+como en las cuádruplas clásicas):
+
+    COPIA           destino = fuente1
+    SUMA, ...       destino = fuente1 <op> fuente2
+    ETIQUETA        destino:
+    SALTO           goto destino
+    SALTO_SI_FALSO  if fuente1 == 0 goto destino
+    SALTO_SI_MENOR, ...
+                    if fuente1 <op> fuente2 goto destino
+    LLAMADA         destino = call fuente1, argumentos[fuente2]...
+    RETORNO         return [fuente1]
+"""
+from array import array
+
+# Operaciones binarias con el nombre del token del operador y su símbolo TAC
+SIMBOLOS_OPERACION = {
+    "SUMA": "+",
+    "RESTA": "-",
+    "MULTIPLICACION": "*",
+    "DIVISION": "/",
+    "MODULO": "%",
+    "AND_LOGICO": "&&",
+    "OR_LOGICO": "||",
+    "IGUAL_IGUAL": "==",
+    "DIFERENTE": "!=",
+    "MENOR_QUE": "<",
+    "MAYOR_QUE": ">",
+    "MENOR_IGUAL": "<=",
+    "MAYOR_IGUAL": ">=",
+}
+
+# Saltos que comparan sus dos fuentes, con la comparación que evalúan
+SALTOS_COMPARACION = {
+    "SALTO_SI_IGUAL": "IGUAL_IGUAL",
+    "SALTO_SI_DIFERENTE": "DIFERENTE",
+    "SALTO_SI_MENOR": "MENOR_QUE",
+    "SALTO_SI_MAYOR": "MAYOR_QUE",
+    "SALTO_SI_MENOR_IGUAL": "MENOR_IGUAL",
+    "SALTO_SI_MAYOR_IGUAL": "MAYOR_IGUAL",
+}
+
+# Códigos de operación: el índice en esta tupla
+OPERACIONES = ("COPIA",) + tuple(SIMBOLOS_OPERACION) + (
+    "ETIQUETA", "SALTO", "SALTO_SI_FALSO", "LLAMADA", "RETORNO",
+) + tuple(SALTOS_COMPARACION)
+CODIGO_OPERACION = {nombre: i for i, nombre in enumerate(OPERACIONES)}
+
+# Código de operación de un BinOp, por su símbolo ("+") o su nombre de token
+OPERACION_BINARIA = {clave: CODIGO_OPERACION[nombre]
+                     for nombre, simbolo in SIMBOLOS_OPERACION.items()
+                     for clave in (nombre, simbolo)}
+
+OP_COPIA = CODIGO_OPERACION["COPIA"]
+OP_ETIQUETA = CODIGO_OPERACION["ETIQUETA"]
+OP_SALTO = CODIGO_OPERACION["SALTO"]
+OP_SALTO_SI_FALSO = CODIGO_OPERACION["SALTO_SI_FALSO"]
+OP_LLAMADA = CODIGO_OPERACION["LLAMADA"]
+OP_RETORNO = CODIGO_OPERACION["RETORNO"]
+
+# Operaciones binarias: de OP_PRIMERA_BINARIA a OP_ULTIMA_BINARIA
+OP_PRIMERA_BINARIA = OP_COPIA + 1
+OP_ULTIMA_BINARIA = OP_ETIQUETA - 1
+
+# Saltos con comparación: de OP_PRIMER_SALTO_COMPARACION a OP_ULTIMO_SALTO_COMPARACION
+OP_PRIMER_SALTO_COMPARACION = CODIGO_OPERACION["SALTO_SI_IGUAL"]
+OP_ULTIMO_SALTO_COMPARACION = len(OPERACIONES) - 1
+
+# Código de la comparación de cada salto, el salto de cada comparación y la
+# comparación contraria de cada una (cierta justo cuando la otra es falsa)
+COMPARACION_DE_SALTO = {CODIGO_OPERACION[salto]: CODIGO_OPERACION[comparacion]
+                        for salto, comparacion in SALTOS_COMPARACION.items()}
+SALTO_DE_COMPARACION = {comparacion: salto for salto, comparacion in COMPARACION_DE_SALTO.items()}
+COMPARACION_CONTRARIA = {CODIGO_OPERACION[a]: CODIGO_OPERACION[b] for a, b in (
+    ("IGUAL_IGUAL", "DIFERENTE"), ("DIFERENTE", "IGUAL_IGUAL"),
+    ("MENOR_QUE", "MAYOR_IGUAL"), ("MAYOR_IGUAL", "MENOR_QUE"),
+    ("MAYOR_QUE", "MENOR_IGUAL"), ("MENOR_IGUAL", "MAYOR_QUE"),
+)}
+
+_DIVISIONES = (CODIGO_OPERACION["DIVISION"], CODIGO_OPERACION["MODULO"])
+
+# Clase de un operando (dos bits bajos)
+NOMBRE = 0
+TEMPORAL = 1
+CONSTANTE = 2
+ETIQUETA = 3
+
+SIN_OPERANDO = -1
+
+
+def temporal(numero):
+    """Operando del temporal t<numero>"""
+    return numero << 2 | TEMPORAL
+
+
+def clase_operando(operando):
+    return operando & 3
+
+
+def es_binaria(op):
+    return OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA
+
+
+def es_salto_comparacion(op):
+    return OP_PRIMER_SALTO_COMPARACION <= op <= OP_ULTIMO_SALTO_COMPARACION
+
+
+def es_salto_condicional(op):
+    return op == OP_SALTO_SI_FALSO or OP_PRIMER_SALTO_COMPARACION <= op <= OP_ULTIMO_SALTO_COMPARACION
+
+
+def lee_dos_fuentes(op):
+    """True si la operación lee fuente1 y fuente2 (binarias y saltos con comparación)"""
+    return OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA or OP_PRIMER_SALTO_COMPARACION <= op
+
+
+class CodigoIntermedio:
+    """Lista de cuádruplas en columnas, con pools de nombres y constantes"""
+
+    def __init__(self):
+        self.ops = array('B')
+        self.destinos = array('q')
+        self.fuentes1 = array('q')
+        self.fuentes2 = array('q')
+        self.nombres = []
+        self.constantes = []  # texto del literal
+        self.prefijos = {}  # número de etiqueta -> prefijo
+        self.argumentos = []  # tupla de operandos de cada LLAMADA
+        self.funciones = []  # (nombre, inicio, fin) del código de cada función
+        self.parametros = {}  # función -> operandos de sus parámetros, en orden
+        self.tipos = {}  # variable -> tipo declarado (None si se declara con tipos distintos)
+        self.globales = set()  # variables asignadas en el código de primer nivel
+        self._indice_nombre = {}
+        self._indice_constante = {}
+
+    # ---- operandos ----
+
+    def nombre(self, texto):
+        """Operando de la variable o función 'texto', internado"""
+        indice = self._indice_nombre.get(texto)
+        if indice is None:
+            indice = self._indice_nombre[texto] = len(self.nombres)
+            self.nombres.append(texto)
+        return indice << 2 | NOMBRE
+
+    def constante(self, texto):
+        """Operando del literal 'texto' (p. ej. "3" o "2.5"), internado"""
+        indice = self._indice_constante.get(texto)
+        if indice is None:
+            indice = self._indice_constante[texto] = len(self.constantes)
+            self.constantes.append(texto)
+        return indice << 2 | CONSTANTE
+
+    def etiqueta(self, numero, prefijo="L"):
+        """Operando de la etiqueta <prefijo><numero>"""
+        self.prefijos[numero] = prefijo
+        return numero << 2 | ETIQUETA
+
+    def valor_constante(self, operando):
+        """Valor numérico (int o float) de un operando CONSTANTE"""
+        texto = self.constantes[operando >> 2]
+        return float(texto) if "." in texto or "e" in texto else int(texto)
+
+    def constante_de_valor(self, valor):
+        """Operando CONSTANTE con el valor 'valor' (int o float)"""
+        return self.constante(repr(valor))
+
+    def declarar(self, nombre, tipo):
+        """Registra el tipo declarado de una variable"""
+        if self.tipos.setdefault(nombre, tipo) != tipo:
+            self.tipos[nombre] = None
+
+    def texto_operando(self, operando):
+        clase = operando & 3
+        indice = operando >> 2
+        if clase == TEMPORAL:
+            return f"t{indice}"
+        if clase == NOMBRE:
+            return self.nombres[indice]
+        if clase == CONSTANTE:
+            return self.constantes[indice]
+        return f"{self.prefijos[indice]}{indice}"
+
+    # ---- instrucciones ----
+
+    def agregar(self, op, destino=SIN_OPERANDO, fuente1=SIN_OPERANDO, fuente2=SIN_OPERANDO):
+        """Añade una cuádrupla y devuelve su posición"""
+        self.ops.append(op)
+        self.destinos.append(destino)
+        self.fuentes1.append(fuente1)
+        self.fuentes2.append(fuente2)
+        return len(self.ops) - 1
+
+    def agregar_llamada(self, destino, funcion, argumentos):
+        self.argumentos.append(tuple(argumentos))
+        return self.agregar(OP_LLAMADA, destino, funcion, len(self.argumentos) - 1)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def cuadrupla(self, i):
+        """(op, destino, fuente1, fuente2) de la instrucción i"""
+        return self.ops[i], self.destinos[i], self.fuentes1[i], self.fuentes2[i]
+
+    def texto(self, i):
+        """Instrucción i en el formato TAC textual"""
+        op = self.ops[i]
+        operando = self.texto_operando
+        if OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA:
+            return (f"{operando(self.destinos[i])} = {operando(self.fuentes1[i])} "
+                    f"{SIMBOLOS_OPERACION[OPERACIONES[op]]} {operando(self.fuentes2[i])}")
+        if op == OP_COPIA:
+            return f"{operando(self.destinos[i])} = {operando(self.fuentes1[i])}"
+        if op == OP_ETIQUETA:
+            return f"{operando(self.destinos[i])}:"
+        if op == OP_SALTO:
+            return f"goto {operando(self.destinos[i])}"
+        if op == OP_SALTO_SI_FALSO:
+            return f"if {operando(self.fuentes1[i])} == 0 goto {operando(self.destinos[i])}"
+        if op >= OP_PRIMER_SALTO_COMPARACION:
+            simbolo = SIMBOLOS_OPERACION[OPERACIONES[COMPARACION_DE_SALTO[op]]]
+            return (f"if {operando(self.fuentes1[i])} {simbolo} {operando(self.fuentes2[i])} "
+                    f"goto {operando(self.destinos[i])}")
+        if op == OP_LLAMADA:
+            argumentos = ", ".join(operando(a) for a in self.argumentos[self.fuentes2[i]])
+            return f"{operando(self.destinos[i])} = call {operando(self.fuentes1[i])}, {argumentos}"
+        if self.fuentes1[i] == SIN_OPERANDO:
+            return "return"
+        return f"return {operando(self.fuentes1[i])}"
+
+    def lecturas(self, i):
+        """Operandos que lee la instrucción i (sin las etiquetas ni la función llamada)"""
+        op = self.ops[i]
+        if lee_dos_fuentes(op):
+            return self.fuentes1[i], self.fuentes2[i]
+        if op == OP_COPIA or op == OP_SALTO_SI_FALSO or op == OP_RETORNO:
+            return () if self.fuentes1[i] == SIN_OPERANDO else (self.fuentes1[i],)
+        if op == OP_LLAMADA:
+            return self.argumentos[self.fuentes2[i]]
+        return ()
+
+    def escritura(self, i):
+        """Operando que escribe la instrucción i, o SIN_OPERANDO"""
+        op = self.ops[i]
+        if op == OP_COPIA or op == OP_LLAMADA or OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA:
+            return self.destinos[i]
+        return SIN_OPERANDO
+
+    def sin_efectos(self, i):
+        """
+        True si la instrucción i solo escribe su destino y no puede fallar:
+        copias y operaciones, salvo divisiones y módulos cuyo divisor no es
+        una constante distinta de cero
+        """
+        op = self.ops[i]
+        if op == OP_COPIA:
+            return True
+        if not OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA:
+            return False
+        if op in _DIVISIONES:
+            divisor = self.fuentes2[i]
+            return divisor & 3 == CONSTANTE and self.valor_constante(divisor) != 0
+        return True
+
+    def __iter__(self):
+        for i in range(len(self.ops)):
+            yield self.texto(i)
+
+    def lineas(self):
+        """Todo el código como lista de líneas TAC"""
+        return list(self)
+
+    def temporales(self, inicio=0, fin=None):
+        """Temporales distintos que se escriben entre las instrucciones inicio y fin"""
+        destinos = self.destinos[inicio:len(self.ops) if fin is None else fin]
+        return {d for d in destinos if d != SIN_OPERANDO and d & 3 == TEMPORAL}
+
+    def anexar(self, otro, base_temporales=0, base_etiquetas=0):
+        """
+        Añade al final el código de 'otro', generado por separado: sus
+        temporales y etiquetas se numeran a partir de base_temporales y
+        base_etiquetas, y sus nombres y constantes pasan a los pools propios.
+        """
+        nombres = [self.nombre(texto) >> 2 for texto in otro.nombres]
+        constantes = [self.constante(texto) >> 2 for texto in otro.constantes]
+        for numero, prefijo in otro.prefijos.items():
+            self.prefijos[numero + base_etiquetas] = prefijo
+
+        def traducir(operando):
+            if operando == SIN_OPERANDO:
+                return operando
+            clase = operando & 3
+            indice = operando >> 2
+            if clase == TEMPORAL:
+                indice += base_temporales
+            elif clase == NOMBRE:
+                indice = nombres[indice]
+            elif clase == CONSTANTE:
+                indice = constantes[indice]
+            else:
+                indice += base_etiquetas
+            return indice << 2 | clase
+
+        for nombre, tipo in otro.tipos.items():
+            if tipo is None:
+                self.tipos[nombre] = None
+            else:
+                self.declarar(nombre, tipo)
+        self.globales.update(otro.globales)
+
+        for funcion, parametros in otro.parametros.items():
+            self.parametros[funcion] = tuple(traducir(p) for p in parametros)
+
+        base = len(self.ops)
+        self.funciones.extend((nombre, inicio + base, fin + base) for nombre, inicio, fin in otro.funciones)
+        base_argumentos = len(self.argumentos)
+        self.argumentos.extend(tuple(traducir(a) for a in argumentos) for argumentos in otro.argumentos)
+        self.ops.extend(otro.ops)
+        self.destinos.extend(traducir(d) for d in otro.destinos)
+        self.fuentes1.extend(traducir(f) for f in otro.fuentes1)
+        for op, fuente in zip(otro.ops, otro.fuentes2):
+            self.fuentes2.append(fuente + base_argumentos if op == OP_LLAMADA else traducir(fuente))
+
+    def insertar(self, insertadas):
+        """
+        Inserta las cuádruplas (op, destino, fuente1, fuente2) de
+        insertadas[i] delante de la instrucción i (al final si i == len).
+        Una llamada insertada debe traer en fuente2 su propia entrada de
+        argumentos. Lo insertado delante de la primera instrucción de
+        una función queda fuera de ella y lo insertado delante de la que la
+        sigue, dentro. Devuelve la nueva posición de cada instrucción.
+        """
+        nuevas = []
+        desplazamiento = 0
+        for i in range(len(self.ops) + 1):
+            desplazamiento += len(insertadas.get(i, ()))
+            nuevas.append(i + desplazamiento)
+        if not desplazamiento:
+            return nuevas
+
+        for k, columna in enumerate((self.ops, self.destinos, self.fuentes1, self.fuentes2)):
+            resultado = array(columna.typecode)
+            anterior = 0
+            for posicion in sorted(insertadas):
+                resultado.extend(columna[anterior:posicion])
+                resultado.extend(cuadrupla[k] for cuadrupla in insertadas[posicion])
+                anterior = posicion
+            resultado.extend(columna[anterior:])
+            columna[:] = resultado
+        self.funciones = [(nombre, nuevas[inicio], nuevas[fin]) for nombre, inicio, fin in self.funciones]
+        return nuevas
+
+    def eliminar(self, posiciones):
+        """Quita las instrucciones de 'posiciones' y ajusta los tramos de las funciones"""
+        if not posiciones:
+            return
+        # nuevas[i]: posición que tendrá la instrucción i (o la siguiente conservada)
+        nuevas = []
+        conservadas = 0
+        for i in range(len(self.ops)):
+            nuevas.append(conservadas)
+            if i not in posiciones:
+                conservadas += 1
+        nuevas.append(conservadas)
+
+        for columna in (self.ops, self.destinos, self.fuentes1, self.fuentes2):
+            columna[:] = array(columna.typecode, (x for i, x in enumerate(columna) if i not in posiciones))
+        self.funciones = [(nombre, nuevas[inicio], nuevas[fin]) for nombre, inicio, fin in self.funciones]
@@ -1,5 +1,122 @@
+import os
 import re
-def tokenizar(codigo):
+from array import array
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from traza import traza, INFO
+
+# Tipos de token en el orden en que aparecen en la alternancia de tokenizar().
+# El índice de cada tipo es el código compacto que guarda TokenBuffer.
+TIPOS_TOKEN = (
+    "CABECERA", "PALABRA_RESERVADA", "IF", "WHILE", "FOR", "ELSE", "RETURN",
+    "BREAK", "CONTINUE", "TRUE", "FALSE", "MODULO", "COMA", "TIPO_DATO",
+    "CONST_PI", "STRING", "CHAR_LITERAL", "NUMERO", "VARIABLE",
+    "AND_LOGICO", "OR_LOGICO", "MENOR_IGUAL", "MAYOR_IGUAL", "IGUAL_IGUAL",
+    "DIFERENTE", "OPERADOR_DESPLAZAMIENTO", "SUMA", "RESTA", "MULTIPLICACION",
+    "DIVISION", "ASIGNACION", "MENOR_QUE", "MAYOR_QUE", "PUNTO_COMA",
+    "PARENTESIS_APERTURA", "PARENTESIS_CIERRE", "LLAVE_APERTURA", "LLAVE_CIERRE",
+)
+CODIGO_TIPO = {tipo: i for i, tipo in enumerate(TIPOS_TOKEN)}
+
+
+class TokenBuffer:
+    """
+    Almacén columnar de tokens.
+
+    En lugar de una tupla (num_linea, columna, tipo, valor, linea) por token,
+    guarda el tipo como entero pequeño y los desplazamientos de inicio/fin
+    dentro del código fuente original. La línea, la columna y el lexema se
+    calculan solo cuando se piden.
+    """
+
+    def __init__(self, codigo):
+        self.codigo = codigo
+        self.tipos = array('B')
+        self.inicios = array('q')
+        self.fines = array('q')
+        # Índice de líneas: desplazamiento de inicio y fin (sin salto) de cada línea
+        self.inicios_linea = array('q')
+        self.fines_linea = array('q')
+
+    def agregar_linea(self, inicio, fin):
+        self.inicios_linea.append(inicio)
+        self.fines_linea.append(fin)
+
+    def agregar(self, tipo, inicio, fin):
+        self.tipos.append(CODIGO_TIPO[tipo])
+        self.inicios.append(inicio)
+        self.fines.append(fin)
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def tipo(self, i):
+        return TIPOS_TOKEN[self.tipos[i]]
+
+    def valor(self, i):
+        return self.codigo[self.inicios[i]:self.fines[i]]
+
+    def num_linea(self, i):
+        """Número de línea (1-based) del token i"""
+        return bisect_right(self.inicios_linea, self.inicios[i])
+
+    def columna(self, i):
+        """Columna (1-based) del token i"""
+        return self.inicios[i] - self.inicios_linea[self.num_linea(i) - 1] + 1
+
+    def texto_linea(self, num_linea):
+        return self.codigo[self.inicios_linea[num_linea - 1]:self.fines_linea[num_linea - 1]]
+
+    def ubicacion(self, i):
+        """Devuelve (num_linea, columna, valor, linea_original) del token i"""
+        num_linea = self.num_linea(i)
+        inicio_linea = self.inicios_linea[num_linea - 1]
+        return (num_linea, self.inicios[i] - inicio_linea + 1, self.valor(i),
+                self.codigo[inicio_linea:self.fines_linea[num_linea - 1]])
+
+    def buscar_tipo(self, tipo, desde=0):
+        """Índice del primer token de ese tipo a partir de 'desde', o None"""
+        try:
+            return self.tipos.index(CODIGO_TIPO[tipo], desde)
+        except ValueError:
+            return None
+
+    def __getitem__(self, i):
+        """Compatibilidad: reconstruye la tupla (num_linea, columna, tipo, valor, linea)"""
+        if i < 0:
+            i += len(self.tipos)
+        num_linea, columna, valor, linea = self.ubicacion(i)
+        return (num_linea, columna, TIPOS_TOKEN[self.tipos[i]], valor, linea)
+
+    def __iter__(self):
+        for i in range(len(self.tipos)):
+            yield self[i]
+
+    def vista_parser(self):
+        """Secuencia (tipo, valor) terminada en EOF, sin materializar tuplas"""
+        return _VistaParser(self)
+
+
+class _VistaParser:
+    """Vista (tipo, valor) sobre un TokenBuffer con un token EOF final"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.buffer) + 1
+
+    def __getitem__(self, i):
+        if i == len(self.buffer):
+            return ("EOF", "EOF")
+        return (self.buffer.tipo(i), self.buffer.valor(i))
+
+
+@lru_cache(maxsize=None)
+def construir_patron():
     CABECERA = r"(?P<CABECERA>\#include\s*<(\w+\.h|\w+)>)"
     PALABRA_RESERVADAS = r"(?P<PALABRA_RESERVADA>\b(endl|cout|nullptr|switch|case|default|using namespace std)\b)"
     VARIABLES = r"(?P<VARIABLE>[a-zA-Z][a-zA-Z_0-9]*)"
@@ -52,29 +169,440 @@ def tokenizar(codigo):
         PARENTESIS_APERTURA,PARENTESIS_CIERRE,LLAVE_APERTURA,LLAVE_CIERRE
     ])
 
-    patron = re.compile(TOKENS)
-    contador_tokens = {}
+    return re.compile(TOKENS)
+
+
+# ======== ESCÁNER MANUAL ========
+# Backend alternativo a la alternancia de construir_patron(): despacha por el
+# primer carácter, escanea el identificador completo y resuelve palabras
+# clave y tipos con una sola búsqueda en diccionario. Produce exactamente el
+# mismo flujo de tokens que el patrón (incluidas las fronteras \b).
+
+_PALABRAS_CLAVE = {
+    "endl": "PALABRA_RESERVADA", "cout": "PALABRA_RESERVADA",
+    "nullptr": "PALABRA_RESERVADA", "switch": "PALABRA_RESERVADA",
+    "case": "PALABRA_RESERVADA", "default": "PALABRA_RESERVADA",
+    "if": "IF", "while": "WHILE", "for": "FOR", "else": "ELSE",
+    "return": "RETURN", "break": "BREAK", "continue": "CONTINUE",
+    "true": "TRUE", "false": "FALSE",
+    "int": "TIPO_DATO", "float": "TIPO_DATO", "char": "TIPO_DATO",
+    "void": "TIPO_DATO", "string": "TIPO_DATO", "bool": "TIPO_DATO",
+    "pi": "CONST_PI",
+}
+_USING = "using namespace std"
+
+_OPERADORES_DOBLES = {
+    "&&": "AND_LOGICO", "||": "OR_LOGICO", "<=": "MENOR_IGUAL",
+    ">=": "MAYOR_IGUAL", "==": "IGUAL_IGUAL", "!=": "DIFERENTE",
+    "<<": "OPERADOR_DESPLAZAMIENTO", ">>": "OPERADOR_DESPLAZAMIENTO",
+}
+_OPERADORES_SIMPLES = {
+    "%": "MODULO", ",": "COMA", "+": "SUMA", "-": "RESTA",
+    "*": "MULTIPLICACION", "/": "DIVISION", "=": "ASIGNACION",
+    "<": "MENOR_QUE", ">": "MAYOR_QUE", ";": "PUNTO_COMA",
+    "(": "PARENTESIS_APERTURA", ")": "PARENTESIS_CIERRE",
+    "{": "LLAVE_APERTURA", "}": "LLAVE_CIERRE",
+}
+
+_IDENTIFICADOR = re.compile(r"[a-zA-Z][a-zA-Z_0-9]*")
+_NUMERO = re.compile(r"\d+(\.\d+)?")
+_CABECERA = re.compile(r"\#include\s*<(\w+\.h|\w+)>")
+_STRING = re.compile(r'"[^"]*"')
+_CHAR_LITERAL = re.compile(r"'(\\.|[^\\'])'")
+_BLANCOS = re.compile(r"[ \t]+")
+
+# Clase de cada carácter ASCII que puede iniciar un token
+_IDENT, _DIGITO, _OPERADOR, _CABECERA_INI, _STRING_INI, _CHAR_INI, _BLANCO = range(7)
+_DESPACHO = {}
+for _c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ":
+    _DESPACHO[_c] = _IDENT
+for _c in "0123456789":
+    _DESPACHO[_c] = _DIGITO
+for _c in "&|<>=!%,+-*/;(){}":
+    _DESPACHO[_c] = _OPERADOR
+_DESPACHO.update({"#": _CABECERA_INI, '"': _STRING_INI, "'": _CHAR_INI, " ": _BLANCO, "\t": _BLANCO})
+
+_DELIMITADOS = {
+    _CABECERA_INI: (_CABECERA, "CABECERA"),
+    _STRING_INI: (_STRING, "STRING"),
+    _CHAR_INI: (_CHAR_LITERAL, "CHAR_LITERAL"),
+}
+
+
+def _es_palabra(c):
+    """Equivalente a \\w de re para un carácter"""
+    return c == "_" or c.isalnum()
+
+
+def escanear_linea(linea):
+    """Devuelve la lista de (tipo, inicio, fin) de una línea"""
     tokens = []
+    agregar = tokens.append
+    i = 0
+    n = len(linea)
+    while i < n:
+        c = linea[i]
+        clase = _DESPACHO.get(c)
+        if clase is None:
+            if c.isdecimal():
+                clase = _DIGITO
+            else:
+                i += 1
+                continue
+
+        if clase == _IDENT:
+            fin = _IDENTIFICADOR.match(linea, i).end()
+            tipo = "VARIABLE"
+            # Las palabras clave exigen frontera \b a ambos lados
+            if i == 0 or not _es_palabra(linea[i - 1]):
+                if fin == n or not _es_palabra(linea[fin]):
+                    tipo = _PALABRAS_CLAVE.get(linea[i:fin], "VARIABLE")
+                if (tipo == "VARIABLE" and linea.startswith(_USING, i)
+                        and (i + len(_USING) == n or not _es_palabra(linea[i + len(_USING)]))):
+                    tipo, fin = "PALABRA_RESERVADA", i + len(_USING)
+            agregar((tipo, i, fin))
+            i = fin
+        elif clase == _OPERADOR:
+            tipo = _OPERADORES_DOBLES.get(linea[i:i + 2])
+            if tipo is not None:
+                agregar((tipo, i, i + 2))
+                i += 2
+            else:
+                tipo = _OPERADORES_SIMPLES.get(c)
+                if tipo is not None:
+                    agregar((tipo, i, i + 1))
+                i += 1
+        elif clase == _BLANCO:
+            i = _BLANCOS.match(linea, i).end()
+        elif clase == _DIGITO:
+            fin = _NUMERO.match(linea, i).end()
+            agregar(("NUMERO", i, fin))
+            i = fin
+        else:
+            patron, tipo = _DELIMITADOS[clase]
+            match = patron.match(linea, i)
+            if match:
+                agregar((tipo, i, match.end()))
+                i = match.end()
+            else:
+                i += 1
+    return tokens
+
+
+def _error_basura(num_linea, columna, basura):
+    return f"Caracteres no reconocidos en línea {num_linea}, col {columna}: '{basura}'"
+
+
+def tokenizar(codigo, backend="regex", primera_linea=1):
+    """
+    Tokeniza 'codigo' completo. backend="regex" usa la alternancia de
+    construir_patron(); backend="escaner" usa escanear_linea(), que produce
+    el mismo flujo de tokens. primera_linea solo cambia la numeración de los
+    mensajes de error (la usa tokenizar_paralelo para cada trozo).
+    """
+    if backend not in ("regex", "escaner"):
+        raise ValueError(f"Backend léxico desconocido: {backend}")
+    patron = construir_patron()
+    contador_tokens = {}
+    tokens = TokenBuffer(codigo)
     errores = []
-    pos_consumido = 0
-    lineas = codigo.splitlines()
+    inicio_linea = 0
 
     # Recorremos línea por línea para obtener posición y contenido
-    for num_linea, linea in enumerate(lineas, start=1):
+    for num_linea, linea_con_fin in enumerate(codigo.splitlines(keepends=True), start=primera_linea):
+        linea = linea_con_fin.splitlines()[0]
+        tokens.agregar_linea(inicio_linea, inicio_linea + len(linea))
         last_end = 0
-        for match in patron.finditer(linea):
-            tipo = match.lastgroup
-            valor = match.group()
-            if tipo != "ESPACIO":  # ignoramos espacios
-                columna = match.start() + 1  # columna 1-based
-                tokens.append((num_linea, columna, tipo, valor, linea))
+        if backend == "escaner":
+            for tipo, inicio, fin in escanear_linea(linea):
+                tokens.agregar(tipo, inicio_linea + inicio, inicio_linea + fin)
                 contador_tokens[tipo] = contador_tokens.get(tipo, 0) + 1
-            last_end = match.end()
+                last_end = fin
+        else:
+            for match in patron.finditer(linea):
+                tipo = match.lastgroup
+                if tipo != "ESPACIO":  # ignoramos espacios
+                    tokens.agregar(tipo, inicio_linea + match.start(), inicio_linea + match.end())
+                    contador_tokens[tipo] = contador_tokens.get(tipo, 0) + 1
+                last_end = match.end()
 
         # Verificar basura no reconocida en la línea
         if last_end < len(linea):
             basura = linea[last_end:]
             if basura.strip():
-                errores.append(f"Caracteres no reconocidos en línea {num_linea}, col {last_end+1}: '{basura}'")
+                errores.append(_error_basura(num_linea, last_end + 1, basura))
+        inicio_linea += len(linea_con_fin)
 
+    if traza.nivel >= INFO:
+        traza.emitir("lexico", INFO, f"{len(tokens)} tokens, {len(errores)} error(es) ({backend})")
     return tokens,contador_tokens, errores
+
+
+# Por debajo de este tamaño (en caracteres) no compensa arrancar procesos
+UMBRAL_PARALELO = 1 << 20
+
+
+def _tokenizar_trozo(args):
+    """
+    Trabajo de un proceso: tokeniza un trozo y devuelve sus arrays crudos con
+    las posiciones ya desplazadas al código completo.
+    """
+    trozo, desplazamiento, primera_linea, backend = args
+    tokens, contador_tokens, errores = tokenizar(trozo, backend, primera_linea)
+
+    def desplazar(valores):
+        return array('q', [x + desplazamiento for x in valores])
+
+    return (tokens.tipos, desplazar(tokens.inicios), desplazar(tokens.fines),
+            desplazar(tokens.inicios_linea), desplazar(tokens.fines_linea),
+            contador_tokens, errores)
+
+
+def tokenizar_paralelo(codigo, workers=None, backend="regex", umbral=UMBRAL_PARALELO):
+    """
+    Igual que tokenizar(), pero reparte el código en trozos de líneas
+    completas entre un pool de procesos. Como ningún token cruza líneas, cada
+    trozo se tokeniza por separado y luego se cosen los resultados
+    desplazando posiciones y números de línea. Si el código no supera
+    'umbral' caracteres se usa directamente la versión serie.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(codigo) < umbral:
+        return tokenizar(codigo, backend)
+
+    lineas = codigo.splitlines(keepends=True)
+    if not lineas:
+        return tokenizar(codigo, backend)
+    num_trozos = workers * 4
+    por_trozo = -(-len(lineas) // num_trozos)
+
+    trabajos = []
+    desplazamiento = 0
+    for inicio in range(0, len(lineas), por_trozo):
+        trozo = "".join(lineas[inicio:inicio + por_trozo])
+        trabajos.append((trozo, desplazamiento, inicio + 1, backend))
+        desplazamiento += len(trozo)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        resultados = list(pool.map(_tokenizar_trozo, trabajos))
+
+    tokens = TokenBuffer(codigo)
+    contador_tokens = {}
+    errores = []
+    for tipos, inicios, fines, inicios_linea, fines_linea, contador, errs in resultados:
+        tokens.tipos.extend(tipos)
+        tokens.inicios.extend(inicios)
+        tokens.fines.extend(fines)
+        tokens.inicios_linea.extend(inicios_linea)
+        tokens.fines_linea.extend(fines_linea)
+        # Mismo orden de primera aparición que en la versión serie
+        for tipo, cantidad in contador.items():
+            contador_tokens[tipo] = contador_tokens.get(tipo, 0) + cantidad
+        errores.extend(errs)
+
+    return tokens, contador_tokens, errores
+
+
+def _lineas_fuente(fuente):
+    """Itera las líneas (sin salto) de un archivo de texto/binario o un mmap"""
+    if hasattr(fuente, "readline") and not hasattr(fuente, "__next__"):
+        # mmap: no es iterable por líneas, se lee con readline()
+        trozos = iter(fuente.readline, b"")
+    else:
+        trozos = fuente
+    for trozo in trozos:
+        if isinstance(trozo, bytes):
+            trozo = trozo.decode("utf-8")
+        # Mismo criterio de corte que str.splitlines() en tokenizar()
+        yield from trozo.splitlines()
+
+
+def tokenizar_flujo(fuente, errores=None, contador_tokens=None):
+    """
+    Versión en streaming de tokenizar().
+
+    Lee 'fuente' (archivo abierto en modo texto o binario, o un mmap) línea a
+    línea y genera tuplas (num_linea, columna, tipo, valor, linea) sin cargar
+    todo el programa. Los errores léxicos y el conteo por tipo se acumulan en
+    las colecciones recibidas, si se pasan.
+    """
+    patron = construir_patron()
+
+    for num_linea, linea in enumerate(_lineas_fuente(fuente), start=1):
+        last_end = 0
+        for match in patron.finditer(linea):
+            tipo = match.lastgroup
+            if tipo != "ESPACIO":  # ignoramos espacios
+                if contador_tokens is not None:
+                    contador_tokens[tipo] = contador_tokens.get(tipo, 0) + 1
+                yield (num_linea, match.start() + 1, tipo, match.group(), linea)
+            last_end = match.end()
+
+        if errores is not None and last_end < len(linea):
+            basura = linea[last_end:]
+            if basura.strip():
+                errores.append(_error_basura(num_linea, last_end + 1, basura))
+
+
+class VentanaTokens:
+    """
+    Ventana de lookahead sobre un flujo de tokens para ParserAsignacion.
+
+    El parser nunca retrocede y solo mira hasta pos+2, así que basta con
+    conservar unos pocos tokens por detrás del último índice pedido. Ofrece la
+    misma interfaz que usa el parser de TokenBuffer: vista_parser() y
+    ubicacion(i).
+    """
+
+    def __init__(self, flujo, retroceso=4):
+        self.flujo = iter(flujo)
+        self.retroceso = retroceso
+        self.tokens = deque()
+        self.base = 0       # índice global del primer token en la ventana
+        self.fin = None     # número total de tokens, conocido al agotar el flujo
+
+    def _token(self, i):
+        while self.fin is None and i >= self.base + len(self.tokens):
+            siguiente = next(self.flujo, None)
+            if siguiente is None:
+                self.fin = self.base + len(self.tokens)
+            else:
+                self.tokens.append(siguiente)
+
+        if self.fin is not None and i >= self.fin:
+            raise IndexError(i)
+        if i < self.base:
+            raise IndexError(f"Token {i} ya descartado de la ventana")
+
+        # Descartar lo que el parser ya no puede volver a pedir
+        while self.base < i - self.retroceso:
+            self.tokens.popleft()
+            self.base += 1
+        return self.tokens[i - self.base]
+
+    def ubicacion(self, i):
+        num_linea, columna, _, valor, linea = self._token(i)
+        return num_linea, columna, valor, linea
+
+    def vista_parser(self):
+        return _VistaVentana(self)
+
+
+class _VistaVentana:
+    """Vista (tipo, valor) sobre una VentanaTokens con un token EOF final"""
+
+    def __init__(self, ventana):
+        self.ventana = ventana
+
+    def __getitem__(self, i):
+        try:
+            token = self.ventana._token(i)
+        except IndexError:
+            if i == self.ventana.fin:
+                return ("EOF", "EOF")
+            raise
+        return (token[2], token[3])
+
+
+class LexerIncremental:
+    """
+    Lexer que mantiene los tokens de un archivo y los actualiza por líneas.
+
+    Como ningún token cruza de una línea a otra, una edición solo obliga a
+    re-tokenizar las líneas tocadas; las posteriores se desplazan sin volver
+    a pasar por el patrón. Cada línea guarda sus tokens en un array plano
+    [tipo, inicio, fin, tipo, inicio, fin, ...] con columnas relativas a la
+    propia línea, por lo que mover líneas no exige recalcular posiciones.
+    """
+
+    def __init__(self, codigo=""):
+        self.patron = construir_patron()
+        self.lineas = codigo.splitlines()
+        self.tokens_linea = []
+        self.basura_linea = []   # (columna, basura) o None por línea
+        self.contador_tokens = {}
+        for linea in self.lineas:
+            tokens, basura = self._lexar_linea(linea)
+            self.tokens_linea.append(tokens)
+            self.basura_linea.append(basura)
+            self._contar(tokens, 1)
+
+    def _lexar_linea(self, linea):
+        tokens = array('l')
+        last_end = 0
+        for match in self.patron.finditer(linea):
+            tokens.extend((CODIGO_TIPO[match.lastgroup], match.start(), match.end()))
+            last_end = match.end()
+        basura = None
+        if last_end < len(linea) and linea[last_end:].strip():
+            basura = (last_end + 1, linea[last_end:])
+        return tokens, basura
+
+    def _contar(self, tokens, signo):
+        for k in range(0, len(tokens), 3):
+            tipo = TIPOS_TOKEN[tokens[k]]
+            cantidad = self.contador_tokens.get(tipo, 0) + signo
+            if cantidad:
+                self.contador_tokens[tipo] = cantidad
+            else:
+                del self.contador_tokens[tipo]
+
+    def _indice_primer_token(self, num_linea):
+        """Índice global del primer token de la línea num_linea (1-based)"""
+        return sum(len(t) for t in self.tokens_linea[:num_linea - 1]) // 3
+
+    def editar(self, linea_inicio, linea_fin, texto):
+        """
+        Reemplaza las líneas linea_inicio..linea_fin (1-based, inclusivas) por
+        las líneas de 'texto'. Con linea_fin = linea_inicio - 1 se inserta sin
+        borrar nada; con texto vacío solo se borra.
+
+        Devuelve (primero, fin_anterior, fin_nuevo): los tokens
+        [primero, fin_anterior) se sustituyeron por [primero, fin_nuevo) y los
+        que venían detrás se desplazan fin_nuevo - fin_anterior posiciones.
+        """
+        if not 1 <= linea_inicio <= linea_fin + 1 <= len(self.lineas) + 1:
+            raise ValueError(f"Rango de líneas inválido: {linea_inicio}-{linea_fin}")
+
+        desde, hasta = linea_inicio - 1, linea_fin
+        nuevas_lineas = texto.splitlines()
+        nuevos_tokens = []
+        nueva_basura = []
+        for linea in nuevas_lineas:
+            tokens, basura = self._lexar_linea(linea)
+            nuevos_tokens.append(tokens)
+            nueva_basura.append(basura)
+
+        for tokens in self.tokens_linea[desde:hasta]:
+            self._contar(tokens, -1)
+        for tokens in nuevos_tokens:
+            self._contar(tokens, 1)
+
+        primero = self._indice_primer_token(linea_inicio)
+        cantidad_anterior = sum(len(t) for t in self.tokens_linea[desde:hasta]) // 3
+        cantidad_nueva = sum(len(t) for t in nuevos_tokens) // 3
+
+        self.lineas[desde:hasta] = nuevas_lineas
+        self.tokens_linea[desde:hasta] = nuevos_tokens
+        self.basura_linea[desde:hasta] = nueva_basura
+
+        return primero, primero + cantidad_anterior, primero + cantidad_nueva
+
+    @property
+    def errores(self):
+        return [_error_basura(num_linea, *basura)
+                for num_linea, basura in enumerate(self.basura_linea, start=1)
+                if basura is not None]
+
+    def tokens(self):
+        """Construye un TokenBuffer con el estado actual, sin re-tokenizar"""
+        buffer = TokenBuffer("\n".join(self.lineas))
+        inicio_linea = 0
+        for linea, tokens in zip(self.lineas, self.tokens_linea):
+            buffer.agregar_linea(inicio_linea, inicio_linea + len(linea))
+            for k in range(0, len(tokens), 3):
+                buffer.tipos.append(tokens[k])
+                buffer.inicios.append(inicio_linea + tokens[k + 1])
+                buffer.fines.append(inicio_linea + tokens[k + 2])
+            inicio_linea += len(linea) + 1
+        return buffer
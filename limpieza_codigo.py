@@ -0,0 +1,221 @@
+"""
+Limpieza del código intermedio: saltos, etiquetas y código muerto.
+
+El generador deja código de relleno: instrucciones detrás de break,
+continue y return, saltos a etiquetas que solo contienen otro goto y
+etiquetas de && y || a las que al final no salta nadie. Los
+pases anteriores dejan además temporales que ya nadie lee. Este pase repite
+hasta que no cambia nada:
+
+1. Encadenar saltos: un salto a una etiqueta seguida de 'goto M' (quizá
+   tras más etiquetas) pasa a saltar directamente a M, y un salto a una de
+   varias etiquetas seguidas, a la última de ellas.
+2. Borrar los bloques inalcanzables de cada tramo (GrafoFlujo).
+3. Invertir los saltos condicionales que solo saltan por encima de un
+   goto: 'if a < b goto L; goto M; L:' pasa a 'if a >= b goto M; L:'.
+4. Borrar los saltos a la instrucción siguiente (sin contar etiquetas) y
+   las etiquetas a las que ya no salta nadie.
+5. Borrar las asignaciones a temporales que no se leen, en cadena. Una
+   división o un módulo cuyo divisor no es una constante distinta de cero
+   se conserva, igual que las llamadas.
+
+Los saltos a nombres (las etiquetas de error de break/continue fuera de
+bucle) no se tocan.
+"""
+from grafo_flujo import GrafoFlujo, tramos_programa
+from intermedio import (CODIGO_OPERACION, COMPARACION_CONTRARIA, COMPARACION_DE_SALTO, ETIQUETA,
+                        OP_ETIQUETA, OP_SALTO, OP_SALTO_SI_FALSO, SALTO_DE_COMPARACION, SIN_OPERANDO,
+                        TEMPORAL, es_salto_condicional)
+
+_OP_SALTO_SI_DIFERENTE = CODIGO_OPERACION["SALTO_SI_DIFERENTE"]
+
+
+def _salta_a_etiqueta(codigo, i):
+    op = codigo.ops[i]
+    return (op == OP_SALTO or es_salto_condicional(op)) and codigo.destinos[i] & 3 == ETIQUETA
+
+
+def _posiciones_etiquetas(codigo, inicio, fin):
+    ops = codigo.ops
+    destinos = codigo.destinos
+    return {destinos[i]: i for i in range(inicio, fin) if ops[i] == OP_ETIQUETA}
+
+
+def encadenar_saltos(codigo, inicio, fin):
+    """Redirige los saltos del tramo al destino final de su cadena de etiquetas y gotos"""
+    ops = codigo.ops
+    destinos = codigo.destinos
+    posiciones = _posiciones_etiquetas(codigo, inicio, fin)
+    resuelta = {}  # etiqueta -> destino final
+
+    def resolver(etiqueta):
+        visitadas = []
+        while etiqueta not in resuelta:
+            visitadas.append(etiqueta)
+            p = posiciones.get(etiqueta)
+            if p is None:
+                final = etiqueta  # fuera del tramo
+                break
+            while p < fin and ops[p] == OP_ETIQUETA:
+                p += 1
+            final = destinos[p - 1]
+            if p < fin and ops[p] == OP_SALTO and destinos[p] & 3 == ETIQUETA:
+                if destinos[p] in visitadas:
+                    # Bucle de gotos: se deja como está
+                    for visitada in visitadas:
+                        resuelta[visitada] = visitada
+                    return visitadas[0]
+                etiqueta = destinos[p]
+                continue
+            break
+        else:
+            final = resuelta[etiqueta]
+        for visitada in visitadas:
+            resuelta[visitada] = final
+        return final
+
+    redirigidos = 0
+    for i in range(inicio, fin):
+        if _salta_a_etiqueta(codigo, i):
+            final = resolver(destinos[i])
+            if final != destinos[i]:
+                destinos[i] = final
+                redirigidos += 1
+    return redirigidos
+
+
+def bloques_inalcanzables(codigo, inicio, fin, eliminadas):
+    """Añade a 'eliminadas' las instrucciones de los bloques inalcanzables del tramo"""
+    grafo = GrafoFlujo(codigo, inicio, fin)
+    antes = len(eliminadas)
+    for b in range(len(grafo)):
+        if not grafo.alcanzable(b):
+            eliminadas.update(grafo.instrucciones(b))
+    return len(eliminadas) - antes
+
+
+def invertir_saltos(codigo, inicio, fin, eliminadas):
+    """
+    Invierte los saltos condicionales seguidos de un goto a etiqueta cuando
+    saltan justo detrás de él, y añade el goto a 'eliminadas'.
+    """
+    ops = codigo.ops
+    destinos = codigo.destinos
+    posiciones = _posiciones_etiquetas(codigo, inicio, fin)
+    invertidos = 0
+    for i in range(inicio, fin - 1):
+        if not (es_salto_condicional(ops[i]) and destinos[i] & 3 == ETIQUETA):
+            continue
+        if ops[i + 1] != OP_SALTO or destinos[i + 1] & 3 != ETIQUETA or i + 1 in eliminadas:
+            continue
+        p = posiciones.get(destinos[i], -1)
+        if p <= i + 1 or not all(ops[j] == OP_ETIQUETA for j in range(i + 2, p)):
+            continue
+        if ops[i] == OP_SALTO_SI_FALSO:
+            ops[i] = _OP_SALTO_SI_DIFERENTE
+            codigo.fuentes2[i] = codigo.constante("0")
+        else:
+            ops[i] = SALTO_DE_COMPARACION[COMPARACION_CONTRARIA[COMPARACION_DE_SALTO[ops[i]]]]
+        destinos[i] = destinos[i + 1]
+        eliminadas.add(i + 1)
+        invertidos += 1
+    return invertidos
+
+
+def saltos_y_etiquetas_sobrantes(codigo, inicio, fin, eliminadas):
+    """
+    Añade a 'eliminadas' los saltos a la instrucción siguiente y las
+    etiquetas sin saltos que lleguen a ellas. Devuelve (saltos, etiquetas).
+    """
+    ops = codigo.ops
+    destinos = codigo.destinos
+    posiciones = _posiciones_etiquetas(codigo, inicio, fin)
+    saltos = 0
+    referencias = {}
+    for i in range(inicio, fin):
+        if not _salta_a_etiqueta(codigo, i):
+            continue
+        p = posiciones.get(destinos[i], -1)
+        if p > i and all(ops[j] == OP_ETIQUETA for j in range(i + 1, p)):
+            eliminadas.add(i)
+            saltos += 1
+        else:
+            referencias[destinos[i]] = referencias.get(destinos[i], 0) + 1
+
+    etiquetas = 0
+    for etiqueta, p in posiciones.items():
+        if etiqueta not in referencias:
+            eliminadas.add(p)
+            etiquetas += 1
+    return saltos, etiquetas
+
+
+def asignaciones_muertas(codigo, eliminadas):
+    """Añade a 'eliminadas' las asignaciones a temporales que nunca se leen"""
+    lecturas = {}
+    definiciones = {}
+    for i in range(len(codigo)):
+        for operando in codigo.lecturas(i):
+            if operando != SIN_OPERANDO and operando & 3 == TEMPORAL:
+                lecturas[operando] = lecturas.get(operando, 0) + 1
+        destino = codigo.destinos[i]
+        if destino != SIN_OPERANDO and destino & 3 == TEMPORAL and codigo.ops[i] != OP_ETIQUETA:
+            definiciones.setdefault(destino, []).append(i)
+
+    antes = len(eliminadas)
+    pendientes = [t for t in definiciones if t not in lecturas]
+    while pendientes:
+        temporal = pendientes.pop()
+        for i in definiciones[temporal]:
+            if i in eliminadas or not codigo.sin_efectos(i):
+                continue
+            eliminadas.add(i)
+            for operando in codigo.lecturas(i):
+                if operando != SIN_OPERANDO and operando & 3 == TEMPORAL:
+                    lecturas[operando] -= 1
+                    if lecturas[operando] == 0 and operando in definiciones:
+                        pendientes.append(operando)
+    return len(eliminadas) - antes
+
+
+def limpiar_codigo(codigo):
+    """
+    Aplica la limpieza hasta un punto fijo. Devuelve un diccionario con los
+    saltos redirigidos y las instrucciones borradas de cada tipo.
+    """
+    resumen = {"saltos_redirigidos": 0, "inalcanzables": 0, "saltos_invertidos": 0,
+               "saltos_eliminados": 0, "etiquetas_eliminadas": 0, "asignaciones_muertas": 0}
+    cambio = True
+    while cambio:
+        cambio = False
+        for _, inicio, fin in tramos_programa(codigo):
+            redirigidos = encadenar_saltos(codigo, inicio, fin)
+            resumen["saltos_redirigidos"] += redirigidos
+            cambio = cambio or redirigidos > 0
+
+        eliminadas = set()
+        for _, inicio, fin in tramos_programa(codigo):
+            if fin > inicio:
+                resumen["inalcanzables"] += bloques_inalcanzables(codigo, inicio, fin, eliminadas)
+        codigo.eliminar(eliminadas)
+        cambio = cambio or bool(eliminadas)
+
+        eliminadas = set()
+        for _, inicio, fin in tramos_programa(codigo):
+            resumen["saltos_invertidos"] += invertir_saltos(codigo, inicio, fin, eliminadas)
+        codigo.eliminar(eliminadas)
+        cambio = cambio or bool(eliminadas)
+
+        eliminadas = set()
+        for _, inicio, fin in tramos_programa(codigo):
+            saltos, etiquetas = saltos_y_etiquetas_sobrantes(codigo, inicio, fin, eliminadas)
+            resumen["saltos_eliminados"] += saltos
+            resumen["etiquetas_eliminadas"] += etiquetas
+        codigo.eliminar(eliminadas)
+        cambio = cambio or bool(eliminadas)
+
+        eliminadas = set()
+        resumen["asignaciones_muertas"] += asignaciones_muertas(codigo, eliminadas)
+        codigo.eliminar(eliminadas)
+        cambio = cambio or bool(eliminadas)
+    return resumen
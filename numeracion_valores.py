@@ -0,0 +1,174 @@
+"""
+Numeración de valores y eliminación de subexpresiones comunes.
+
+El generador crea un temporal nuevo para cada operación, así que 'a*b + a*b'
+calcula el producto dos veces. Este pase da a cada operación binaria una
+clave (operación, valor de fuente1, valor de fuente2), donde el valor de un
+operando es su número de valor SSA (ssa.SSATramo) o el propio literal, y
+reutiliza el temporal de una operación anterior con la misma clave:
+
+- numerar_valores_local() busca solo dentro de cada bloque básico.
+- eliminar_subexpresiones() recorre el árbol de dominadores con una tabla
+  por ámbito: lo calculado en un bloque está disponible en todos los que
+  domina.
+
+Como las claves usan valores SSA, dos 'a*b' solo coinciden si les llega la
+misma definición de a y de b; una asignación entre medias, un phi o una
+llamada que modifique una global dan valores distintos. Las operaciones
+conmutativas ordenan sus operandos y 'a > b' se normaliza a 'b < a'.
+
+Solo se reutilizan temporales con una única definición en el tramo (los del
+generador): su valor no cambia, y la definición domina a la reutilización.
+Si la operación redundante escribe en un temporal así, se sustituyen sus
+usos y se borra; si no, pasa a ser una copia del temporal anterior.
+"""
+from grafo_flujo import GrafoFlujo, tramos_programa
+from intermedio import (CODIGO_OPERACION, OP_COPIA, OP_LLAMADA, OP_PRIMERA_BINARIA,
+                        OP_ULTIMA_BINARIA, SIN_OPERANDO, TEMPORAL, lee_dos_fuentes)
+from ssa import SSATramo
+
+_CONMUTATIVAS = frozenset(CODIGO_OPERACION[nombre] for nombre in (
+    "SUMA", "MULTIPLICACION", "IGUAL_IGUAL", "DIFERENTE", "AND_LOGICO", "OR_LOGICO"))
+_INVERSAS = {
+    CODIGO_OPERACION["MAYOR_QUE"]: CODIGO_OPERACION["MENOR_QUE"],
+    CODIGO_OPERACION["MAYOR_IGUAL"]: CODIGO_OPERACION["MENOR_IGUAL"],
+}
+
+
+class NumeracionTramo(SSATramo):
+    """Numeración de valores sobre las instrucciones de un GrafoFlujo"""
+
+    def __init__(self, codigo, grafo):
+        super().__init__(codigo, grafo)
+        self.numero = {}  # valor SSA -> número de valor, si no es el suyo propio
+        self.reutilizadas = 0
+        self.temporales_eliminados = 0
+
+    def _numero_operando(self, operando, valor_ssa):
+        """Número de valor de un operando: par para valores SSA, impar para literales"""
+        if valor_ssa is None:
+            return operando << 1 | 1
+        return self.numero.get(valor_ssa, valor_ssa << 1)
+
+    def _clave(self, i):
+        codigo = self.codigo
+        op = codigo.ops[i]
+        a = self._numero_operando(codigo.fuentes1[i], self.valor_uso1.get(i))
+        b = self._numero_operando(codigo.fuentes2[i], self.valor_uso2.get(i))
+        if op in _INVERSAS:
+            op = _INVERSAS[op]
+            a, b = b, a
+        elif op in _CONMUTATIVAS and b < a:
+            a, b = b, a
+        return op, a, b
+
+    def _sustituir_usos(self, i, anterior):
+        """
+        Cambia por 'anterior' los usos del temporal que define i. Devuelve
+        False (sin tocar nada) si algún phi lo lee.
+        """
+        codigo = self.codigo
+        temporal = codigo.destinos[i]
+        usuarios = self.usuarios[self.valor_definido[i]]
+        if any(u < 0 for u in usuarios):
+            return False
+        for u in usuarios:
+            if codigo.fuentes1[u] == temporal:
+                codigo.fuentes1[u] = anterior
+            op = codigo.ops[u]
+            if lee_dos_fuentes(op) and codigo.fuentes2[u] == temporal:
+                codigo.fuentes2[u] = anterior
+            elif op == OP_LLAMADA:
+                indice = codigo.fuentes2[u]
+                codigo.argumentos[indice] = tuple(anterior if a == temporal else a
+                                                  for a in codigo.argumentos[indice])
+        return True
+
+    def numerar(self, eliminadas, global_=True):
+        grafo = self.grafo
+        codigo = self.codigo
+        ops = codigo.ops
+        destinos = codigo.destinos
+
+        # Temporales con una sola definición en el tramo
+        definiciones = {}
+        for b in grafo.orden:
+            for i in grafo.instrucciones(b):
+                destino = self._define(i)
+                if destino != SIN_OPERANDO and destino & 3 == TEMPORAL:
+                    definiciones[destino] = definiciones.get(destino, 0) + 1
+
+        disponibles = {}  # clave -> (temporal que guarda el valor, su número de valor)
+        hijos = grafo.hijos_dominador() if global_ else None
+        pila_bloques = [(0, None)] if global_ else [(b, None) for b in grafo.orden]
+        while pila_bloques:
+            b, anadidas = pila_bloques.pop()
+            if anadidas is not None:
+                # Salida del ámbito del bloque
+                for clave in anadidas:
+                    del disponibles[clave]
+                continue
+            anadidas = []
+            for i in grafo.instrucciones(b):
+                op = ops[i]
+                if op == OP_COPIA:
+                    # Un temporal copiado tiene el mismo valor que su fuente
+                    destino = destinos[i]
+                    if destino & 3 == TEMPORAL and definiciones.get(destino) == 1:
+                        self.numero[self.valor_definido[i]] = self._numero_operando(
+                            codigo.fuentes1[i], self.valor_uso1.get(i))
+                    continue
+                if not OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA:
+                    continue
+
+                clave = self._clave(i)
+                destino = destinos[i]
+                unico = destino & 3 == TEMPORAL and definiciones.get(destino) == 1
+                disponible = disponibles.get(clave)
+                if disponible is None:
+                    if unico:
+                        disponibles[clave] = destino, self._numero_operando(destino, self.valor_definido[i])
+                        anadidas.append(clave)
+                    continue
+
+                anterior, numero = disponible
+                self.reutilizadas += 1
+                if unico and self._sustituir_usos(i, anterior):
+                    self.numero[self.valor_definido[i]] = numero
+                    eliminadas.add(i)
+                    self.temporales_eliminados += 1
+                else:
+                    ops[i] = OP_COPIA
+                    codigo.fuentes1[i] = anterior
+                    codigo.fuentes2[i] = SIN_OPERANDO
+
+            if global_:
+                pila_bloques.append((b, anadidas))
+                pila_bloques.extend((h, None) for h in reversed(hijos[b]))
+            else:
+                disponibles.clear()
+
+
+def _numerar_programa(codigo, global_):
+    eliminadas = set()
+    resumen = {"reutilizadas": 0, "temporales_eliminados": 0}
+    for _, inicio, fin in tramos_programa(codigo):
+        if fin == inicio:
+            continue
+        tramo = NumeracionTramo(codigo, GrafoFlujo(codigo, inicio, fin))
+        tramo.construir_ssa()
+        tramo.numerar(eliminadas, global_)
+        for clave in resumen:
+            resumen[clave] += getattr(tramo, clave)
+    codigo.eliminar(eliminadas)
+    return resumen
+
+
+def numerar_valores_local(codigo):
+    """Reutiliza operaciones repetidas dentro de cada bloque básico"""
+    return _numerar_programa(codigo, global_=False)
+
+
+def eliminar_subexpresiones(codigo):
+    """Reutiliza operaciones repetidas en bloques dominados por la primera"""
+    return _numerar_programa(codigo, global_=True)
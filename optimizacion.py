@@ -0,0 +1,76 @@
+"""
+Optimización del código intermedio.
+
+optimizar() aplica sobre un CodigoIntermedio los pases que corresponden al
+nivel pedido (0 = ninguno) y devuelve un InformeOptimizacion con el número
+de instrucciones antes y después de cada pase. Cada pase se puede ajustar
+con argumentos para su función, por su nombre en PASES:
+
+    optimizar(codigo, 2, {"expansión de llamadas": {"heuristica": Heuristica(solo_hojas=True)}})
+"""
+from asignacion_temporales import reciclar_temporales
+from desenrollado_bucles import desenrollar_bucles
+from expansion_llamadas import expandir_llamadas
+from limpieza_codigo import limpiar_codigo
+from numeracion_valores import eliminar_subexpresiones, numerar_valores_local
+from optimizacion_bucles import optimizar_bucles
+from propagacion_constantes import propagar_constantes
+from traza import traza, INFO
+
+# (nivel mínimo, nombre, función del pase) en orden de aplicación. Cada pase
+# modifica el código y devuelve un diccionario con sus estadísticas: números
+# y, en 'decisiones', una lista de detalles que el informe lista aparte.
+PASES = [
+    (2, "expansión de llamadas", expandir_llamadas),
+    (1, "propagación de constantes", propagar_constantes),
+    (3, "desenrollado de bucles", desenrollar_bucles),
+    (3, "propagación tras desenrollar", propagar_constantes),
+    (1, "numeración de valores local", numerar_valores_local),
+    (2, "subexpresiones comunes", eliminar_subexpresiones),
+    (2, "bucles", optimizar_bucles),
+    (1, "limpieza", limpiar_codigo),
+    (1, "reciclado de temporales", reciclar_temporales),
+]
+NIVEL_MAXIMO = max(nivel for nivel, _, _ in PASES)
+
+
+class InformeOptimizacion:
+    def __init__(self, nivel, instrucciones):
+        self.nivel = nivel
+        self.antes = instrucciones
+        self.despues = instrucciones
+        self.pases = []  # (nombre, antes, después, estadísticas)
+
+    def imprimir(self):
+        print(f"\nOPTIMIZACIÓN (nivel {self.nivel}): {self.antes} -> {self.despues} instrucciones")
+        for nombre, antes, despues, estadisticas in self.pases:
+            detalle = ", ".join(f"{clave.replace('_', ' ')}: {valor}" for clave, valor in estadisticas.items()
+                                if clave != "decisiones")
+            print(f"   {nombre}: {antes} -> {despues}  ({detalle})")
+            # (tramo que llama, posición, función, motivo) de expandir_llamadas
+            for tramo, posicion, funcion, motivo in estadisticas.get("decisiones", ()):
+                print(f"      {tramo or 'primer nivel'}, instrucción {posicion}: {funcion} -> {motivo}")
+
+
+def optimizar(codigo, nivel=NIVEL_MAXIMO, opciones=None):
+    """
+    Optimiza 'codigo' en el sitio con los pases de nivel <= 'nivel'.
+    'opciones' da, por nombre de pase, los argumentos con nombre de su función.
+    """
+    opciones = opciones or {}
+    desconocidos = set(opciones) - {nombre for _, nombre, _ in PASES}
+    if desconocidos:
+        raise ValueError(f"Pases de optimización desconocidos: {', '.join(sorted(desconocidos))}")
+
+    informe = InformeOptimizacion(nivel, len(codigo))
+    for nivel_pase, nombre, pase in PASES:
+        if nivel < nivel_pase:
+            continue
+        antes = len(codigo)
+        estadisticas = pase(codigo, **opciones.get(nombre, {}))
+        informe.pases.append((nombre, antes, len(codigo), estadisticas))
+    informe.despues = len(codigo)
+
+    if traza.nivel >= INFO and informe.pases:
+        traza.emitir("optimizacion", INFO, f"Nivel {nivel}: {informe.antes} -> {informe.despues} instrucciones")
+    return informe
@@ -0,0 +1,346 @@
+"""
+Optimización de bucles: código invariante y reducción de fuerza.
+
+Cada tramo del programa se analiza sobre su GrafoFlujo, con sus bucles
+naturales y el árbol que forman:
+
+1. Preencabezado: en un bucle se puede poner código delante de la cabecera
+   si solo se entra en él desde el bloque anterior y sin saltar, como en los
+   while y for del generador. Lo que se inserta delante de la etiqueta de
+   la cabecera se ejecuta una vez, al entrar en el bucle.
+2. Código invariante: una instrucción sin efectos (copia u operación que no
+   puede fallar) que escribe un temporal de una sola definición, y cuyos
+   operandos no se escriben dentro del bucle, sale al preencabezado del
+   bucle más externo del que es invariante. Como no puede fallar, da igual
+   que el bucle no llegue a dar ninguna vuelta. Las instrucciones se
+   recorren en orden, así que un temporal que lee un invariante ya sacado
+   también sale.
+3. Variables de inducción: una variable entera cuyas únicas escrituras en
+   el bucle son 'i = i + k' o 'i = i - k', directamente o a través de un
+   temporal ('t = i + k; i = t'), con k constante. Un 'i * c' dentro del
+   bucle pasa a leer un temporal s que vale i * c en el preencabezado y
+   suma k * c detrás de cada escritura de i. Un 'i % c' con c > 0 se reduce
+   igual si i entra con una constante no negativa y ningún paso es
+   negativo: s suma k % c y resta c al llegar a c (con c = 2 y k impar,
+   basta con s = 1 - s). Si el resultado solo se lee más adelante en el
+   mismo bloque, esas lecturas pasan a leer s y la operación desaparece;
+   si no, queda una copia de s.
+
+Una llamada dentro del bucle escribe las variables globales, que dejan de
+ser invariantes y no pueden ser variables de inducción.
+"""
+from bisect import bisect_left
+
+from grafo_flujo import GrafoFlujo, tramos_programa
+from intermedio import (CODIGO_OPERACION, CONSTANTE, NOMBRE, OP_COPIA, OP_ETIQUETA, OP_LLAMADA,
+                        OP_SALTO, SIN_OPERANDO, TEMPORAL, es_salto_condicional, temporal)
+from propagacion_constantes import plegar
+
+OP_SUMA = CODIGO_OPERACION["SUMA"]
+OP_RESTA = CODIGO_OPERACION["RESTA"]
+OP_MULTIPLICACION = CODIGO_OPERACION["MULTIPLICACION"]
+OP_MODULO = CODIGO_OPERACION["MODULO"]
+OP_SALTO_SI_MENOR = CODIGO_OPERACION["SALTO_SI_MENOR"]
+
+
+class BuclesTramo:
+    """Código invariante y variables de inducción de los bucles de un GrafoFlujo"""
+
+    def __init__(self, codigo, grafo, siguiente_temporal, siguiente_etiqueta):
+        self.codigo = codigo
+        self.grafo = grafo
+        self.siguiente_temporal = siguiente_temporal
+        self.siguiente_etiqueta = siguiente_etiqueta
+        self.bloque = [0] * (grafo.fin - grafo.inicio)  # instrucción - inicio -> bloque
+        self.definiciones = {}  # operando -> instrucciones que lo escriben
+        self.lecturas = {}  # temporal -> número de instrucciones que lo leen
+        self.bucles_con_escritura = {}  # operando -> entrada_bucle de los bucles que lo escriben, ordenados
+        self.bucles_con_llamada = []
+        self._preencabezados = {}  # cabecera -> True si admite preencabezado
+        self._inducciones = {}  # (variable, cabecera) -> pasos, o None
+        self.movidas = {}  # instrucción -> cabecera del bucle más externo del que sale
+        self.iniciales = {}  # cabecera -> cuádruplas para su preencabezado
+        self.actualizaciones = {}  # posición -> cuádruplas para insertar delante
+        self.reducidas = {}  # (variable, op, constante, cabecera) -> temporal
+        self.eliminadas = set()  # operaciones reducidas cuyos usos leen ya el temporal
+        self.invariantes_sacadas = 0
+        self.operaciones_reducidas = 0
+
+        codigo = self.codigo
+        for b in range(len(grafo)):
+            c = grafo.cabecera_bucle[b]
+            for i in grafo.instrucciones(b):
+                self.bloque[i - grafo.inicio] = b
+                for operando in set(codigo.lecturas(i)):
+                    if operando != SIN_OPERANDO and operando & 3 == TEMPORAL:
+                        self.lecturas[operando] = self.lecturas.get(operando, 0) + 1
+                destino = codigo.escritura(i)
+                if destino != SIN_OPERANDO:
+                    self.definiciones.setdefault(destino, []).append(i)
+                    if c >= 0:
+                        self.bucles_con_escritura.setdefault(destino, []).append(grafo.entrada_bucle[c])
+                if codigo.ops[i] == OP_LLAMADA and c >= 0:
+                    self.bucles_con_llamada.append(grafo.entrada_bucle[c])
+        for numeros in self.bucles_con_escritura.values():
+            numeros.sort()
+        self.bucles_con_llamada.sort()
+
+    def _contiene(self, numeros, h):
+        """True si algún bucle de 'numeros' (entrada_bucle, ordenados) está dentro del bucle h"""
+        k = bisect_left(numeros, self.grafo.entrada_bucle[h])
+        return k < len(numeros) and numeros[k] <= self.grafo.salida_bucle[h]
+
+    def _bucle_de(self, i):
+        """Bucle más interno en el que está (o estará, si se saca) la instrucción i"""
+        if i in self.movidas:
+            return self.grafo.padre_bucle[self.movidas[i]]
+        return self.grafo.cabecera_bucle[self.bloque[i - self.grafo.inicio]]
+
+    def _es_global(self, operando):
+        return operando & 3 == NOMBRE and self.codigo.nombres[operando >> 2] in self.codigo.globales
+
+    def _preencabezado(self, h):
+        """True si al bucle h solo se entra desde el bloque anterior, sin saltar"""
+        admite = self._preencabezados.get(h)
+        if admite is None:
+            grafo = self.grafo
+            codigo = self.codigo
+            admite = h > 0 and [p for p in grafo.predecesores[h] if not grafo.en_bucle(p, h)] == [h - 1]
+            if admite:
+                ultima = grafo.fines[h - 1] - 1
+                op = codigo.ops[ultima]
+                if op == OP_SALTO or es_salto_condicional(op):
+                    admite = grafo.bloque_de_etiqueta.get(codigo.destinos[ultima]) != h
+            self._preencabezados[h] = admite
+        return admite
+
+    def _invariante(self, operando, h):
+        """True si el operando vale lo mismo en todo el bucle h"""
+        if operando == SIN_OPERANDO or operando & 3 == CONSTANTE:
+            return True
+        definiciones = self.definiciones.get(operando, ())
+        if operando & 3 == TEMPORAL and len(definiciones) == 1:
+            j = definiciones[0]
+            if not self.grafo.alcanzable(self.bloque[j - self.grafo.inicio]):
+                return False
+            bucle = self._bucle_de(j)
+            return bucle < 0 or not self.grafo.en_bucle(bucle, h)
+        if self._contiene(self.bucles_con_escritura.get(operando, ()), h):
+            return False
+        return not (self._es_global(operando) and self._contiene(self.bucles_con_llamada, h))
+
+    def sacar_invariantes(self):
+        grafo = self.grafo
+        codigo = self.codigo
+        for i in range(grafo.inicio, grafo.fin):
+            h = grafo.cabecera_bucle[self.bloque[i - grafo.inicio]]
+            if h < 0 or not codigo.sin_efectos(i):
+                continue
+            destino = codigo.destinos[i]
+            if destino & 3 != TEMPORAL or len(self.definiciones[destino]) != 1:
+                continue
+            fuente1 = codigo.fuentes1[i]
+            fuente2 = SIN_OPERANDO if codigo.ops[i] == OP_COPIA else codigo.fuentes2[i]
+            salida = -1
+            while h >= 0 and self._invariante(fuente1, h) and self._invariante(fuente2, h):
+                if self._preencabezado(h):
+                    salida = h
+                h = grafo.padre_bucle[h]
+            if salida >= 0:
+                self.movidas[i] = salida
+                self.iniciales.setdefault(salida, []).append(codigo.cuadrupla(i))
+        self.invariantes_sacadas = len(self.movidas)
+
+    # ---- variables de inducción ----
+
+    def _constante_entera(self, operando):
+        if operando & 3 != CONSTANTE:
+            return None
+        valor = self.codigo.valor_constante(operando)
+        return valor if type(valor) is int else None
+
+    def _paso(self, p, variable):
+        """k si la instrucción p hace 'variable = variable + k' (o a través de un temporal), o None"""
+        codigo = self.codigo
+        op, destino, fuente1, fuente2 = codigo.cuadrupla(p)
+        if op == OP_COPIA and fuente1 & 3 == TEMPORAL and p > self.grafo.inicio and codigo.destinos[p - 1] == fuente1:
+            op, _, fuente1, fuente2 = codigo.cuadrupla(p - 1)
+        if op == OP_SUMA and fuente2 == variable:
+            fuente1, fuente2 = fuente2, fuente1
+        if (op == OP_SUMA or op == OP_RESTA) and fuente1 == variable:
+            k = self._constante_entera(fuente2)
+            if k is not None:
+                return k if op == OP_SUMA else -k
+        return None
+
+    def _induccion(self, variable, h):
+        """[(posición, k)] de las escrituras de la variable de inducción en el bucle h, o None"""
+        clave = (variable, h)
+        if clave in self._inducciones:
+            return self._inducciones[clave]
+        pasos = None
+        codigo = self.codigo
+        if (variable & 3 == NOMBRE and codigo.tipos.get(codigo.nombres[variable >> 2]) == "int"
+                and not (self._es_global(variable) and self._contiene(self.bucles_con_llamada, h))):
+            pasos = []
+            for p in self.definiciones.get(variable, ()):
+                if self.grafo.en_bucle(self.bloque[p - self.grafo.inicio], h):
+                    k = self._paso(p, variable)
+                    if k is None:
+                        pasos = None
+                        break
+                    pasos.append((p, k))
+        self._inducciones[clave] = pasos or None
+        return pasos or None
+
+    def _valor_inicial(self, variable, h):
+        """Constante entera que tiene 'variable' al entrar en el bucle h, o None"""
+        codigo = self.codigo
+        for p in reversed(self.grafo.instrucciones(h - 1)):
+            if codigo.escritura(p) == variable:
+                return self._constante_entera(codigo.fuentes1[p]) if codigo.ops[p] == OP_COPIA else None
+            if codigo.ops[p] == OP_LLAMADA and self._es_global(variable):
+                return None
+        return None
+
+    def _nuevo_temporal(self):
+        self.siguiente_temporal += 1
+        return temporal(self.siguiente_temporal - 1)
+
+    def _reducido(self, variable, op, c, h):
+        """Temporal que sigue a 'variable <op> c' en el bucle h (lo crea), o None si no se puede"""
+        clave = (variable, op, c, h)
+        if clave in self.reducidas:
+            return self.reducidas[clave]
+        pasos = self._induccion(variable, h)
+        if pasos is None:
+            return None
+        codigo = self.codigo
+        inicial = self._valor_inicial(variable, h)
+        constante = codigo.constante_de_valor
+
+        if op == OP_MULTIPLICACION:
+            incrementos = [plegar(OP_MULTIPLICACION, k, c) for _, k in pasos]
+            if any(type(incremento) is not int for incremento in incrementos):
+                return None
+            s = self._nuevo_temporal()
+            producto = None if inicial is None else plegar(OP_MULTIPLICACION, inicial, c)
+            if type(producto) is int:
+                inicio = (OP_COPIA, s, constante(producto), SIN_OPERANDO)
+            else:
+                inicio = (OP_MULTIPLICACION, s, variable, constante(c))
+            for (p, _), incremento in zip(pasos, incrementos):
+                if incremento:
+                    self.actualizaciones.setdefault(p + 1, []).append((OP_SUMA, s, s, constante(incremento)))
+        else:
+            if inicial is None or inicial < 0 or any(k < 0 for _, k in pasos):
+                return None
+            s = self._nuevo_temporal()
+            inicio = (OP_COPIA, s, constante(inicial % c), SIN_OPERANDO)
+            for p, k in pasos:
+                k %= c
+                if not k:
+                    continue
+                if c == 2:
+                    actualizacion = [(OP_RESTA, s, constante(1), s)]
+                else:
+                    etiqueta = codigo.etiqueta(self.siguiente_etiqueta, "resto")
+                    self.siguiente_etiqueta += 1
+                    actualizacion = [(OP_SUMA, s, s, constante(k)),
+                                     (OP_SALTO_SI_MENOR, etiqueta, s, constante(c)),
+                                     (OP_RESTA, s, s, constante(c)),
+                                     (OP_ETIQUETA, etiqueta, SIN_OPERANDO, SIN_OPERANDO)]
+                self.actualizaciones.setdefault(p + 1, []).extend(actualizacion)
+        self.iniciales.setdefault(h, []).append(inicio)
+        self.reducidas[clave] = s
+        return s
+
+    def reducir_fuerza(self):
+        """Cambia 'i * c' e 'i % c' de las variables de inducción por copias de su temporal"""
+        grafo = self.grafo
+        codigo = self.codigo
+        for i in range(grafo.inicio, grafo.fin):
+            op = codigo.ops[i]
+            if op != OP_MULTIPLICACION and op != OP_MODULO:
+                continue
+            h = grafo.cabecera_bucle[self.bloque[i - grafo.inicio]]
+            if h < 0 or not self._preencabezado(h):
+                continue
+            variable, c = codigo.fuentes1[i], self._constante_entera(codigo.fuentes2[i])
+            if op == OP_MULTIPLICACION and c is None:
+                variable, c = codigo.fuentes2[i], self._constante_entera(codigo.fuentes1[i])
+            if c is None or (op == OP_MODULO and c <= 0):
+                continue
+            s = self._reducido(variable, op, c, h)
+            if s is None:
+                continue
+            self.operaciones_reducidas += 1
+            if not self._sustituir_lecturas(i, s):
+                codigo.ops[i] = OP_COPIA
+                codigo.fuentes1[i] = s
+                codigo.fuentes2[i] = SIN_OPERANDO
+
+    def _sustituir_lecturas(self, i, s):
+        """
+        Si el temporal que escribe i solo se lee más adelante en su bloque,
+        antes de que cambie ningún temporal reducido, esas lecturas pasan a
+        leer s y la instrucción i se borra
+        """
+        codigo = self.codigo
+        temporal_i = codigo.destinos[i]
+        if temporal_i & 3 != TEMPORAL or len(self.definiciones[temporal_i]) != 1:
+            return False
+        lectoras = []
+        for q in range(i + 1, self.grafo.fines[self.bloque[i - self.grafo.inicio]]):
+            if q in self.actualizaciones or codigo.ops[q] == OP_LLAMADA:
+                break
+            if temporal_i in codigo.lecturas(q):
+                lectoras.append(q)
+        if len(lectoras) != self.lecturas.get(temporal_i, 0):
+            return False
+        for q in lectoras:
+            if codigo.fuentes1[q] == temporal_i:
+                codigo.fuentes1[q] = s
+            if codigo.fuentes2[q] == temporal_i:
+                codigo.fuentes2[q] = s
+        self.eliminadas.add(i)
+        return True
+
+    def reescribir(self, insertadas, eliminadas):
+        """Añade lo que hay que insertar y las instrucciones sacadas de sus bucles"""
+        for h, cuadruplas in self.iniciales.items():
+            insertadas.setdefault(self.grafo.inicios[h], []).extend(cuadruplas)
+        for posicion, cuadruplas in self.actualizaciones.items():
+            insertadas.setdefault(posicion, []).extend(cuadruplas)
+        eliminadas.update(self.movidas)
+        eliminadas.update(self.eliminadas)
+
+
+def optimizar_bucles(codigo):
+    """
+    Saca el código invariante de los bucles y reduce la fuerza de las
+    operaciones con variables de inducción. Devuelve un diccionario con las
+    instrucciones sacadas y las operaciones reducidas.
+    """
+    resumen = {"invariantes_sacadas": 0, "operaciones_reducidas": 0}
+    siguiente_temporal = max((t >> 2 for t in codigo.temporales()), default=-1) + 1
+    siguiente_etiqueta = max(codigo.prefijos, default=-1) + 1
+    insertadas = {}
+    eliminadas = set()
+    for _, inicio, fin in tramos_programa(codigo):
+        if fin == inicio:
+            continue
+        grafo = GrafoFlujo(codigo, inicio, fin)
+        if not grafo.bucles:
+            continue
+        tramo = BuclesTramo(codigo, grafo, siguiente_temporal, siguiente_etiqueta)
+        tramo.sacar_invariantes()
+        tramo.reducir_fuerza()
+        tramo.reescribir(insertadas, eliminadas)
+        siguiente_temporal = tramo.siguiente_temporal
+        siguiente_etiqueta = tramo.siguiente_etiqueta
+        for clave in resumen:
+            resumen[clave] += getattr(tramo, clave)
+    nuevas = codigo.insertar(insertadas)
+    codigo.eliminar({nuevas[i] for i in eliminadas})
+    return resumen
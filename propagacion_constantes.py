@@ -0,0 +1,341 @@
+"""
+Propagación de constantes condicional dispersa (SCCP) sobre el código intermedio.
+
+Cada tramo del programa (cada función y el código de primer nivel entre
+ellas) se analiza por separado sobre su GrafoFlujo:
+
+1. Se construye SSA (ssa.SSATramo) sin reescribir el código: basta con
+   saber qué definición llega a cada uso.
+2. Wegman-Zadeck: con una lista de aristas del grafo y otra de aristas SSA
+   se evalúan solo los bloques alcanzables con lo que se sabe hasta el
+   momento. Cada valor baja por el retículo sin_valor -> constante ->
+   no_constante como mucho dos veces, así que el coste es lineal en el
+   tamaño del tramo.
+3. Se reescribe el código: los usos con valor constante pasan a ser el
+   literal, las operaciones con resultado constante se pliegan en una
+   copia, los saltos condicionales con condición conocida se convierten en
+   goto o desaparecen, y se borran los bloques que nunca se ejecutan.
+
+Semántica que se respeta:
+- Las operaciones enteras son las de C (división truncada hacia cero, el
+  resto toma el signo del dividendo) y no se pliegan si dividen por cero o
+  se salen del rango de int de 32 bits.
+- No se pliega aritmética con operandos float (su precisión en la máquina
+  destino no está fijada); sí se propagan las constantes float.
+- Una copia a una variable toma el tipo declarado: un entero asignado a
+  una variable float vale como float. Si el nombre se declara con tipos
+  distintos en ámbitos distintos, sus valores enteros no se propagan.
+- Los valores de entrada al tramo (parámetros, globales) son desconocidos,
+  y una llamada puede modificar cualquier variable global.
+"""
+import operator
+
+from grafo_flujo import GrafoFlujo, tramos_programa
+from intermedio import (CODIGO_OPERACION, COMPARACION_DE_SALTO, CONSTANTE, NOMBRE, OP_COPIA,
+                        OP_LLAMADA, OP_SALTO, OP_SALTO_SI_FALSO, OP_PRIMERA_BINARIA, OP_ULTIMA_BINARIA,
+                        SIN_OPERANDO, es_salto_condicional)
+from ssa import SSATramo
+
+# Retículo: _SIN_VALOR (todavía no se sabe nada), una constante o _VARIABLE
+_SIN_VALOR = object()
+_VARIABLE = object()
+
+_ENTERO_MINIMO = -2 ** 31
+_ENTERO_MAXIMO = 2 ** 31 - 1
+
+OP_AND = CODIGO_OPERACION["AND_LOGICO"]
+OP_OR = CODIGO_OPERACION["OR_LOGICO"]
+OP_DIVISION = CODIGO_OPERACION["DIVISION"]
+OP_MODULO = CODIGO_OPERACION["MODULO"]
+
+_ARITMETICA = {
+    CODIGO_OPERACION["SUMA"]: operator.add,
+    CODIGO_OPERACION["RESTA"]: operator.sub,
+    CODIGO_OPERACION["MULTIPLICACION"]: operator.mul,
+}
+_COMPARACIONES = {
+    CODIGO_OPERACION["IGUAL_IGUAL"]: operator.eq,
+    CODIGO_OPERACION["DIFERENTE"]: operator.ne,
+    CODIGO_OPERACION["MENOR_QUE"]: operator.lt,
+    CODIGO_OPERACION["MAYOR_QUE"]: operator.gt,
+    CODIGO_OPERACION["MENOR_IGUAL"]: operator.le,
+    CODIGO_OPERACION["MAYOR_IGUAL"]: operator.ge,
+}
+
+
+def _division_c(a, b):
+    cociente = abs(a) // abs(b)
+    return cociente if (a < 0) == (b < 0) else -cociente
+
+
+def plegar(op, a, b):
+    """
+    Valor de 'a <op> b' en el retículo. && y || se resuelven con un solo
+    operando conocido cuando este decide el resultado.
+    """
+    if op == OP_AND or op == OP_OR:
+        absorbente = 0 if op == OP_AND else 1
+        for x in (a, b):
+            if x is not _SIN_VALOR and x is not _VARIABLE and bool(x) == bool(absorbente):
+                return absorbente
+        if a is _SIN_VALOR or b is _SIN_VALOR:
+            return _SIN_VALOR
+        if a is _VARIABLE or b is _VARIABLE:
+            return _VARIABLE
+        return int(bool(a) and bool(b)) if op == OP_AND else int(bool(a) or bool(b))
+
+    if a is _SIN_VALOR or b is _SIN_VALOR:
+        return _SIN_VALOR
+    if a is _VARIABLE or b is _VARIABLE or type(a) is not int or type(b) is not int:
+        return _VARIABLE
+
+    if op in _COMPARACIONES:
+        return int(_COMPARACIONES[op](a, b))
+    if op in _ARITMETICA:
+        resultado = _ARITMETICA[op](a, b)
+    elif b == 0:
+        return _VARIABLE  # división por cero: se deja para la ejecución
+    elif op == OP_DIVISION:
+        resultado = _division_c(a, b)
+    elif op == OP_MODULO:
+        resultado = a - b * _division_c(a, b)
+    else:
+        return _VARIABLE
+    if not _ENTERO_MINIMO <= resultado <= _ENTERO_MAXIMO:
+        return _VARIABLE
+    return resultado
+
+
+def _mismo_valor(a, b):
+    return type(a) is type(b) and a == b
+
+
+class PropagacionTramo(SSATramo):
+    """SCCP sobre las instrucciones de un GrafoFlujo"""
+
+    def __init__(self, codigo, grafo):
+        super().__init__(codigo, grafo)
+        self.constantes = {}  # operando CONSTANTE -> valor
+        self.reticulo = []  # valor SSA -> valor en el retículo
+
+        self.plegadas = 0
+        self.sustituidos = 0
+        self.saltos_resueltos = 0
+        self.bloques_eliminados = 0
+
+    def _nuevo_valor(self):
+        self.reticulo.append(_SIN_VALOR)
+        return super()._nuevo_valor()
+
+    def _valor_desconocido(self):
+        valor = super()._valor_desconocido()
+        self.reticulo[valor] = _VARIABLE
+        return valor
+
+    # ---- propagación ----
+
+    def _valor_operando(self, operando, valor_ssa):
+        if valor_ssa is not None:
+            return self.reticulo[valor_ssa]
+        if operando != SIN_OPERANDO and operando & 3 == CONSTANTE:
+            valor = self.constantes.get(operando)
+            if valor is None:
+                valor = self.constantes[operando] = self.codigo.valor_constante(operando)
+            return valor
+        return _VARIABLE
+
+    def _fijar(self, valor_ssa, nuevo):
+        anterior = self.reticulo[valor_ssa]
+        if anterior is _VARIABLE or nuevo is _SIN_VALOR:
+            return
+        if anterior is _SIN_VALOR:
+            self.reticulo[valor_ssa] = nuevo
+        elif nuevo is _VARIABLE or not _mismo_valor(anterior, nuevo):
+            self.reticulo[valor_ssa] = _VARIABLE
+        else:
+            return
+        self.pendientes_ssa.append(valor_ssa)
+
+    def _con_tipo(self, destino, valor):
+        """Valor que guarda una copia a 'destino' según su tipo declarado"""
+        if destino & 3 != NOMBRE or valor is _SIN_VALOR or valor is _VARIABLE or type(valor) is float:
+            return valor
+        tipo = self.codigo.tipos.get(self.codigo.nombres[destino >> 2])
+        if tipo == "float":
+            return float(valor)
+        if tipo in ("int", "bool"):
+            return valor
+        return _VARIABLE
+
+    def _evaluar(self, i, b):
+        codigo = self.codigo
+        op = codigo.ops[i]
+        if OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA:
+            a = self._valor_operando(codigo.fuentes1[i], self.valor_uso1.get(i))
+            c = self._valor_operando(codigo.fuentes2[i], self.valor_uso2.get(i))
+            self._fijar(self.valor_definido[i], plegar(op, a, c))
+        elif op == OP_COPIA:
+            valor = self._valor_operando(codigo.fuentes1[i], self.valor_uso1.get(i))
+            self._fijar(self.valor_definido[i], self._con_tipo(codigo.destinos[i], valor))
+        elif op == OP_LLAMADA:
+            self._fijar(self.valor_definido[i], _VARIABLE)
+        elif es_salto_condicional(op):
+            salta = self._salta(i)
+            if salta is _SIN_VALOR:
+                return
+            destino = self.grafo.bloque_de_etiqueta.get(codigo.destinos[i])
+            siguiente = b + 1 if b + 1 < len(self.grafo) else None
+            if salta is _VARIABLE or salta:
+                self._arista(b, destino)
+            if salta is _VARIABLE or not salta:
+                self._arista(b, siguiente)
+
+    def _salta(self, i):
+        """Si el salto condicional i se toma: True, False, _SIN_VALOR o _VARIABLE"""
+        codigo = self.codigo
+        op = codigo.ops[i]
+        a = self._valor_operando(codigo.fuentes1[i], self.valor_uso1.get(i))
+        if op == OP_SALTO_SI_FALSO:
+            resultado = a
+            if resultado is not _SIN_VALOR and resultado is not _VARIABLE:
+                return not resultado
+        else:
+            c = self._valor_operando(codigo.fuentes2[i], self.valor_uso2.get(i))
+            resultado = plegar(COMPARACION_DE_SALTO[op], a, c)
+            if resultado is not _SIN_VALOR and resultado is not _VARIABLE:
+                return bool(resultado)
+        return resultado
+
+    def _arista(self, origen, destino):
+        if destino is not None and (origen, destino) not in self.aristas:
+            self.pendientes_flujo.append((origen, destino))
+
+    def _evaluar_phi(self, phi):
+        b = self.phi_bloque[phi]
+        if b == 0:
+            # La entrada del tramo llega con el valor desconocido
+            self._fijar(self.phi_valor[phi], _VARIABLE)
+            return
+        resultado = _SIN_VALOR
+        for p, valor_ssa in zip(self.grafo.predecesores[b], self.phi_argumentos[phi]):
+            if (p, b) not in self.aristas:
+                continue
+            valor = self.reticulo[valor_ssa]
+            if valor is _SIN_VALOR:
+                continue
+            if resultado is _SIN_VALOR:
+                resultado = valor
+            elif valor is _VARIABLE or not _mismo_valor(resultado, valor):
+                resultado = _VARIABLE
+                break
+        self._fijar(self.phi_valor[phi], resultado)
+
+    def propagar(self):
+        grafo = self.grafo
+        codigo = self.codigo
+        self.ejecutable = ejecutable = bytearray(len(grafo))
+        self.aristas = set()
+        self.pendientes_flujo = [(-1, 0)]
+        self.pendientes_ssa = []
+        bloque_de = {}
+
+        while self.pendientes_flujo or self.pendientes_ssa:
+            while self.pendientes_flujo:
+                arista = self.pendientes_flujo.pop()
+                if arista in self.aristas:
+                    continue
+                self.aristas.add(arista)
+                b = arista[1]
+                for phi in self.phis.get(b, ()):
+                    self._evaluar_phi(phi)
+                if ejecutable[b]:
+                    continue
+                ejecutable[b] = 1
+                for i in grafo.instrucciones(b):
+                    bloque_de[i] = b
+                    self._evaluar(i, b)
+                if not es_salto_condicional(codigo.ops[grafo.fines[b] - 1]):
+                    for s in grafo.sucesores[b]:
+                        self._arista(b, s)
+
+            while self.pendientes_ssa:
+                valor_ssa = self.pendientes_ssa.pop()
+                for usuario in self.usuarios[valor_ssa]:
+                    if usuario < 0:
+                        if ejecutable[self.phi_bloque[~usuario]]:
+                            self._evaluar_phi(~usuario)
+                    elif usuario in bloque_de:
+                        self._evaluar(usuario, bloque_de[usuario])
+
+    # ---- reescritura ----
+
+    def _constante(self, valor):
+        self.sustituidos += 1
+        return self.codigo.constante_de_valor(valor)
+
+    def _conocido(self, valor_ssa):
+        if valor_ssa is None:
+            return False
+        valor = self.reticulo[valor_ssa]
+        return valor is not _SIN_VALOR and valor is not _VARIABLE
+
+    def reescribir(self, eliminadas):
+        grafo = self.grafo
+        codigo = self.codigo
+        reticulo = self.reticulo
+        for b in range(len(grafo)):
+            if not self.ejecutable[b]:
+                self.bloques_eliminados += 1
+                eliminadas.update(grafo.instrucciones(b))
+                continue
+            for i in grafo.instrucciones(b):
+                op = codigo.ops[i]
+                definido = self.valor_definido.get(i)
+                if OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA and self._conocido(definido):
+                    codigo.ops[i] = OP_COPIA
+                    codigo.fuentes1[i] = codigo.constante_de_valor(reticulo[definido])
+                    codigo.fuentes2[i] = SIN_OPERANDO
+                    self.plegadas += 1
+                    continue
+                salta = self._salta(i) if es_salto_condicional(op) else _VARIABLE
+                if salta is not _VARIABLE and salta is not _SIN_VALOR:
+                    self.saltos_resueltos += 1
+                    if salta:
+                        codigo.ops[i] = OP_SALTO
+                        codigo.fuentes1[i] = SIN_OPERANDO
+                        codigo.fuentes2[i] = SIN_OPERANDO
+                    else:
+                        eliminadas.add(i)
+                    continue
+                if self._conocido(self.valor_uso1.get(i)):
+                    codigo.fuentes1[i] = self._constante(reticulo[self.valor_uso1[i]])
+                if self._conocido(self.valor_uso2.get(i)):
+                    codigo.fuentes2[i] = self._constante(reticulo[self.valor_uso2[i]])
+                if op == OP_LLAMADA:
+                    argumentos = codigo.argumentos[codigo.fuentes2[i]]
+                    valores = self.valor_argumentos[i]
+                    if any(v >= 0 and self._conocido(v) for v in valores):
+                        codigo.argumentos[codigo.fuentes2[i]] = tuple(
+                            self._constante(reticulo[v]) if v >= 0 and self._conocido(v) else a
+                            for a, v in zip(argumentos, valores))
+
+
+def propagar_constantes(codigo):
+    """
+    Aplica SCCP a cada tramo del programa. Devuelve un diccionario con lo
+    que ha hecho (operaciones plegadas, usos sustituidos, saltos resueltos y
+    bloques eliminados).
+    """
+    eliminadas = set()
+    resumen = {"plegadas": 0, "sustituidos": 0, "saltos_resueltos": 0, "bloques_eliminados": 0}
+    for _, inicio, fin in tramos_programa(codigo):
+        if fin == inicio:
+            continue
+        tramo = PropagacionTramo(codigo, GrafoFlujo(codigo, inicio, fin))
+        tramo.construir_ssa()
+        tramo.propagar()
+        tramo.reescribir(eliminadas)
+        for clave in resumen:
+            resumen[clave] += getattr(tramo, clave)
+    codigo.eliminar(eliminadas)
+    return resumen
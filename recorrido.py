@@ -0,0 +1,46 @@
+"""
+Recorridos sin recursión de Python.
+
+Las fases que recorren estructuras anidadas (parser, verificador semántico y
+generador de código) escriben cada visita como un generador. Donde antes
+se llamaban recursivamente, ahora ceden la sub-visita:
+
+    tipo = yield self.visitar(hijo)
+
+ejecutar() guarda en una pila explícita las visitas suspendidas y reanuda
+cada una con el resultado de la que cedió, así que la profundidad del
+anidamiento queda limitada por la memoria y no por sys.getrecursionlimit().
+
+Ceder algo que no es un generador lo devuelve tal cual: las visitas de las
+hojas pueden seguir siendo funciones normales que devuelven su valor, sin
+crear un generador por nodo.
+
+Una excepción en cualquier visita sale directamente de ejecutar(); las
+visitas suspendidas se descartan (ninguna fase captura errores de sus
+sub-visitas, y así la traza no crece con la profundidad).
+"""
+from types import GeneratorType
+
+
+def ejecutar(tarea):
+    """Ejecuta 'tarea' (un generador o un valor ya calculado) y devuelve su resultado"""
+    if type(tarea) is not GeneratorType:
+        return tarea
+
+    pila = [tarea]
+    valor = None
+    while True:
+        try:
+            subtarea = pila[-1].send(valor)
+        except StopIteration as fin:
+            pila.pop()
+            if not pila:
+                return fin.value
+            valor = fin.value
+            continue
+
+        if type(subtarea) is GeneratorType:
+            pila.append(subtarea)
+            valor = None
+        else:
+            valor = subtarea
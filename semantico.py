@@ -1,4 +1,19 @@
 from copy import deepcopy
+from types import GeneratorType
+
+from ClassParser import CODIGO_NODO, tabla_despacho
+from recorrido import ejecutar
+from traza import traza, INFO
+
+NODO_ASIGNACION = CODIGO_NODO["Asignacion"]
+NODO_BLOQUE = CODIGO_NODO["Bloque"]
+NODO_FUNCION = CODIGO_NODO["Funcion"]
+NODO_IF = CODIGO_NODO["If"]
+NODO_NUMERO = CODIGO_NODO["Numero"]
+NODO_RETURN = CODIGO_NODO["Return"]
+# Sentencias con ámbito propio: sus declaraciones no son globales
+NODOS_CON_AMBITO = frozenset(CODIGO_NODO[nombre] for nombre in ("Bloque", "If", "While", "For"))
+
 class AnalizadorSemantico:
     def __init__(self):
         self.funciones = {}  # nombre -> (tipo_retorno, parametros)
@@ -6,7 +21,7 @@ class AnalizadorSemantico:
         self.tipo_retorno_actual = None
 
 def verificar_funciones(nodo, pila_ambitos, funcion_actual, funciones_registradas, errores):
-    if nodo.nombre == "Funcion":
+    if nodo.clase == NODO_FUNCION:
         nombre_funcion = nodo.valor
         tipo_retorno = nodo.hijos[0].valor  # TipoRetorno
         parametros = nodo.hijos[1]
@@ -37,7 +52,12 @@ def verificar_bloque_con_retorno(nodo, pila_ambitos, tipo_retorno_esperado, erro
     """
     Verifica que todas las rutas de ejecución retornen un valor del tipo correcto
     """
-    if nodo.nombre == "Return":
+    return ejecutar(_verificar_bloque_con_retorno(nodo, pila_ambitos, tipo_retorno_esperado, errores))
+
+
+def _verificar_bloque_con_retorno(nodo, pila_ambitos, tipo_retorno_esperado, errores):
+    clase = nodo.clase
+    if clase == NODO_RETURN:
         expresion = nodo.hijos[0] if nodo.hijos else None
         
         if tipo_retorno_esperado == "void" and expresion is not None:
@@ -47,365 +67,316 @@ def verificar_bloque_con_retorno(nodo, pila_ambitos, tipo_retorno_esperado, erro
             errores.append(f"Error semántico: se esperaba retornar un valor de tipo '{tipo_retorno_esperado}'")
             return True
         elif expresion is not None:
-            tipo_expresion = verificar_tipos(expresion, pila_ambitos, errores)
+            # Tipo de la expresión con los tipos visibles en pila_ambitos
+            verificador = VerificadorSemantico()
+            for ambito in pila_ambitos:
+                verificador.tipos_globales.update(ambito)
+            tipo_expresion = yield verificador.visitar(expresion)
+            errores.extend(verificador.errores_tipos)
             if tipo_expresion != tipo_retorno_esperado:
                 errores.append(f"Error semántico: tipo de retorno '{tipo_expresion}' no coincide con '{tipo_retorno_esperado}'")
         return True
     
-    elif nodo.nombre == "If":
+    elif clase == NODO_IF:
         # Verificar si ambas ramas retornan
         bloque_if = nodo.hijos[1]
-        tiene_retorno_if = verificar_bloque_con_retorno(bloque_if, pila_ambitos, tipo_retorno_esperado, errores)
+        tiene_retorno_if = yield _verificar_bloque_con_retorno(bloque_if, pila_ambitos, tipo_retorno_esperado, errores)
         
         if len(nodo.hijos) > 2:
             bloque_else = nodo.hijos[2]
-            tiene_retorno_else = verificar_bloque_con_retorno(bloque_else, pila_ambitos, tipo_retorno_esperado, errores)
+            tiene_retorno_else = yield _verificar_bloque_con_retorno(bloque_else, pila_ambitos, tipo_retorno_esperado, errores)
             return tiene_retorno_if and tiene_retorno_else
         else:
             return False  # If sin else puede no retornar
     
-    elif nodo.nombre == "Bloque":
+    elif clase == NODO_BLOQUE:
         # Verificar todas las instrucciones del bloque
         for hijo in nodo.hijos:
-            if verificar_bloque_con_retorno(hijo, pila_ambitos, tipo_retorno_esperado, errores):
+            if (yield _verificar_bloque_con_retorno(hijo, pila_ambitos, tipo_retorno_esperado, errores)):
                 return True
         return False
     
     # Para otras instrucciones, no contribuyen al retorno
     return False
-def verificar_usos(nodo, pila_ambitos, errores, tokens_info=None):
+
+
+class VerificadorSemantico:
     """
-    Verifica uso correcto de variables con mejores mensajes de error
+    Recorrido único del AST que verifica declaraciones y usos de variables,
+    tipos y divisiones por cero con una sola pila de ámbitos. Cada
+    verificación acumula sus errores por separado y al final se concatenan:
+    primero los de usos, luego los de tipos y por último los de divisiones.
     """
-    def agregar_error(mensaje, nodo_error=None):
-        if tokens_info and hasattr(nodo_error, '_token_pos'):
-            num_linea, columna, _, linea_original = tokens_info[nodo_error._token_pos]
+
+    OPERADORES_ARITMETICOS = ("SUMA", "RESTA", "MULTIPLICACION", "DIVISION")
+    OPERADORES_COMPARACION = ("MAYOR_QUE", "MENOR_QUE", "MAYOR_IGUAL", "MENOR_IGUAL")
+    OPERADORES_IGUALDAD = ("IGUAL_IGUAL", "DIFERENTE")
+    OPERADORES_LOGICOS = ("AND_LOGICO", "OR_LOGICO")
+
+    def __init__(self, tokens_info=None):
+        self.tokens_info = tokens_info
+        self.pila_ambitos = [{}]
+        # Cuántos ámbitos abiertos declaran cada nombre: la búsqueda no
+        # depende de la profundidad del anidamiento
+        self.declaraciones = {}
+        # La verificación de tipos ve el ámbito global tal como queda al
+        # terminar la de usos (antes se ejecutaba después, sobre la misma pila)
+        self.tipos_globales = {}
+        self.errores_usos = []
+        self.errores_tipos = []
+        self.errores_division = []
+
+    def verificar(self, arbol):
+        self.recoger_globales(arbol)
+        ejecutar(self.visitar(arbol))
+        return self.errores_usos + self.errores_tipos + self.errores_division
+
+    def recoger_globales(self, arbol):
+        """Tipos de las declaraciones que quedan en el ámbito global al terminar"""
+        pendientes = [arbol]
+        while pendientes:
+            nodo = pendientes.pop()
+            if nodo is None or nodo.clase in NODOS_CON_AMBITO:
+                continue
+            if nodo.clase == NODO_ASIGNACION:
+                var_node = nodo.hijos[0]
+                if var_node.tipo is not None:
+                    self.tipos_globales[var_node.valor] = var_node.tipo
+                continue
+            pendientes.extend(reversed(nodo.hijos))
+
+    # ======== ERRORES ========
+    def error_uso(self, mensaje, nodo_error=None):
+        if self.tokens_info and getattr(nodo_error, 'token_pos', None) is not None:
+            num_linea, columna, _, linea_original = self.tokens_info.ubicacion(nodo_error.token_pos)
             error_completo = f"Error semántico en línea {num_linea}, columna {columna}:\n"
             error_completo += f"  {mensaje}\n"
             error_completo += f"  Línea: {linea_original}\n"
             error_completo += f"  {' ' * (columna-1)}^"
-            errores.append(error_completo)
+            self.errores_usos.append(error_completo)
         else:
-            errores.append(f"Error semántico: {mensaje}")
-    
-    if nodo.nombre == "Asignacion":
-        var_node = nodo.hijos[0]
-        nombre_var = var_node.valor
-        tipo_var = var_node.tipo
-        
-        if tipo_var is not None:  # Declaración
-            # ✅ PERMITIR SHADOWING - siempre insertar en ámbito actual
-            # No verificamos si ya existe en ámbito actual porque el parser ya lo hizo
-            pila_ambitos[-1][nombre_var] = tipo_var
-        else:  # Asignación
-            # Buscar en todos los ámbitos (padres incluidos)
-            if buscar_en_ambitos(pila_ambitos, nombre_var) is None:
-                agregar_error(f"La variable '{nombre_var}' no ha sido declarada", var_node)
-
-    elif nodo.nombre == "Variable":
-        nombre_var = nodo.valor
-        if buscar_en_ambitos(pila_ambitos, nombre_var) is None:
-            agregar_error(f"La variable '{nombre_var}' no ha sido declarada", nodo)
-
-    elif nodo.nombre == "Bloque":
-        # Crear un nuevo ámbito local
-        pila_ambitos.append({})
-        for hijo in nodo.hijos:
-            verificar_usos(hijo, pila_ambitos, errores)
-        pila_ambitos.pop()
-        return
+            self.errores_usos.append(f"Error semántico: {mensaje}")
 
-    # ESTRUCTURAS DE CONTROL DE FLUJO
-    elif nodo.nombre == "If":
-        # Verificar condición en ámbito actual
-        condicion = nodo.hijos[0]
-        verificar_usos(condicion, pila_ambitos, errores)
-        
-        # Bloque if (ámbito propio)
-        pila_ambitos.append({})
-        verificar_usos(nodo.hijos[1], pila_ambitos, errores)
-        pila_ambitos.pop()
-        
-        # Bloque else si existe (ámbito propio)
-        if len(nodo.hijos) > 2:
-            pila_ambitos.append({})
-            verificar_usos(nodo.hijos[2], pila_ambitos, errores)
-            pila_ambitos.pop()
-        return
+    def error_tipos(self, mensaje, nodo_error=None):
+        if self.tokens_info and nodo_error and getattr(nodo_error, 'token_pos', None) is not None:
+            num_linea, columna, _, linea_original = self.tokens_info.ubicacion(nodo_error.token_pos)
+            error_completo = f" ERROR DE TIPOS - Línea {num_linea}, Columna {columna}:\n"
+            error_completo += f"   {mensaje}\n"
+            error_completo += f"   {linea_original}\n"
+            error_completo += f"   {' ' * (columna-1)}^\n"
+            self.errores_tipos.append(error_completo)
+        else:
+            self.errores_tipos.append(f" ERROR DE TIPOS: {mensaje}")
 
-    elif nodo.nombre == "While":
-        # Verificar condición en ámbito actual
-        condicion = nodo.hijos[0]
-        verificar_usos(condicion, pila_ambitos, errores)
-        
-        # Bloque while (ámbito propio)
-        pila_ambitos.append({})
-        verificar_usos(nodo.hijos[1], pila_ambitos, errores)
-        pila_ambitos.pop()
-        return
+    def error_division(self, nodo):
+        posicion = nodo.token_pos if self.tokens_info else None
+        if posicion is not None:
+            num_linea, columna, _, linea_original = self.tokens_info.ubicacion(posicion)
+            error_msg = f"❌ ERROR ARITMÉTICO - Línea {num_linea}, Columna {columna}:\n"
+            error_msg += f"   DIVISIÓN POR CERO - No se puede dividir entre cero\n"
+            error_msg += f"   {linea_original}\n"
+            error_msg += f"   {' ' * (columna-1)}^\n"
+            self.errores_division.append(error_msg)
+        else:
+            self.errores_division.append("❌ ERROR ARITMÉTICO: División por cero detectada")
 
-    elif nodo.nombre == "For":
-        # CREAR ÁMBITO ESPECÍFICO PARA EL FOR
-        pila_ambitos.append({})  # Nuevo ámbito para el for
-        
-        # INICIALIZACIÓN: se verifica en el NUEVO ámbito del for
-        inicializacion = nodo.hijos[0]
-        if inicializacion is not None:
-            verificar_usos(inicializacion, pila_ambitos, errores)
-        
-        # CONDICIÓN: se verifica en el MISMO ámbito del for  
-        condicion = nodo.hijos[1]
-        if condicion is not None:
-            verificar_usos(condicion, pila_ambitos, errores)
-        
-        # INCREMENTO: se verifica en el MISMO ámbito del for
-        incremento = nodo.hijos[2]
-        if incremento is not None:
-            verificar_usos(incremento, pila_ambitos, errores)
-        
-        # BLOQUE: se verifica en el MISMO ámbito del for
-        verificar_usos(nodo.hijos[3], pila_ambitos, errores)
-        
-        pila_ambitos.pop()  # Salir del ámbito del for
-        return
-    elif nodo.nombre == "Break" or nodo.nombre == "Continue":
-        # Verificar que estamos dentro de un bucle
-        # Por simplicidad, por ahora no verificamos esto
-        return
-    # Verificar hijos (recursión) - solo si no es una estructura ya procesada
-    if nodo.nombre not in ["If", "While", "For", "Bloque"]:
-        for hijo in nodo.hijos:
-            verificar_usos(hijo, pila_ambitos, errores)
+    # ======== ÁMBITOS ========
+    def abrir_ambito(self):
+        self.pila_ambitos.append({})
 
+    def cerrar_ambito(self):
+        declaraciones = self.declaraciones
+        for nombre in self.pila_ambitos.pop():
+            declaraciones[nombre] -= 1
 
-def buscar_en_ambitos(pila_ambitos, nombre_var):
-    """
-    Busca una variable desde el ámbito más interno hacia el global.
-    Permite shadowing - la variable más interna oculta las de ámbitos externos.
-    """
-    # Buscar desde el ámbito más reciente al más antiguo
-    for i in range(len(pila_ambitos) - 1, -1, -1):
-        if nombre_var in pila_ambitos[i]:
-            return pila_ambitos[i][nombre_var]
-    return None 
+    def declarar(self, nombre, tipo):
+        ambito = self.pila_ambitos[-1]
+        if nombre not in ambito:
+            self.declaraciones[nombre] = self.declaraciones.get(nombre, 0) + 1
+        ambito[nombre] = tipo
 
-def verificar_tipos(nodo, pila_ambitos, errores, tokens_info=None):
-    """
-    Verifica compatibilidad de tipos, respetando los límites de cada ámbito.
-    """
-    def agregar_error_tipos(mensaje, nodo_error=None):
-        if tokens_info and nodo_error and hasattr(nodo_error, '_token_pos'):
-            try:
-                num_linea, columna, _, valor, linea_original = tokens_info[nodo_error._token_pos]
-                error_completo = f" ERROR DE TIPOS - Línea {num_linea}, Columna {columna}:\n"
-                error_completo += f"   {mensaje}\n"
-                error_completo += f"   {linea_original}\n"
-                error_completo += f"   {' ' * (columna-1)}^\n"
-                errores.append(error_completo)
-            except (IndexError, AttributeError):
-                errores.append(f" ERROR DE TIPOS: {mensaje}")
-        else:
-            errores.append(f" ERROR DE TIPOS: {mensaje}")
-    
-    if nodo.nombre == "Bloque":
-        pila_ambitos.append({})
+    def declarada(self, nombre):
+        """True si algún ámbito abierto declara 'nombre'"""
+        return self.declaraciones.get(nombre, 0) > 0
+
+    # ======== RECORRIDO ========
+    def visitar(self, nodo):
+        """
+        Visita de 'nodo' y su subárbol, para ejecutar() o ceder desde otra
+        visita; su resultado es el tipo de la expresión o None
+        """
+        try:
+            metodo = self.DESPACHO[nodo.clase]
+        except IndexError:  # clase registrada después de construir la tabla
+            metodo = None
+        if metodo is None:
+            return self.visitar_hijos(nodo)
+        return metodo(self, nodo)
+
+    def visitar_hijos(self, nodo):
         for hijo in nodo.hijos:
-            verificar_tipos(hijo, pila_ambitos, errores, tokens_info)
-        pila_ambitos.pop()
+            if hijo is not None:
+                yield self.visitar(hijo)
         return None
 
-    # VALIDACIÓN DE ESTRUCTURAS DE CONTROL
-    elif nodo.nombre == "If":
-        condicion = nodo.hijos[0]
-        tipo_cond = verificar_tipos(condicion, pila_ambitos, errores, tokens_info)
-        
-        # Verificar que la condición sea booleana
-        if tipo_cond and tipo_cond != "bool":
-            agregar_error_tipos(f"La condición del 'if' debe ser booleana, no '{tipo_cond}'", nodo)
-        
-        # Verificar bloques
-        pila_ambitos.append({})
-        verificar_tipos(nodo.hijos[1], pila_ambitos, errores, tokens_info)
-        pila_ambitos.pop()
-        
-        if len(nodo.hijos) > 2:
-            pila_ambitos.append({})
-            verificar_tipos(nodo.hijos[2], pila_ambitos, errores, tokens_info)
-            pila_ambitos.pop()
-        return None
+    def visitar_Numero(self, nodo):
+        return "float" if "." in (nodo.valor or "") else "int"
 
-    elif nodo.nombre == "While":
-        condicion = nodo.hijos[0]
-        tipo_cond = verificar_tipos(condicion, pila_ambitos, errores, tokens_info)
-        
-        # Verificar que la condición sea booleana
-        if tipo_cond and tipo_cond != "bool":
-            agregar_error_tipos(f"La condición del 'while' debe ser booleana, no '{tipo_cond}'", nodo)
-        
-        pila_ambitos.append({})
-        verificar_tipos(nodo.hijos[1], pila_ambitos, errores, tokens_info)
-        pila_ambitos.pop()
-        return None
+    def visitar_Booleano(self, nodo):
+        return "bool"
 
-    elif nodo.nombre == "For":
-        # Crear ámbito para el bloque for
-        pila_ambitos.append({})
-        
-        # Inicialización
-        inicializacion = nodo.hijos[0]
-        if inicializacion is not None:
-            verificar_tipos(inicializacion, pila_ambitos, errores, tokens_info)
-        
-        # Condición (debe ser booleana si existe)
-        condicion = nodo.hijos[1]
-        if condicion is not None:
-            tipo_cond = verificar_tipos(condicion, pila_ambitos, errores, tokens_info)
-            if tipo_cond and tipo_cond != "bool":
-                agregar_error_tipos(f"La condición del 'for' debe ser booleana, no '{tipo_cond}'", nodo)
-        
-        # Incremento
-        incremento = nodo.hijos[2]
-        if incremento is not None:
-            verificar_tipos(incremento, pila_ambitos, errores, tokens_info)
-        
-        # Bloque
-        verificar_tipos(nodo.hijos[3], pila_ambitos, errores, tokens_info)
-        
-        pila_ambitos.pop()
+    def visitar_Bloque(self, nodo):
+        self.abrir_ambito()
+        for hijo in nodo.hijos:
+            yield self.visitar(hijo)
+        self.cerrar_ambito()
+
+    def visitar_If(self, nodo):
+        return self.visitar_condicional(nodo, "if")
+
+    def visitar_While(self, nodo):
+        return self.visitar_condicional(nodo, "while")
+
+    def visitar_Break(self, nodo):
         return None
 
-    # OPERACIONES
-    elif nodo.nombre == "BinOp":
-        tipo_izq = verificar_tipos(nodo.hijos[0], pila_ambitos, errores, tokens_info)
-        tipo_der = verificar_tipos(nodo.hijos[1], pila_ambitos, errores, tokens_info)
+    visitar_Continue = visitar_Break
+
+    def visitar_Asignacion(self, nodo):
+        var_node, expr_node = nodo.hijos
+        nombre_var = var_node.valor
+        tipo_var = var_node.tipo
+
+        if tipo_var is not None:  # Declaración (se permite shadowing)
+            self.declarar(nombre_var, tipo_var)
+        elif not self.declarada(nombre_var):
+            self.error_uso(f"La variable '{nombre_var}' no ha sido declarada", var_node)
+
+        self.visitar_Variable(var_node)
+        tipo_expr = yield self.visitar(expr_node)
+
+        tipo_var = tipo_var or self.tipos_globales.get(nombre_var)
+        if tipo_var is not None and tipo_expr is not None:
+            if tipo_var != tipo_expr:
+                # Permitir asignar int a float, pero no al revés
+                if not (tipo_var == "float" and tipo_expr == "int"):
+                    self.error_tipos(f"No se puede asignar '{tipo_expr}' a variable '{nombre_var}' de tipo '{tipo_var}'", nodo)
+        return tipo_var
+
+    def visitar_Variable(self, nodo):
+        if not self.declarada(nodo.valor):
+            self.error_uso(f"La variable '{nodo.valor}' no ha sido declarada", nodo)
+        return self.tipos_globales.get(nodo.valor)
+
+    def visitar_BinOp(self, nodo):
+        izquierda, derecha = nodo.hijos
         op = nodo.valor
 
+        if op == "/" and derecha.clase == NODO_NUMERO and derecha.valor in ("0", "0.0"):
+            self.error_division(nodo)
+
+        # (las hojas devuelven su tipo directamente, sin pasar por el motor)
+        tipo_izq = self.visitar(izquierda)
+        if type(tipo_izq) is GeneratorType:
+            tipo_izq = yield tipo_izq
+        tipo_der = self.visitar(derecha)
+        if type(tipo_der) is GeneratorType:
+            tipo_der = yield tipo_der
         if not tipo_izq or not tipo_der:
             return None
 
-        # Operadores aritméticos
-        if op in ["SUMA", "RESTA", "MULTIPLICACION", "DIVISION"]:
-            if tipo_izq in ["int", "float"] and tipo_der in ["int", "float"]:
-                return "float" if "float" in [tipo_izq, tipo_der] else "int"
-            else:
-                agregar_error_tipos(f"Operación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
-                return None
-        
-        # Operadores de comparación
-        elif op in ["MAYOR_QUE", "MENOR_QUE", "MAYOR_IGUAL", "MENOR_IGUAL"]:
-            if tipo_izq in ["int", "float"] and tipo_der in ["int", "float"]:
+        numericos = tipo_izq in ("int", "float") and tipo_der in ("int", "float")
+        if op in self.OPERADORES_ARITMETICOS:
+            if numericos:
+                return "float" if "float" in (tipo_izq, tipo_der) else "int"
+            self.error_tipos(f"Operación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
+        elif op in self.OPERADORES_COMPARACION:
+            if numericos:
                 return "bool"
-            else:
-                agregar_error_tipos(f"Comparación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
-                return None
-        
-        # Operadores de igualdad
-        elif op in ["IGUAL_IGUAL", "DIFERENTE"]:
-            if (tipo_izq == tipo_der) or (tipo_izq in ["int", "float"] and tipo_der in ["int", "float"]):
+            self.error_tipos(f"Comparación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
+        elif op in self.OPERADORES_IGUALDAD:
+            if tipo_izq == tipo_der or numericos:
                 return "bool"
-            else:
-                agregar_error_tipos(f"Comparación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
-                return None
-        
-        # Operadores lógicos
-        elif op in ["AND_LOGICO", "OR_LOGICO"]: 
+            self.error_tipos(f"Comparación '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
+        elif op in self.OPERADORES_LOGICOS:
             if tipo_izq == "bool" and tipo_der == "bool":
                 return "bool"
-            else:
-                agregar_error_tipos(f"Operación lógica '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
-                return None
+            self.error_tipos(f"Operación lógica '{op}' inválida entre '{tipo_izq}' y '{tipo_der}'", nodo)
+        return None
 
-    elif nodo.nombre == "Numero":
-        return "float" if "." in (nodo.valor or "") else "int"
+    def _verificar_condicion(self, condicion, nodo, palabra):
+        tipo_cond = yield self.visitar(condicion)
+        if tipo_cond and tipo_cond != "bool":
+            self.error_tipos(f"La condición del '{palabra}' debe ser booleana, no '{tipo_cond}'", nodo)
 
-    elif nodo.nombre == "Booleano":
-        return "bool"
+    def visitar_condicional(self, nodo, palabra):
+        """If y While: condición en el ámbito actual, cada bloque en uno propio"""
+        hijos = nodo.hijos
+        yield self._verificar_condicion(hijos[0], nodo, palabra)
+        for bloque in hijos[1:]:
+            self.abrir_ambito()
+            yield self.visitar(bloque)
+            self.cerrar_ambito()
 
-    elif nodo.nombre == "Variable":
-        return buscar_en_ambitos(pila_ambitos, nodo.valor)
+    def visitar_For(self, nodo):
+        inicializacion, condicion, incremento, bloque = nodo.hijos
+        self.abrir_ambito()
+        if inicializacion is not None:
+            yield self.visitar(inicializacion)
+        if condicion is not None:
+            yield self._verificar_condicion(condicion, nodo, "for")
+        if incremento is not None:
+            yield self.visitar(incremento)
+        yield self.visitar(bloque)
+        self.cerrar_ambito()
 
-    elif nodo.nombre == "Asignacion":
-        var_node = nodo.hijos[0]
-        expr_node = nodo.hijos[1]
 
-        tipo_var = var_node.tipo or buscar_en_ambitos(pila_ambitos, var_node.valor)
-        tipo_expr = verificar_tipos(expr_node, pila_ambitos, errores, tokens_info)
+# Método visitar_<Clase> de cada código de nodo
+VerificadorSemantico.DESPACHO = tabla_despacho(VerificadorSemantico, "visitar_")
 
-        if tipo_var is not None and tipo_expr is not None:
-            if tipo_var != tipo_expr:
-                # Permitir asignar int a float, pero no al revés
-                if not (tipo_var == "float" and tipo_expr == "int"):
-                    agregar_error_tipos(f"No se puede asignar '{tipo_expr}' a variable '{var_node.valor}' de tipo '{tipo_var}'", nodo)
-        return tipo_var
 
-    # Por defecto, revisar hijos
-    for hijo in nodo.hijos:
-        verificar_tipos(hijo, pila_ambitos, errores, tokens_info)
-    return None
-def verificar_division_por_cero(nodo, errores, tokens_info=None):
-    """Verifica divisiones por cero"""
-    
-    if nodo.nombre == "BinOp" and nodo.valor == "/":
-        derecho = nodo.hijos[1]
-        
-        # Verificar división por cero literal
-        if derecho.nombre == "Numero" and derecho.valor in ["0", "0.0"]:
-            # Buscar posición en tokens_info
-            posicion = None
-            if tokens_info:
-                for i, token in enumerate(tokens_info):
-                    num_linea, columna, tipo, valor, linea_original = token
-                    if tipo == "DIVISION" and valor == "/":
-                        posicion = i
-                        break
-            
-            if posicion is not None:
-                num_linea, columna, _, _, linea_original = tokens_info[posicion]
-                error_msg = f"❌ ERROR ARITMÉTICO - Línea {num_linea}, Columna {columna}:\n"
-                error_msg += f"   DIVISIÓN POR CERO - No se puede dividir entre cero\n"
-                error_msg += f"   {linea_original}\n"
-                error_msg += f"   {' ' * (columna-1)}^\n"
-                errores.append(error_msg)
-            else:
-                errores.append("❌ ERROR ARITMÉTICO: División por cero detectada")
-    
-    # Verificar recursivamente en los hijos
-    for hijo in nodo.hijos:
-        verificar_division_por_cero(hijo, errores, tokens_info)
+def analizar_semantica(arbol, tokens_info=None, imprimir=True): 
+    if traza.nivel >= INFO:
+        traza.emitir("semantico", INFO, "Verificando usos, tipos y divisiones por cero...")
+    errores = VerificadorSemantico(tokens_info).verificar(arbol)
+    return concluir_analisis(arbol, errores, imprimir)
 
-def analizar_semantica(arbol, tokens_info=None): 
-    errores = []
-    pila_ambitos = [{}]
-    
-    print("\n[SEMÁNTICO] Verificando usos y declaraciones...")
-    verificar_usos(arbol, pila_ambitos, errores, tokens_info)  
-    
-    print("\n[SEMÁNTICO] Verificando compatibilidad de tipos...")
-    verificar_tipos(arbol, pila_ambitos, errores, tokens_info)  
-    
-    print("\n[SEMÁNTICO] Verificando divisiones por cero...")
-    verificar_division_por_cero(arbol, errores, tokens_info) 
+def concluir_analisis(arbol, errores, imprimir=True):
+    """
+    Añade a 'errores' las advertencias de la tabla de símbolos, imprime (si
+    'imprimir') el informe_semantico() y devuelve (tabla_global, errores).
+    Común al análisis en serie y al paralelo por funciones.
+    """
+    tabla = arbol.tabla_global if hasattr(arbol, 'tabla_global') else None
     
     # Verificaciones de tabla de símbolos
-    if hasattr(arbol, 'tabla_global') and arbol.tabla_global:
-        print("\n[SEMÁNTICO] Verificaciones de tabla de símbolos...")
-        verificar_tabla_simbolos(arbol.tabla_global, errores)
-        
-        # IMPRIMIR TABLA DE SÍMBOLOS
-        arbol.tabla_global.imprimir_tabla()
-    else:
-        print("\n No se encontró tabla de símbolos para verificar")
+    if tabla:
+        if traza.nivel >= INFO:
+            traza.emitir("semantico", INFO, "Verificaciones de tabla de símbolos...")
+        verificar_tabla_simbolos(tabla, errores)
+    elif traza.nivel >= INFO:
+        traza.emitir("semantico", INFO, "No se encontró tabla de símbolos para verificar")
     
-    print("\n[✔] Análisis semántico completado.")
+    if traza.nivel >= INFO:
+        traza.emitir("semantico", INFO, "Análisis semántico completado")
+    
+    if imprimir:
+        print(informe_semantico(tabla, errores))
+    return tabla, errores
+
+def informe_semantico(tabla, errores):
+    """Texto con la tabla de símbolos y los errores del análisis semántico"""
+    lineas = []
+    if tabla:
+        lineas.append(tabla.texto_tabla())
     
     if errores:
-        print("\n[ERRORES SEMÁNTICOS DETECTADOS]")
+        lineas.append("\n[ERRORES SEMÁNTICOS DETECTADOS]")
         for error in errores:
-            print(f"{error}\n")
+            lineas.append(f"{error}\n")
     else:
-        print("\n No se encontraron errores semánticos")
-
-    return arbol.tabla_global if hasattr(arbol, 'tabla_global') else None, errores
+        lineas.append("\n No se encontraron errores semánticos")
+    return "\n".join(lineas)
 
 def verificar_tabla_simbolos(tabla, errores):
     """Verifica problemas comunes en la tabla de símbolos"""
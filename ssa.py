@@ -0,0 +1,202 @@
+"""
+SSA de un tramo del código intermedio, solo como análisis.
+
+No se reescribe el código: SSATramo numera cada definición de una variable
+(o temporal) como un valor y anota, para cada uso, qué valor le llega. Los
+nodos phi se colocan en la frontera de dominancia iterada (SSA semipodada:
+solo para las variables que se leen en un bloque distinto del que las
+define) y el renombrado recorre el árbol de dominadores sin recursión.
+
+Los valores desconocidos también son valores: cada variable tiene uno
+propio a la entrada del tramo, y cada llamada da uno nuevo a cada variable
+global, porque la función llamada puede modificarla.
+"""
+from intermedio import (NOMBRE, OP_COPIA, OP_LLAMADA, OP_RETORNO, OP_SALTO_SI_FALSO,
+                        OP_PRIMERA_BINARIA, OP_ULTIMA_BINARIA, SIN_OPERANDO, TEMPORAL, lee_dos_fuentes)
+
+
+class SSATramo:
+    """Valores SSA de las instrucciones de un GrafoFlujo"""
+
+    def __init__(self, codigo, grafo):
+        self.codigo = codigo
+        self.grafo = grafo
+        self.usuarios = []  # valor -> instrucciones (i) y phis (~p) que lo usan
+        self.valor_definido = {}  # instrucción -> valor que define
+        self.valor_uso1 = {}  # instrucción -> valor que lee en fuente1
+        self.valor_uso2 = {}
+        self.valor_argumentos = {}  # llamada -> valores de sus argumentos (-1 si no es variable)
+        self.phis = {}  # bloque -> phis
+        self.phi_variable = []
+        self.phi_bloque = []
+        self.phi_argumentos = []  # valores por predecesor del bloque
+        self.phi_valor = []
+
+    def _es_variable(self, operando):
+        return operando != SIN_OPERANDO and operando & 3 in (NOMBRE, TEMPORAL)
+
+    def _usos(self, i):
+        """Operandos leídos por la instrucción i (fuente1, fuente2)"""
+        codigo = self.codigo
+        op = codigo.ops[i]
+        if lee_dos_fuentes(op):
+            return codigo.fuentes1[i], codigo.fuentes2[i]
+        if op in (OP_COPIA, OP_SALTO_SI_FALSO, OP_RETORNO):
+            return codigo.fuentes1[i], SIN_OPERANDO
+        return SIN_OPERANDO, SIN_OPERANDO
+
+    def _define(self, i):
+        op = self.codigo.ops[i]
+        if op == OP_COPIA or op == OP_LLAMADA or OP_PRIMERA_BINARIA <= op <= OP_ULTIMA_BINARIA:
+            return self.codigo.destinos[i]
+        return SIN_OPERANDO
+
+    def _nuevo_valor(self):
+        self.usuarios.append([])
+        return len(self.usuarios) - 1
+
+    def _valor_desconocido(self):
+        """Valor nuevo del que no se sabe nada (entrada al tramo, global tras una llamada)"""
+        return self._nuevo_valor()
+
+    def construir_ssa(self):
+        grafo = self.grafo
+        codigo = self.codigo
+        es_variable = self._es_variable
+        num_bloques = len(grafo)
+
+        # Variables que cruzan bloques y bloques donde se escribe cada una
+        globales = codigo.globales
+        bloques_definicion = {}
+        no_locales = set()
+        nombres = set()
+        llamadas = []
+        for b in grafo.orden:
+            definidas = set()
+            for i in grafo.instrucciones(b):
+                usos = self._usos(i)
+                if codigo.ops[i] == OP_LLAMADA:
+                    usos = codigo.argumentos[codigo.fuentes2[i]]
+                    llamadas.append(b)
+                for operando in usos:
+                    if es_variable(operando):
+                        nombres.add(operando)
+                        if operando not in definidas:
+                            no_locales.add(operando)
+                destino = self._define(i)
+                if es_variable(destino):
+                    nombres.add(destino)
+                    definidas.add(destino)
+                    bloques_definicion.setdefault(destino, []).append(b)
+
+        # Una llamada escribe (con valor desconocido) toda variable global
+        afectadas_por_llamadas = set()
+        if llamadas:
+            afectadas_por_llamadas = {v for v in nombres
+                                      if v & 3 == NOMBRE and codigo.nombres[v >> 2] in globales}
+            for v in afectadas_por_llamadas:
+                bloques_definicion.setdefault(v, []).extend(llamadas)
+
+        # Fronteras de dominancia (Cooper, Harvey y Kennedy)
+        idom = grafo.idom
+        frontera = {}
+        for b in grafo.orden:
+            predecesores = [p for p in grafo.predecesores[b] if idom[p] >= 0]
+            if len(predecesores) < 2 and not (b == 0 and predecesores):
+                continue
+            for p in predecesores:
+                corredor = p
+                while corredor != idom[b] or b == 0:
+                    frontera.setdefault(corredor, []).append(b)
+                    if corredor == 0:
+                        break
+                    corredor = idom[corredor]
+
+        # phis en la frontera de dominancia iterada de cada variable no local
+        marca_phi = [None] * num_bloques
+        marca_trabajo = [None] * num_bloques
+        for v in no_locales:
+            pendientes = bloques_definicion.get(v, [])[:]
+            for b in pendientes:
+                marca_trabajo[b] = v
+            while pendientes:
+                x = pendientes.pop()
+                for y in frontera.get(x, ()):
+                    if marca_phi[y] != v:
+                        marca_phi[y] = v
+                        self._nuevo_phi(v, y)
+                        if marca_trabajo[y] != v:
+                            marca_trabajo[y] = v
+                            pendientes.append(y)
+
+        self._renombrar(afectadas_por_llamadas)
+
+    def _nuevo_phi(self, variable, bloque):
+        phi = len(self.phi_variable)
+        self.phi_variable.append(variable)
+        self.phi_bloque.append(bloque)
+        self.phi_argumentos.append([-1] * len(self.grafo.predecesores[bloque]))
+        self.phi_valor.append(self._nuevo_valor())
+        self.phis.setdefault(bloque, []).append(phi)
+
+    def _renombrar(self, afectadas_por_llamadas):
+        """Recorre el árbol de dominadores asignando a cada uso la definición que le llega"""
+        grafo = self.grafo
+        codigo = self.codigo
+        es_variable = self._es_variable
+        usuarios = self.usuarios
+        actual = {}  # variable -> pila de valores
+        entrada = {}  # variable -> su valor a la entrada del tramo
+
+        def leer(variable, usuario):
+            pila = actual.get(variable)
+            if pila:
+                valor = pila[-1]
+            else:
+                valor = entrada.get(variable)
+                if valor is None:
+                    valor = entrada[variable] = self._valor_desconocido()
+            usuarios[valor].append(usuario)
+            return valor
+
+        hijos = grafo.hijos_dominador()
+        pila_bloques = [(0, None)]
+        while pila_bloques:
+            b, escritas = pila_bloques.pop()
+            if escritas is not None:
+                # Salida del bloque: se deshacen sus definiciones
+                for variable in escritas:
+                    actual[variable].pop()
+                continue
+            escritas = []
+            for phi in self.phis.get(b, ()):
+                variable = self.phi_variable[phi]
+                actual.setdefault(variable, []).append(self.phi_valor[phi])
+                escritas.append(variable)
+
+            for i in grafo.instrucciones(b):
+                fuente1, fuente2 = self._usos(i)
+                if es_variable(fuente1):
+                    self.valor_uso1[i] = leer(fuente1, i)
+                if es_variable(fuente2):
+                    self.valor_uso2[i] = leer(fuente2, i)
+                if codigo.ops[i] == OP_LLAMADA:
+                    self.valor_argumentos[i] = [leer(a, i) if es_variable(a) else -1
+                                                for a in codigo.argumentos[codigo.fuentes2[i]]]
+                    for variable in afectadas_por_llamadas:
+                        actual.setdefault(variable, []).append(self._valor_desconocido())
+                        escritas.append(variable)
+                destino = self._define(i)
+                if es_variable(destino):
+                    valor = self._nuevo_valor()
+                    self.valor_definido[i] = valor
+                    actual.setdefault(destino, []).append(valor)
+                    escritas.append(destino)
+
+            for s in grafo.sucesores[b]:
+                j = grafo.predecesores[s].index(b)
+                for phi in self.phis.get(s, ()):
+                    self.phi_argumentos[phi][j] = leer(self.phi_variable[phi], ~phi)
+
+            pila_bloques.append((b, escritas))
+            pila_bloques.extend((h, None) for h in reversed(hijos[b]))
@@ -0,0 +1,151 @@
+"""
+Intérprete del código intermedio para las pruebas.
+
+ejecutar() corre el código de primer nivel de un CodigoIntermedio y luego
+las llamadas que se le pidan, y devuelve lo que se ve desde fuera: el valor
+de cada llamada y las variables globales al terminar. Así se puede comparar
+el código optimizado con el que sale del generador.
+"""
+import contextlib
+import io
+
+from ClassParser import ParserAsignacion
+from generadorCodigo import GeneradorIntermedio
+from grafo_flujo import tramos_programa
+from intermedio import (COMPARACION_DE_SALTO, CONSTANTE, NOMBRE, OPERACIONES, OP_COPIA, OP_ETIQUETA,
+                        OP_LLAMADA, OP_RETORNO, OP_SALTO, OP_SALTO_SI_FALSO, SIN_OPERANDO, TEMPORAL,
+                        es_binaria, es_salto_comparacion)
+from lexico import tokenizar
+
+
+class LimiteSuperado(Exception):
+    pass
+
+
+def codigo_de(fuente):
+    """CodigoIntermedio de 'fuente', sin pasar por el semántico"""
+    tokens, _, _ = tokenizar(fuente)
+    arbol = ParserAsignacion(tokens).program()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return GeneradorIntermedio().generar_codigo(arbol)
+
+
+def _division_c(a, b):
+    cociente = abs(a) // abs(b)
+    return cociente if (a < 0) == (b < 0) else -cociente
+
+
+def operar(nombre, a, b):
+    """Valor de 'a <nombre> b' con la división entera truncada hacia cero"""
+    if nombre == "AND_LOGICO":
+        return int(bool(a) and bool(b))
+    if nombre == "OR_LOGICO":
+        return int(bool(a) or bool(b))
+    if nombre == "DIVISION":
+        return _division_c(a, b) if type(a) is int and type(b) is int else a / b
+    if nombre == "MODULO":
+        return a - b * _division_c(a, b) if type(a) is int and type(b) is int else a % b
+    return {
+        "SUMA": lambda: a + b,
+        "RESTA": lambda: a - b,
+        "MULTIPLICACION": lambda: a * b,
+        "IGUAL_IGUAL": lambda: int(a == b),
+        "DIFERENTE": lambda: int(a != b),
+        "MENOR_QUE": lambda: int(a < b),
+        "MAYOR_QUE": lambda: int(a > b),
+        "MENOR_IGUAL": lambda: int(a <= b),
+        "MAYOR_IGUAL": lambda: int(a >= b),
+    }[nombre]()
+
+
+class Interprete:
+    def __init__(self, codigo, limite=1000000):
+        self.codigo = codigo
+        self.cuerpos = {nombre: (inicio, fin) for nombre, inicio, fin in codigo.funciones}
+        self.etiquetas = {codigo.destinos[i]: i for i in range(len(codigo)) if codigo.ops[i] == OP_ETIQUETA}
+        self.globales = {}
+        self.pasos = limite
+
+    def _entorno(self, operando, locales):
+        return self.globales if self.codigo.nombres[operando >> 2] in self.codigo.globales else locales
+
+    def _leer(self, operando, locales, temporales):
+        clase = operando & 3
+        if clase == CONSTANTE:
+            return self.codigo.valor_constante(operando)
+        if clase == TEMPORAL:
+            return temporales[operando]
+        return self._entorno(operando, locales)[self.codigo.nombres[operando >> 2]]
+
+    def _escribir(self, operando, valor, locales, temporales):
+        if operando & 3 == TEMPORAL:
+            temporales[operando] = valor
+            return
+        nombre = self.codigo.nombres[operando >> 2]
+        if self.codigo.tipos.get(nombre) == "float":
+            valor = float(valor)
+        self._entorno(operando, locales)[nombre] = valor
+
+    def _saltar(self, etiqueta, inicio, fin):
+        destino = self.etiquetas[etiqueta]
+        assert inicio <= destino < fin, "salto fuera del tramo"
+        return destino
+
+    def tramo(self, inicio, fin, locales):
+        """Ejecuta [inicio, fin) y devuelve el valor del return (None si no hay)"""
+        codigo = self.codigo
+        temporales = {}
+        i = inicio
+        while i < fin:
+            self.pasos -= 1
+            if self.pasos < 0:
+                raise LimiteSuperado
+            op, destino, fuente1, fuente2 = codigo.cuadrupla(i)
+            if es_binaria(op):
+                valor = operar(OPERACIONES[op], self._leer(fuente1, locales, temporales),
+                               self._leer(fuente2, locales, temporales))
+                self._escribir(destino, valor, locales, temporales)
+            elif op == OP_COPIA:
+                self._escribir(destino, self._leer(fuente1, locales, temporales), locales, temporales)
+            elif op == OP_SALTO:
+                i = self._saltar(destino, inicio, fin)
+                continue
+            elif op == OP_SALTO_SI_FALSO:
+                if not self._leer(fuente1, locales, temporales):
+                    i = self._saltar(destino, inicio, fin)
+                    continue
+            elif es_salto_comparacion(op):
+                if operar(OPERACIONES[COMPARACION_DE_SALTO[op]], self._leer(fuente1, locales, temporales),
+                          self._leer(fuente2, locales, temporales)):
+                    i = self._saltar(destino, inicio, fin)
+                    continue
+            elif op == OP_LLAMADA:
+                argumentos = [self._leer(a, locales, temporales) for a in codigo.argumentos[fuente2]]
+                valor = self.llamar(codigo.nombres[fuente1 >> 2], argumentos)
+                if destino != SIN_OPERANDO:
+                    self._escribir(destino, 0 if valor is None else valor, locales, temporales)
+            elif op == OP_RETORNO:
+                return None if fuente1 == SIN_OPERANDO else self._leer(fuente1, locales, temporales)
+            i += 1
+        return None
+
+    def llamar(self, funcion, argumentos):
+        inicio, fin = self.cuerpos[funcion]
+        locales = {}
+        for parametro, argumento in zip(self.codigo.parametros.get(funcion, ()), argumentos):
+            assert parametro & 3 == NOMBRE
+            self._escribir(parametro, argumento, locales, {})
+        return self.tramo(inicio, fin, locales)
+
+
+def ejecutar(codigo, llamadas=()):
+    """
+    Ejecuta el primer nivel y después cada (función, argumentos) de
+    'llamadas'. Devuelve (valores de las llamadas, globales al terminar).
+    """
+    interprete = Interprete(codigo)
+    for nombre, inicio, fin in tramos_programa(codigo):
+        if nombre is None:
+            interprete.tramo(inicio, fin, interprete.globales)
+    valores = [interprete.llamar(funcion, argumentos) for funcion, argumentos in llamadas]
+    return valores, interprete.globales
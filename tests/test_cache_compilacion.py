@@ -0,0 +1,113 @@
+import os
+import shutil
+
+import pytest
+
+import cache_compilacion
+from cache_compilacion import EXTENSION, CacheCompilacion, compilar, ejecutar_fases
+from interprete import ejecutar
+
+PROGRAMA = """
+int total = 0;
+int paso = 3;
+int doble() { return paso * 2; }
+int main() {
+    int suma = 0;
+    for (int i = 0; i < 10; i = i + 1) {
+        if (i % 3 == 0) { continue; }
+        suma = suma + doble() * i;
+    }
+    total = suma;
+    return suma;
+}
+"""
+
+
+def entradas(cache):
+    return sorted(nombre for nombre in os.listdir(cache.directorio) if nombre.endswith(EXTENSION))
+
+
+@pytest.mark.parametrize("nivel", [0, 1, 2, 3])
+def test_acierto_igual_a_compilar_de_nuevo(tmp_path, nivel):
+    cache = CacheCompilacion(str(tmp_path))
+    primero = compilar(PROGRAMA, cache, nivel_optimizacion=nivel)
+    segundo = compilar(PROGRAMA, cache, nivel_optimizacion=nivel)
+    nuevo = ejecutar_fases(PROGRAMA, nivel_optimizacion=nivel)
+    assert not primero.desde_cache and segundo.desde_cache
+
+    codigo = segundo.generador.codigo_intermedio
+    esperado = nuevo.generador.codigo_intermedio
+    assert codigo.lineas() == esperado.lineas()
+    assert (codigo.funciones, codigo.parametros, codigo.tipos, codigo.globales) == \
+           (esperado.funciones, esperado.parametros, esperado.tipos, esperado.globales)
+    assert ejecutar(codigo, [("main", [])]) == ejecutar(esperado, [("main", [])])
+    assert segundo.errores_semanticos == nuevo.errores_semanticos
+    assert segundo.informe_semantico == nuevo.informe_semantico
+    assert [segundo.tokens.tipo(i) for i in range(len(segundo.tokens))] == \
+           [nuevo.tokens.tipo(i) for i in range(len(nuevo.tokens))]
+
+
+def test_clave_distinta_por_nivel(tmp_path):
+    cache = CacheCompilacion(str(tmp_path))
+    assert len({cache.clave(PROGRAMA, nivel) for nivel in range(4)}) == 4
+    compilar(PROGRAMA, cache, nivel_optimizacion=0)
+    assert cache.obtener(PROGRAMA, 2) is None
+    compilar(PROGRAMA, cache, nivel_optimizacion=2)
+    assert len(entradas(cache)) == 2
+    assert cache.obtener(PROGRAMA, 2).generador.codigo_intermedio.lineas() != \
+           cache.obtener(PROGRAMA, 0).generador.codigo_intermedio.lineas()
+
+
+@pytest.mark.parametrize("estropear", [
+    lambda datos: datos[:len(datos) // 2],
+    lambda datos: datos[:len(cache_compilacion.CABECERA)],
+    lambda datos: b"",
+    lambda datos: datos[:-7] + b"\0" * 7,
+    lambda datos: b"XXXX" + datos[4:],
+    lambda datos: cache_compilacion.CABECERA + b"no es zlib",
+], ids=["mitad", "solo_cabecera", "vacia", "final_cambiado", "otra_marca", "sin_comprimir"])
+def test_entrada_estropeada_es_fallo(tmp_path, estropear):
+    cache = CacheCompilacion(str(tmp_path))
+    assert compilar(PROGRAMA, cache, nivel_optimizacion=1).generador is not None
+    ruta = os.path.join(cache.directorio, entradas(cache)[0])
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    with open(ruta, "wb") as f:
+        f.write(estropear(datos))
+
+    assert cache.obtener(PROGRAMA, 1) is None
+    resultado = compilar(PROGRAMA, cache, nivel_optimizacion=1)
+    assert not resultado.desde_cache
+    assert cache.obtener(PROGRAMA, 1).desde_cache
+
+
+def test_desalojo_bajo_tamano_maximo(tmp_path):
+    cache = CacheCompilacion(str(tmp_path))
+    programas = [PROGRAMA.replace("10", str(10 + k)) for k in range(6)]
+    compilar(programas[0], cache)
+    os.utime(os.path.join(cache.directorio, cache.clave(programas[0]) + EXTENSION), (0, 0))
+    tamano = os.path.getsize(os.path.join(cache.directorio, entradas(cache)[0]))
+    cache.tamano_maximo = 3 * tamano + tamano // 2
+
+    for k, programa in enumerate(programas[1:], 1):
+        compilar(programa, cache)
+        # Fechas de uso distintas aunque el reloj del sistema de archivos sea grueso
+        os.utime(os.path.join(cache.directorio, cache.clave(programa) + EXTENSION), (k, k))
+        total = sum(os.path.getsize(os.path.join(cache.directorio, nombre)) for nombre in entradas(cache))
+        assert total <= cache.tamano_maximo
+
+    assert cache.obtener(programas[-1]) is not None
+    assert cache.obtener(programas[0]) is None
+    assert cache.obtener(programas[1]) is None
+
+
+def test_version_con_un_modulo_nuevo(tmp_path, monkeypatch):
+    directorio = os.path.dirname(os.path.abspath(cache_compilacion.__file__))
+    for nombre in os.listdir(directorio):
+        if nombre.endswith(".py"):
+            shutil.copy(os.path.join(directorio, nombre), tmp_path)
+    monkeypatch.setattr(cache_compilacion, "__file__", str(tmp_path / "cache_compilacion.py"))
+    assert cache_compilacion._version_compilador() == cache_compilacion.VERSION_COMPILADOR
+
+    (tmp_path / "pase_nuevo.py").write_text("def pase(codigo):\n    return {}\n")
+    assert cache_compilacion._version_compilador() != cache_compilacion.VERSION_COMPILADOR
@@ -0,0 +1,67 @@
+import pytest
+
+from ClassParser import ParserAsignacion
+from compilacion_paralela import analizar_y_generar
+from lexico import tokenizar
+
+# Variables globales declaradas entre funciones y usadas en las posteriores
+SIN_ERRORES = """
+int a = 3;
+int f() { int s = a * 2; return s; }
+int b = 4;
+float r = 1.5;
+int g() {
+    int t = a + b;
+    while (t > 0) { if (t % 2 == 0) { t = t - 1; continue; } t = t - 2; }
+    return t;
+}
+b = b + a;
+bool listo = true;
+int h() { float q = r * 2.0; if (listo && b > 2) { return b; } return a; }
+int k() { for (int i = 0; i < 4; i = i + 1) { b = b + i; } return b; }
+"""
+
+# Errores de uso, de tipos y de división por cero repartidos por funciones y primer nivel
+CON_ERRORES = """
+int a = 3;
+int f() { int s = nada * 2; return s / 0; }
+int b = a / 0;
+int g() { int t = true + 1; bool u = 2; return otra; }
+a = a + nada;
+int h() { float q = 1.5; int z = q % 0; return b; }
+int k() { return a + f(); }
+int m() { int w = 1; return w / (1 - 1) + sin_declarar; }
+"""
+
+
+def compilar(codigo, workers):
+    tokens, _, _ = tokenizar(codigo)
+    parser = ParserAsignacion(tokens)
+    arbol = parser.program()
+    arbol.tabla_global = parser.tabla_global
+    return analizar_y_generar(arbol, tokens, workers=workers, umbral=0, imprimir=False)
+
+
+def test_paralelo_igual_que_serie():
+    tabla_serie, errores_serie, serie = compilar(SIN_ERRORES, 1)
+    tabla_paralela, errores_paralelos, paralelo = compilar(SIN_ERRORES, 2)
+    assert errores_serie == errores_paralelos == []
+    assert tabla_paralela.texto_tabla() == tabla_serie.texto_tabla()
+
+    codigo, esperado = paralelo.codigo_intermedio, serie.codigo_intermedio
+    assert codigo.lineas() == esperado.lineas()
+    assert codigo.funciones == esperado.funciones
+    assert codigo.tipos == esperado.tipos
+    assert codigo.globales == esperado.globales == {"a", "b", "r", "listo"}
+    assert codigo.parametros == esperado.parametros
+    assert (paralelo.contador_temporales, paralelo.contador_etiquetas) == \
+           (serie.contador_temporales, serie.contador_etiquetas)
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_errores_en_el_mismo_orden(workers):
+    _, errores_serie, serie = compilar(CON_ERRORES, 1)
+    _, errores_paralelos, paralelo = compilar(CON_ERRORES, workers)
+    assert serie is None and paralelo is None
+    assert len(errores_serie) > 5
+    assert errores_paralelos == errores_serie
@@ -0,0 +1,103 @@
+import operator
+
+import pytest
+
+from desenrollado_bucles import desenrollar_bucles, vueltas_bucle
+from grafo_flujo import grafos_programa
+from interprete import codigo_de, ejecutar
+from intermedio import CODIGO_OPERACION
+from optimizacion import optimizar
+
+COMPARACIONES = {
+    "MENOR_QUE": operator.lt,
+    "MENOR_IGUAL": operator.le,
+    "MAYOR_QUE": operator.gt,
+    "MAYOR_IGUAL": operator.ge,
+    "IGUAL_IGUAL": operator.eq,
+    "DIFERENTE": operator.ne,
+}
+
+
+def vueltas_simuladas(comparacion, inicial, paso, limite, maximo=1000):
+    """Vueltas contadas una a una, o None si no acaba en 'maximo'"""
+    i = inicial
+    for vueltas in range(maximo):
+        if not comparacion(i, limite):
+            return vueltas
+        i += paso
+    return None
+
+
+@pytest.mark.parametrize("comparacion", COMPARACIONES)
+def test_vueltas_bucle(comparacion):
+    for inicial in range(-12, 13):
+        for limite in range(-12, 13):
+            for paso in (-7, -3, -2, -1, 1, 2, 3, 7):
+                esperadas = vueltas_simuladas(COMPARACIONES[comparacion], inicial, paso, limite)
+                assert vueltas_bucle(CODIGO_OPERACION[comparacion], inicial, paso, limite) == esperadas, \
+                    (comparacion, inicial, paso, limite)
+
+
+def test_vueltas_bucle_extremos():
+    menor = CODIGO_OPERACION["MENOR_QUE"]
+    assert vueltas_bucle(menor, 0, 1, 0) == 0
+    assert vueltas_bucle(menor, 0, 1, 1) == 1
+    assert vueltas_bucle(menor, 0, 1, 2 ** 31 - 1) == 2 ** 31 - 1
+    assert vueltas_bucle(menor, 0, 5, 2 ** 31 - 1) == (2 ** 31 - 1 + 4) // 5
+    assert vueltas_bucle(CODIGO_OPERACION["MAYOR_IGUAL"], 10, -10, 0) == 2
+    assert vueltas_bucle(CODIGO_OPERACION["DIFERENTE"], 0, 3, 10) is None
+    assert vueltas_bucle(CODIGO_OPERACION["DIFERENTE"], 10, -5, 0) == 2
+
+
+CORTOS = """
+int corto(int a) {
+    int suma = 0;
+    for (int i = 0; i < 4; i = i + 1) {
+        if (i == a) { break; }
+        if (i % 2 == 0) { continue; }
+        suma = suma + i * 10;
+    }
+    return suma;
+}
+"""
+
+LARGOS = """
+int largo(int a) {
+    int suma = 0;
+    for (int j = 100; j > 0; j = j - 3) {
+        if (j == a) { break; }
+        if (j % 2 == 0) { continue; }
+        suma = suma + j;
+    }
+    return suma;
+}
+"""
+
+
+def desenrollado(fuente):
+    """Código optimizado de 'fuente' y las estadísticas del desenrollado"""
+    codigo = codigo_de(fuente)
+    pases = {nombre: estadisticas for nombre, _, _, estadisticas in optimizar(codigo).pases}
+    return codigo, pases["desenrollado de bucles"]
+
+
+@pytest.mark.parametrize("a", [-1, 0, 1, 2, 3, 4])
+def test_desenrollado_entero_con_break_y_continue(a):
+    codigo, estadisticas = desenrollado(CORTOS)
+    assert estadisticas["bucles_desenrollados"] == 1
+    assert all(not grafo.bucles for _, grafo in grafos_programa(codigo))
+    assert ejecutar(codigo, [("corto", [a])]) == ejecutar(codigo_de(CORTOS), [("corto", [a])])
+
+
+@pytest.mark.parametrize("a", [-1, 1, 4, 5, 49, 97, 100])
+def test_desenrollado_parcial_con_break_y_continue(a):
+    codigo, estadisticas = desenrollado(LARGOS)
+    assert estadisticas["bucles_parciales"] == 1
+    assert ejecutar(codigo, [("largo", [a])]) == ejecutar(codigo_de(LARGOS), [("largo", [a])])
+
+
+def test_sin_vueltas_conocidas():
+    fuente = "int f(int n) { int s = 0; for (int i = 0; i < n; i = i + 1) { s = s + i; } return s; }"
+    codigo = codigo_de(fuente)
+    assert desenrollar_bucles(codigo) == {"bucles_desenrollados": 0, "bucles_parciales": 0, "copias_del_cuerpo": 0}
+    assert ejecutar(codigo, [("f", [5])])[0] == [10]
@@ -0,0 +1,155 @@
+import random
+
+import pytest
+
+from grafo_flujo import GrafoFlujo, grafos_programa
+from interprete import codigo_de, ejecutar
+from intermedio import (CODIGO_OPERACION, OP_COPIA, OP_ETIQUETA, OP_RETORNO, OP_SALTO, OP_SALTO_SI_FALSO,
+                        CodigoIntermedio)
+
+OP_SALTO_SI_MENOR = CODIGO_OPERACION["SALTO_SI_MENOR"]
+
+
+def grafo_aleatorio(semilla, num_bloques):
+    """
+    Código con num_bloques bloques, cada uno con su etiqueta y una
+    instrucción que salta, sale o sigue al siguiente, y los sucesores que
+    deben salir de él
+    """
+    azar = random.Random(semilla)
+    codigo = CodigoIntermedio()
+    x = codigo.nombre("x")
+    etiquetas = [codigo.etiqueta(b) for b in range(num_bloques)]
+    sucesores = []
+    for b in range(num_bloques):
+        codigo.agregar(OP_ETIQUETA, etiquetas[b])
+        destino = azar.randrange(num_bloques)
+        siguiente = [b + 1] if b + 1 < num_bloques else []
+        forma = azar.choice(("salto", "condicional", "comparacion", "retorno", "sigue"))
+        if forma == "salto":
+            codigo.agregar(OP_SALTO, etiquetas[destino])
+            sucesores.append({destino})
+        elif forma == "condicional":
+            codigo.agregar(OP_SALTO_SI_FALSO, etiquetas[destino], x)
+            sucesores.append(set(siguiente) | {destino})
+        elif forma == "comparacion":
+            codigo.agregar(OP_SALTO_SI_MENOR, etiquetas[destino], x, codigo.constante("3"))
+            sucesores.append(set(siguiente) | {destino})
+        elif forma == "retorno":
+            codigo.agregar(OP_RETORNO, fuente1=x)
+            sucesores.append(set())
+        else:
+            codigo.agregar(OP_COPIA, x, codigo.constante("1"))
+            sucesores.append(set(siguiente))
+    return codigo, sucesores
+
+
+def dominadores_punto_fijo(sucesores):
+    """Dominadores de cada bloque alcanzable iterando hasta el punto fijo"""
+    alcanzables = {0}
+    pendientes = [0]
+    while pendientes:
+        for s in sucesores[pendientes.pop()]:
+            if s not in alcanzables:
+                alcanzables.add(s)
+                pendientes.append(s)
+    predecesores = {b: [p for p in alcanzables if b in sucesores[p]] for b in alcanzables}
+    dominadores = {b: set(alcanzables) for b in alcanzables}
+    dominadores[0] = {0}
+    cambiado = True
+    while cambiado:
+        cambiado = False
+        for b in sorted(alcanzables - {0}):
+            nuevo = {b} | set.intersection(*(dominadores[p] for p in predecesores[b]))
+            if nuevo != dominadores[b]:
+                dominadores[b] = nuevo
+                cambiado = True
+    return dominadores
+
+
+def bucle_natural(sucesores, alcanzables, h, retrocesos):
+    """Bloques alcanzables que llegan a algún retroceso sin pasar por h, más h"""
+    bloques = {h}
+    pendientes = [p for p in retrocesos if p != h]
+    bloques.update(pendientes)
+    while pendientes:
+        y = pendientes.pop()
+        for z, salida in enumerate(sucesores):
+            if y in salida and z in alcanzables and z not in bloques:
+                bloques.add(z)
+                pendientes.append(z)
+    return bloques
+
+
+@pytest.mark.parametrize("semilla", range(200))
+def test_dominadores_como_punto_fijo(semilla):
+    codigo, sucesores = grafo_aleatorio(semilla, 2 + semilla % 23)
+    grafo = GrafoFlujo(codigo)
+    assert len(grafo) == len(sucesores)
+    assert [set(s) for s in grafo.sucesores] == sucesores
+
+    esperados = dominadores_punto_fijo(sucesores)
+    for b in range(len(grafo)):
+        if b not in esperados:
+            assert not grafo.alcanzable(b)
+            assert grafo.dominadores(b) == []
+            assert not any(grafo.domina(a, b) or grafo.domina(b, a) for a in range(len(grafo)))
+            continue
+        cadena = grafo.dominadores(b)
+        assert cadena[0] == b and cadena[-1] == 0
+        assert set(cadena) == esperados[b]
+        assert all(grafo.domina(a, b) == (a in esperados[b]) for a in range(len(grafo)))
+
+
+@pytest.mark.parametrize("semilla", range(200))
+def test_bucles_naturales(semilla):
+    codigo, sucesores = grafo_aleatorio(semilla, 2 + semilla % 23)
+    grafo = GrafoFlujo(codigo)
+    dominadores = dominadores_punto_fijo(sucesores)
+    esperados = {}
+    for b in dominadores:
+        for s in sucesores[b]:
+            if s in dominadores[b]:
+                esperados.setdefault(s, []).append(b)
+    assert {h: sorted(retrocesos) for h, retrocesos in grafo.bucles.items()} == \
+           {h: sorted(retrocesos) for h, retrocesos in esperados.items()}
+    for h, retrocesos in esperados.items():
+        assert set(grafo.bloques_bucle(h)) == bucle_natural(sucesores, dominadores, h, retrocesos)
+
+
+def test_entrada_sin_etiqueta_y_salto_fuera():
+    codigo = CodigoIntermedio()
+    x = codigo.nombre("x")
+    codigo.agregar(OP_COPIA, x, codigo.constante("0"))
+    codigo.agregar(OP_ETIQUETA, codigo.etiqueta(0))
+    codigo.agregar(OP_SALTO_SI_FALSO, codigo.etiqueta(9), x)  # fuera del tramo: sale
+    codigo.agregar(OP_SALTO, codigo.etiqueta(0))
+    grafo = GrafoFlujo(codigo)
+    assert grafo.sucesores == [[1], [2], [1]]
+    assert grafo.bucles == {1: [2]}
+    assert grafo.dominadores(2) == [2, 1, 0]
+
+
+PROGRAMA = """
+int total = 0;
+int f() {
+    int s = 0;
+    for (int i = 0; i < 3; i = i + 1) {
+        int j = 0;
+        while (j < i) { s = s + j; j = j + 1; }
+    }
+    return s;
+}
+while (total < 5) { total = total + 2; }
+"""
+
+
+def test_bucles_de_un_programa():
+    codigo = codigo_de(PROGRAMA)
+    grafos = grafos_programa(codigo)
+    assert [nombre for nombre, _ in grafos] == [None, "f", None]
+    funcion = grafos[1][1]
+    assert len(funcion.bucles) == 2
+    assert max(funcion.profundidad_bucle(b) for b in range(len(funcion))) == 2
+    assert [len(grafo.bucles) for _, grafo in grafos] == [0, 2, 1]
+    assert ejecutar(codigo, [("f", [])]) == ([1], {"total": 6})
@@ -0,0 +1,127 @@
+import random
+
+import pytest
+
+from benchmarks import generar_anidado, generar_constantes, generar_llamadas, generar_programa
+from lexico import LexerIncremental, tokenizar
+
+# Trozos que ponen a prueba las fronteras \b, los números y la basura
+TROZOS = (
+    "if", "iff", "xif", "if_", "_if", "if1", "while", "whiles", "for", "fort", "else", "return", "break",
+    "continue", "true", "truex", "false", "int", "integer", "float", "char", "void", "string", "bool", "pi",
+    "pin", "endl", "cout", "nullptr", "switch", "case", "default", "using namespace std",
+    "using namespace stdio", "using  namespace std", "x", "suma", "a1", "b_2", "Z", "ñ", "ñif", "éx",
+    "0", "12", "1.5", "3.", ".5", "1.2.3", "007", "٣", "²",
+    "+", "-", "*", "/", "%", "=", "==", "!=", "!", "<", "<=", "<<", ">", ">=", ">>", "&&", "&", "||", "|",
+    ",", ";", "(", ")", "{", "}", '"texto"', '"sin cerrar', "'a'", "'\\n'", "'ab'", "'",
+    "#include <stdio.h>", "#include<vector>", "#include", "#", "@", "$", "?", "\\", "`", "~", "[", "]",
+)
+SEPARADORES = ("", "", " ", " ", "  ", "\t")
+
+
+def linea_aleatoria(azar):
+    return "".join(azar.choice(TROZOS) + azar.choice(SEPARADORES) for _ in range(azar.randrange(12)))
+
+
+def texto_aleatorio(azar, lineas):
+    return "\n".join(linea_aleatoria(azar) for _ in range(lineas))
+
+
+def resultado(tokens, contador, errores):
+    return list(tokens), contador, errores
+
+
+PROGRAMAS = [generar_programa(5), generar_constantes(5), generar_llamadas(5), generar_anidado(50),
+             "int x = 1; @@@", "float y = 3.;\nint z = 1.5 + x1if;   ~", "\n\n", ""]
+
+
+@pytest.mark.parametrize("codigo", PROGRAMAS)
+def test_escaner_igual_que_regex(codigo):
+    assert resultado(*tokenizar(codigo, "escaner")) == resultado(*tokenizar(codigo, "regex"))
+
+
+@pytest.mark.parametrize("semilla", range(300))
+def test_escaner_igual_que_regex_texto_aleatorio(semilla):
+    codigo = texto_aleatorio(random.Random(semilla), 20)
+    assert resultado(*tokenizar(codigo, "escaner")) == resultado(*tokenizar(codigo, "regex"))
+
+
+@pytest.mark.parametrize("codigo, tipos", [
+    ("if iff xif if_ _if", ["IF", "VARIABLE", "VARIABLE", "VARIABLE", "VARIABLE"]),
+    ("int integer pi pin", ["TIPO_DATO", "VARIABLE", "CONST_PI", "VARIABLE"]),
+    ("using namespace std; using namespace stdio", ["PALABRA_RESERVADA", "PUNTO_COMA", "VARIABLE", "VARIABLE",
+                                                      "VARIABLE"]),
+    ("1.5 3. 12", ["NUMERO", "NUMERO", "NUMERO"]),
+])
+def test_fronteras(codigo, tipos):
+    for backend in ("regex", "escaner"):
+        tokens, _, _ = tokenizar(codigo, backend)
+        assert [tokens.tipo(i) for i in range(len(tokens))] == tipos
+
+
+def test_numero_con_punto_final():
+    for backend in ("regex", "escaner"):
+        tokens, _, errores = tokenizar("x = 3.", backend)
+        assert [tokens.valor(i) for i in range(len(tokens))] == ["x", "=", "3"]
+        assert errores == ["Caracteres no reconocidos en línea 1, col 6: '.'"]
+
+
+def test_backend_desconocido():
+    with pytest.raises(ValueError):
+        tokenizar("x", "otro")
+
+
+def estado(lexer):
+    """Tokens, contador y errores del lexer incremental y de tokenizar() sobre sus líneas"""
+    return resultado(lexer.tokens(), lexer.contador_tokens, lexer.errores), \
+        resultado(*tokenizar("\n".join(lexer.lineas)))
+
+
+@pytest.mark.parametrize("semilla", range(100))
+def test_incremental_igual_que_tokenizar(semilla):
+    azar = random.Random(semilla)
+    lexer = LexerIncremental(texto_aleatorio(azar, azar.randrange(6)))
+    incremental, completo = estado(lexer)
+    assert incremental == completo
+
+    for _ in range(30):
+        num_lineas = len(lexer.lineas)
+        inicio = azar.randint(1, num_lineas + 1)
+        forma = azar.choice(("insertar", "reemplazar", "borrar"))
+        if forma == "insertar":
+            fin = inicio - 1
+        else:
+            fin = azar.randint(inicio - 1, num_lineas)
+        texto = "" if forma == "borrar" else texto_aleatorio(azar, azar.randrange(4))
+
+        antes = [(t[2], t[3]) for t in lexer.tokens()]
+        primero, fin_anterior, fin_nuevo = lexer.editar(inicio, fin, texto)
+        despues = [(t[2], t[3]) for t in lexer.tokens()]
+        assert despues[:primero] == antes[:primero]
+        assert despues[fin_nuevo:] == antes[fin_anterior:]
+
+        incremental, completo = estado(lexer)
+        assert incremental == completo
+
+
+def test_incremental_casos_limite():
+    lexer = LexerIncremental("int x = 1;\nx = x + 2;")
+    assert lexer.editar(2, 1, "int y = 0;") == (5, 5, 10)  # inserción pura
+    assert lexer.lineas == ["int x = 1;", "int y = 0;", "x = x + 2;"]
+    assert lexer.editar(1, 1, "") == (0, 5, 0)  # texto vacío: solo borra
+    assert lexer.editar(3, 2, "@") == (11, 11, 11)  # al final, con basura
+    assert lexer.errores == ["Caracteres no reconocidos en línea 3, col 1: '@'"]
+    incremental, completo = estado(lexer)
+    assert incremental == completo
+
+    vacio = LexerIncremental("")
+    assert vacio.editar(1, 0, "x;") == (0, 0, 2)
+    assert vacio.lineas == ["x;"]
+
+
+@pytest.mark.parametrize("inicio, fin", [(0, 0), (0, 1), (1, 3), (4, 3), (4, 4), (3, 1), (2, -1)])
+def test_incremental_rango_invalido(inicio, fin):
+    lexer = LexerIncremental("a;\nb;")
+    with pytest.raises(ValueError):
+        lexer.editar(inicio, fin, "c;")
+    assert lexer.lineas == ["a;", "b;"]
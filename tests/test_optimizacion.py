@@ -0,0 +1,202 @@
+import pytest
+
+from asignacion_temporales import reciclar_temporales, tamano_marco
+from benchmarks import (generar_bucles, generar_constantes, generar_desenrollables, generar_llamadas,
+                        generar_programa, generar_subexpresiones)
+from expansion_llamadas import Heuristica, expandir_llamadas
+from grafo_flujo import tramos_programa
+from interprete import codigo_de, ejecutar
+from intermedio import CODIGO_OPERACION, OP_LLAMADA, OP_RETORNO, OP_SALTO, OP_SALTO_SI_FALSO
+from limpieza_codigo import limpiar_codigo
+from numeracion_valores import eliminar_subexpresiones, numerar_valores_local
+from optimizacion import NIVEL_MAXIMO, optimizar
+from propagacion_constantes import propagar_constantes
+
+# El programa de ejecucion.py
+EJEMPLO = """
+int main() {
+    int suma = 0;
+    int i = 0;
+    while (i < 10) {
+        if (i == 5) {
+            break;
+        }
+        if (i % 2 == 0) {
+            i = i + 1;
+            continue;
+        }
+        suma = suma + i;
+        i = i + 1;
+    }
+    return suma;
+}
+"""
+
+GLOBALES = """
+int total = 0;
+int paso = 3;
+int acumular(int x) { total = total + x * paso; return total; }
+int tabla(int n) {
+    int r = 0;
+    for (int i = 0; i < n; i = i + 1) { r = r + acumular(i) % 7; }
+    return r;
+}
+"""
+
+PROGRAMAS = {
+    "ejemplo": EJEMPLO,
+    "funciones": generar_programa(3),
+    "constantes": generar_constantes(3),
+    "repetidas": generar_subexpresiones(3),
+    "bucles": generar_bucles(3),
+    "desenrollables": generar_desenrollables(3),
+    "llamadas": generar_llamadas(3),
+    "globales": GLOBALES,
+}
+ARGUMENTOS = ((3, 4), (0, 5), (7, 2), (4, 1), (1, 0))
+
+
+def llamadas(codigo):
+    """Cada función del programa con varias listas de argumentos"""
+    return [(funcion, argumentos[:len(codigo.parametros.get(funcion, ()))])
+            for funcion, _, _ in codigo.funciones for argumentos in ARGUMENTOS]
+
+
+@pytest.mark.parametrize("nivel", range(1, NIVEL_MAXIMO + 1))
+@pytest.mark.parametrize("programa", PROGRAMAS)
+def test_optimizado_equivale_al_original(programa, nivel):
+    original = codigo_de(PROGRAMAS[programa])
+    optimizado = codigo_de(PROGRAMAS[programa])
+    optimizar(optimizado, nivel)
+    assert ejecutar(optimizado, llamadas(original)) == ejecutar(original, llamadas(original))
+
+
+def test_ejemplo_devuelve_la_suma():
+    codigo = codigo_de(EJEMPLO)
+    optimizar(codigo)
+    assert ejecutar(codigo, [("main", [])])[0] == [1 + 3]
+
+
+def test_constantes_resuelven_las_ramas():
+    codigo = codigo_de(PROGRAMAS["constantes"])
+    estadisticas = propagar_constantes(codigo)
+    assert estadisticas["saltos_resueltos"] == 2 * 3
+    assert OP_SALTO_SI_FALSO not in codigo.ops
+    assert ejecutar(codigo, [("g0", [5])])[0] == [8 * 17 - 1 + 5]
+
+
+def test_subexpresiones_en_bloques_dominados():
+    # a * b, (a + b) * (a + b) y escala * a se calculan una sola vez
+    multiplicacion = CODIGO_OPERACION["MULTIPLICACION"]
+    local = codigo_de(generar_subexpresiones(1))
+    numerar_valores_local(local)
+    dominados = codigo_de(generar_subexpresiones(1))
+    eliminar_subexpresiones(dominados)
+    assert list(dominados.ops).count(multiplicacion) == 3 < list(local.ops).count(multiplicacion)
+    original = codigo_de(generar_subexpresiones(1))
+    assert ejecutar(dominados, llamadas(original)) == ejecutar(original, llamadas(original))
+
+
+SALTOS = """
+int f(int a) {
+    int r = 0;
+    if (a > 1) { r = a; }
+    while (a > 0) { a = a - 1; if (a == 3) { break; } }
+    return r + a;
+    r = 5;
+}
+"""
+
+
+def test_limpieza_de_saltos_y_codigo_inalcanzable():
+    codigo = codigo_de(SALTOS)
+    estadisticas = limpiar_codigo(codigo)
+    assert estadisticas["inalcanzables"] > 0 and estadisticas["saltos_redirigidos"] > 0
+    # Los goto del if sin else, del break y de la vuelta se funden con los condicionales
+    assert OP_SALTO not in codigo.ops
+    assert codigo.ops[-1] == OP_RETORNO
+    pedidas = [("f", [a]) for a in range(-1, 7)]
+    assert ejecutar(codigo, pedidas) == ejecutar(codigo_de(SALTOS), pedidas)
+
+
+def test_reciclado_de_temporales():
+    codigo = codigo_de(PROGRAMAS["funciones"])
+    distintos, marco = len(codigo.temporales()), tamano_marco(codigo)
+    reciclar_temporales(codigo)
+    assert len(codigo.temporales()) < distintos and tamano_marco(codigo) < marco
+    # Cada tramo numera sus temporales desde t0 sin huecos
+    for _, inicio, fin in tramos_programa(codigo):
+        numeros = sorted(t >> 2 for t in codigo.temporales(inicio, fin))
+        assert numeros == list(range(len(numeros)))
+    original = codigo_de(PROGRAMAS["funciones"])
+    assert ejecutar(codigo, llamadas(original)) == ejecutar(original, llamadas(original))
+
+
+CORTOCIRCUITO = """
+int contador = 0;
+int marcar(int x) { contador = contador + 1; return x; }
+int f(int a, int b) {
+    int r = 0;
+    if (a > 0 && marcar(b) > 2 || marcar(a) == 0) { r = 1; }
+    bool v = a > 1 || marcar(b) > 0 && b < 5;
+    if (v) { r = r + 2; }
+    while (a < 3 && marcar(a) != 2) { a = a + 1; }
+    return r;
+}
+"""
+
+
+def cortocircuito(a, b):
+    """Lo que devuelve f(a, b) de CORTOCIRCUITO y las llamadas a marcar() que hace"""
+    contador = 0
+
+    def marcar(x):
+        nonlocal contador
+        contador += 1
+        return x
+
+    r = 1 if a > 0 and marcar(b) > 2 or marcar(a) == 0 else 0
+    if a > 1 or marcar(b) > 0 and b < 5:
+        r += 2
+    while a < 3 and marcar(a) != 2:
+        a += 1
+    return r, contador
+
+
+@pytest.mark.parametrize("nivel", range(NIVEL_MAXIMO + 1))
+def test_cortocircuito(nivel):
+    codigo = codigo_de(CORTOCIRCUITO)
+    assert CODIGO_OPERACION["AND_LOGICO"] not in codigo.ops
+    assert CODIGO_OPERACION["OR_LOGICO"] not in codigo.ops
+    optimizar(codigo, nivel)
+    for a in range(-1, 5):
+        for b in range(-1, 7):
+            r, contador = cortocircuito(a, b)
+            assert ejecutar(codigo, [("f", [a, b])]) == ([r], {"contador": contador})
+
+
+def test_expansion_de_hojas():
+    # cuadrado() y maximo() no llaman a nadie: no queda ninguna llamada
+    original = codigo_de(generar_llamadas(1))
+    codigo = codigo_de(generar_llamadas(1))
+    assert OP_LLAMADA in original.ops
+    expandir_llamadas(codigo)
+    assert OP_LLAMADA not in codigo.ops
+    assert ejecutar(codigo, llamadas(original)) == ejecutar(original, llamadas(original))
+
+
+@pytest.mark.parametrize("heuristica", [Heuristica(solo_hojas=True), Heuristica(tamano_maximo=0),
+                                        Heuristica(crecimiento_maximo=1)])
+def test_opciones_de_la_expansion(heuristica):
+    original = codigo_de(PROGRAMAS["llamadas"])
+    optimizado = codigo_de(PROGRAMAS["llamadas"])
+    informe = optimizar(optimizado, opciones={"expansión de llamadas": {"heuristica": heuristica}})
+    estadisticas = informe.pases[0][3]
+    assert len(estadisticas["decisiones"]) == sum(estadisticas[motivo] for motivo in estadisticas
+                                                  if motivo != "decisiones")
+    assert ejecutar(optimizado, llamadas(original)) == ejecutar(original, llamadas(original))
+
+
+def test_pase_desconocido():
+    with pytest.raises(ValueError):
+        optimizar(codigo_de(EJEMPLO), opciones={"inexistente": {}})
@@ -0,0 +1,64 @@
+import pytest
+
+from interprete import codigo_de, ejecutar
+from intermedio import CODIGO_OPERACION
+from optimizacion_bucles import optimizar_bucles
+from propagacion_constantes import propagar_constantes
+
+OP_MODULO = CODIGO_OPERACION["MODULO"]
+
+
+def restos(inicial, paso, divisor):
+    return f"""
+int f(int n) {{
+    int suma = 0;
+    for (int i = {inicial}; i < n; i = i + {paso}) {{
+        suma = suma * 3 + i % {divisor};
+    }}
+    return suma;
+}}
+"""
+
+
+@pytest.mark.parametrize("inicial, paso, divisor", [
+    (0, 1, 2),  # s = 1 - s
+    (0, 3, 2),
+    (1, 1, 3),  # s = s + 1, y resta 3 al llegar a 3
+    (2, 4, 3),  # paso mayor que el divisor
+    (5, 6, 3),  # paso múltiplo del divisor: s no cambia
+    (0, 1, 1),
+    (7, 2, 16),
+])
+def test_reduccion_del_resto(inicial, paso, divisor):
+    fuente = restos(inicial, paso, divisor)
+    codigo = codigo_de(fuente)
+    assert optimizar_bucles(codigo)["operaciones_reducidas"] == 1
+    assert OP_MODULO not in codigo.ops
+    original = codigo_de(fuente)
+    for n in range(0, 40, 3):
+        assert ejecutar(codigo, [("f", [n])]) == ejecutar(original, [("f", [n])])
+
+
+@pytest.mark.parametrize("fuente", [
+    restos("0 - 3", 1, 3),
+    restos(0, 1, 0),
+    restos(0, 1, "(0 - 3)"),
+    "int f(int n) { int s = 0; for (int i = 0; i < n; i = i + 1) { i = i - 2; s = s + i % 3; i = i + 3; } "
+    "return s; }",
+    "int f(int n) { int s = 0; for (int i = n; i < 30; i = i + 1) { s = s + i % 3; } return s; }",
+], ids=["inicial_negativo", "divisor_cero", "divisor_negativo", "paso_negativo", "inicial_variable"])
+def test_resto_sin_reducir(fuente):
+    # Con las constantes ya propagadas, como en optimizar()
+    codigo = codigo_de(fuente)
+    propagar_constantes(codigo)
+    optimizar_bucles(codigo)
+    assert OP_MODULO in codigo.ops
+
+
+def test_reduccion_del_producto():
+    fuente = "int f(int n) { int s = 0; for (int i = n; i < 20; i = i + 2) { s = s + i * 5; } return s; }"
+    codigo = codigo_de(fuente)
+    assert optimizar_bucles(codigo)["operaciones_reducidas"] == 1
+    original = codigo_de(fuente)
+    for n in range(-5, 25, 4):
+        assert ejecutar(codigo, [("f", [n])]) == ejecutar(original, [("f", [n])])
@@ -0,0 +1,60 @@
+"""
+Trazas de depuración del compilador.
+
+Todas las fases (léxico, parser, semántico, código intermedio) emiten sus
+mensajes de depuración a través de la instancia global 'traza'. Con la traza
+apagada (nivel NINGUNO, el valor por defecto) el coste es una comparación de
+enteros: los llamadores comprueban el nivel antes de formatear el mensaje:
+
+    if traza.nivel >= DEBUG:
+        traza.emitir("parser", DEBUG, f"Esperado: {token_type}")
+"""
+from collections import deque
+
+NINGUNO = 0
+ERROR = 1
+INFO = 2
+DEBUG = 3
+
+NOMBRES_NIVEL = {ERROR: "ERROR", INFO: "INFO", DEBUG: "DEBUG"}
+
+
+def gancho_consola(fase, nivel, mensaje):
+    """Gancho que imprime cada evento por stdout"""
+    print(f"[{NOMBRES_NIVEL[nivel]} {fase.upper()}] {mensaje}")
+
+
+class Trazador:
+    def __init__(self):
+        self.nivel = NINGUNO
+        self.ganchos = []
+        self.anillo = None  # deque con los últimos eventos, si se pidió
+
+    def configurar(self, nivel=NINGUNO, ganchos=(), capacidad_anillo=0):
+        """
+        Fija el nivel máximo que se emite, los ganchos que reciben cada evento
+        (fase, nivel, mensaje) y el tamaño del anillo en memoria (0 = sin anillo).
+        """
+        self.nivel = nivel
+        self.ganchos = list(ganchos)
+        self.anillo = deque(maxlen=capacidad_anillo) if capacidad_anillo else None
+
+    def emitir(self, fase, nivel, mensaje):
+        if nivel > self.nivel:
+            return
+        if self.anillo is not None:
+            self.anillo.append((fase, nivel, mensaje))
+        for gancho in self.ganchos:
+            gancho(fase, nivel, mensaje)
+
+    def ultimos_eventos(self):
+        """Eventos guardados en el anillo, del más antiguo al más reciente"""
+        return list(self.anillo) if self.anillo is not None else []
+
+    def volcar(self):
+        """Texto con los últimos eventos, para informes de fallo"""
+        return "\n".join(f"[{NOMBRES_NIVEL[nivel]} {fase.upper()}] {mensaje}"
+                         for fase, nivel, mensaje in self.ultimos_eventos())
+
+
+traza = Trazador()